@@ -0,0 +1,604 @@
+import xml.etree.ElementTree as ET
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from typing import Callable, List, Optional
+from utils import NAMESPACES, extract_article, extract_article_streaming, extract_articles, extract_fields, generate_xml_files, process_xml_files
+import storage
+from storage import STORES, data_file, data_path, read_table, write_table
+from process_dhq_articles import check_duplicates, infer_dates, infer_issue_data, create_dataset, extract_dataset, finalize_dataset, merge_article_links
+from dataset_schema import ARTICLE_KEY, align_categories, apply_schema, memory_usage_mb
+import dhq_website_scraper
+from dhq_website_scraper import configure_site, crawl_dhq, download_missing_articles, extract_xml_links, parse_issue_page, site_url
+from http_client import configure_client
+from instrumentation import configure_metrics, get_metrics
+from synthetic_corpus import SyntheticCorpus, SyntheticSite, synthetic_metadata
+
+# File the results of the stage benchmarks are appended to under the data root, one JSON record per run
+RESULTS_NAME: str = "benchmark_results.jsonl"
+
+def legacy_extract_fields(root: ET.Element) -> dict:
+    """
+    Function to extract the article fields the way process_xml_files used to, with one
+    `find` (two for the checked fields) per field. Kept as the baseline of the benchmark.
+    Args:
+        root (ET.Element): Root element of the document
+    Returns:
+        dict: Field values keyed by field name
+    """
+    namespaces = NAMESPACES
+    paths = {
+        'DHQarticle-id': ".//tei:publicationStmt/tei:idno[@type='DHQarticle-id']",
+        'volume': ".//tei:publicationStmt/tei:idno[@type='volume']",
+        'issue': ".//tei:publicationStmt/tei:idno[@type='issue']",
+        'articleType': ".//tei:publicationStmt/dhq:articleType",
+        'date_when': ".//tei:publicationStmt/tei:date",
+        'dhq_keywords': ".//tei:encodingDesc/tei:classDecl/tei:taxonomy[@xml:id='dhq_keywords']/tei:bibl",
+        'dhq_abstract': ".//tei:text/tei:front/dhq:abstract/tei:p",
+    }
+    fields = {name: root.find(path, namespaces=namespaces).text if root.find(path, namespaces=namespaces) is not None else None for name, path in paths.items()}
+    language = ".//tei:profileDesc/tei:langUsage/tei:language"
+    fields['language_ident'] = root.find(language, namespaces=namespaces).attrib['ident'] if root.find(language, namespaces=namespaces) is not None else None
+    fields['title_element'] = root.find(".//tei:titleStmt/tei:title", namespaces=namespaces)
+    fields['author_elements'] = root.findall(".//tei:titleStmt/dhq:authorInfo", namespaces=namespaces)
+    fields['body_element'] = root.find(".//tei:text/tei:body", namespaces=namespaces)
+    return fields
+
+def benchmark_field_extraction(xml_files: List[str], repeat: int = 3) -> dict:
+    """
+    Function to time the per-document field extraction before (legacy `find` calls) and after (single-pass extractor).
+    Parsing is excluded from the timing, and both extractors are checked to return the same values.
+    Args:
+        xml_files (List[str]): XML files to benchmark on
+        repeat (int): Number of passes over the files, the fastest pass is reported
+    Returns:
+        dict: Number of documents and the per-document time in microseconds of each extractor
+    """
+    roots = []
+    for file_name in xml_files:
+        try:
+            roots.append(ET.parse(file_name).getroot())
+        except ET.ParseError:
+            continue
+
+    # Both extractors must agree before timing them
+    for root in roots:
+        if legacy_extract_fields(root) != extract_fields(root):
+            raise AssertionError("Single-pass extractor differs from the legacy extractor")
+
+    timings = {}
+    for name, extractor in [('legacy_find', legacy_extract_fields), ('single_pass', extract_fields)]:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for root in roots:
+                extractor(root)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best / max(len(roots), 1) * 1e6
+    return {'documents': len(roots), **{f"{name}_us_per_doc": value for name, value in timings.items()}}
+
+def benchmark_streaming_memory(xml_files: List[str], top_n: int = 5) -> List[dict]:
+    """
+    Function to measure the peak Python memory of the tree-based and the iterparse extraction on the largest files.
+    Args:
+        xml_files (List[str]): XML files to pick the largest from
+        top_n (int): Number of files to measure
+    Returns:
+        List[dict]: One record per file with its size and the peak memory of each extractor in KB
+    """
+    largest = sorted(xml_files, key=os.path.getsize, reverse=True)[:top_n]
+    results = []
+    for file_name in largest:
+        result = {'file_name': file_name, 'size_kb': os.path.getsize(file_name) / 1024}
+        for name, extractor in [('tree', extract_article), ('streaming', extract_article_streaming)]:
+            tracemalloc.start()
+            extractor(file_name)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result[f"{name}_peak_kb"] = peak / 1024
+        results.append(result)
+    return results
+
+def benchmark_storage(df: pd.DataFrame, formats: List[str] = list(STORES)) -> List[dict]:
+    """
+    Function to compare the storage backends on a dataset: file size, write time, full load time,
+    and load time of the metadata only (every column except `body_text`).
+    Args:
+        df (pd.DataFrame): Dataset to store
+        formats (List[str]): Storage formats to compare
+    Returns:
+        List[dict]: One record per format
+    """
+    metadata_columns = [column for column in df.columns if column != 'body_text']
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for data_format in formats:
+            path = os.path.join(directory, f"dataset.{data_format}")
+            try:
+                start = time.perf_counter()
+                write_table(df, path)
+                write_s = time.perf_counter() - start
+            except ImportError as e:
+                print(f"Skipping {data_format}: {e}")
+                continue
+            start = time.perf_counter()
+            read_table(path)
+            read_s = time.perf_counter() - start
+            start = time.perf_counter()
+            read_table(path, columns=metadata_columns)
+            metadata_read_s = time.perf_counter() - start
+            results.append({'format': data_format, 'size_mb': os.path.getsize(path) / 1e6, 'write_s': write_s, 'read_s': read_s, 'metadata_read_s': metadata_read_s})
+    return results
+
+def check_incremental_extraction(n_articles: int = 60, formats: List[str] = list(STORES)) -> List[str]:
+    """
+    Function to check, for each storage format, that extracting a synthetic corpus, then modifying, adding and deleting
+    articles (including the kept copy of a duplicate article) and extracting again incrementally gives the same dataset
+    as extracting the changed corpus from scratch.
+    Args:
+        n_articles (int): Number of articles of the corpus
+        formats (List[str]): Storage formats to check
+    Returns:
+        List[str]: The formats checked
+    """
+    previous_root, previous_format = storage.DATA_ROOT, storage.DATA_FORMAT
+    checked = []
+    try:
+        for data_format in formats:
+            with tempfile.TemporaryDirectory() as root:
+                storage.set_data_root(root)
+                storage.DATA_FORMAT = data_format
+                articles_path = data_path("dhq-journal", "articles")
+                SyntheticCorpus(n_articles).write_repository(articles_path)
+                xml_files = sorted(generate_xml_files(articles_path))
+                # A second copy of an article, one of which is dropped by the cleaning as a duplicate
+                os.makedirs(os.path.join(articles_path, "009998"))
+                shutil.copyfile(xml_files[3], os.path.join(articles_path, "009998", "009998.xml"))
+                try:
+                    df = extract_dataset(articles_path, False)
+                except ImportError as e:
+                    print(f"Skipping {data_format}: {e}")
+                    continue
+                with open(xml_files[0], 'r', encoding='utf-8') as f:
+                    text = f.read()
+                with open(xml_files[0], 'w', encoding='utf-8') as f:
+                    f.write(text.replace('<title type="article" xml:lang="en">', '<title type="article" xml:lang="en">Revised: ', 1))
+                os.makedirs(os.path.join(articles_path, "009999"))
+                with open(xml_files[1], 'r', encoding='utf-8') as f:
+                    text = f.read()
+                article_id = os.path.splitext(os.path.basename(xml_files[1]))[0]
+                with open(os.path.join(articles_path, "009999", "009999.xml"), 'w', encoding='utf-8') as f:
+                    f.write(text.replace(article_id, "009999"))
+                os.remove(xml_files[2])
+                # Deleting the copy that was kept leaves the other one, unchanged since the first extraction
+                copies = [xml_files[3], os.path.join(articles_path, "009998", "009998.xml")]
+                os.remove(df.loc[df['file_name'].isin(copies), 'file_name'].iloc[0])
+
+                incremental = extract_dataset(articles_path, False)
+                full = extract_dataset(articles_path, True)
+                columns = sorted(full.columns)
+                pd.testing.assert_frame_equal(incremental[columns].sort_values('file_name').reset_index(drop=True).astype(str),
+                                              full[columns].sort_values('file_name').reset_index(drop=True).astype(str))
+                checked.append(data_format)
+    finally:
+        storage.set_data_root(previous_root)
+        storage.DATA_FORMAT = previous_format
+    return checked
+
+def check_incremental_crawl(n_articles: int = 60, runs: int = 3) -> int:
+    """
+    Function to check that crawling the website of a synthetic corpus incrementally several times, without any change
+    to the website, saves the same issue and article links every time, e.g. that articles of the preview issue keep their volume and issue.
+    Args:
+        n_articles (int): Number of articles of the corpus
+        runs (int): Number of incremental crawls
+    Returns:
+        int: Number of article links saved
+    """
+    previous_root = storage.DATA_ROOT
+    with tempfile.TemporaryDirectory() as root:
+        storage.set_data_root(root)
+        configure_client(requests_per_second=None)
+        try:
+            with SyntheticSite(SyntheticCorpus(n_articles)) as site:
+                configure_site(site.url, site.url)
+                outputs = []
+                for _ in range(runs):
+                    article_links_df = crawl_dhq(True)
+                    with open(data_path("dhq_issue_links.csv"), 'rb') as f, open(data_file("dhq_article_links"), 'rb') as g:
+                        outputs.append((f.read(), g.read()))
+        finally:
+            storage.set_data_root(previous_root)
+    assert all(output == outputs[0] for output in outputs), "Incremental crawls of an unchanged website saved different links"
+    return len(article_links_df)
+
+def benchmark_cleaning(n_articles: int = 1000, scale: int = 50) -> dict:
+    """
+    Function to time the vectorized cleaning steps on a synthetic corpus scaled up `scale` times.
+    Their equivalence with the per-group implementations they replaced is checked by tests/test_cleaning.py.
+    Args:
+        n_articles (int): Number of articles in the base corpus
+        scale (int): Scale factor of the timed corpus
+    Returns:
+        dict: Number of rows and the time in seconds of each step
+    """
+    df = synthetic_metadata(n_articles * scale)
+    timings = {'rows': len(df)}
+    for name, run in [
+        ('deduplication_and_dates', lambda: infer_dates(check_duplicates(df))),
+        ('issue_data', lambda: infer_issue_data(df)),
+    ]:
+        start = time.perf_counter()
+        run()
+        timings[f"{name}_s"] = time.perf_counter() - start
+    return timings
+
+def legacy_merge_article_links(df: pd.DataFrame, article_links_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to merge the scraped article links as before the compact schema: every key converted to strings and joined as strings
+    Args:
+        df (pd.DataFrame): Dataset
+        article_links_df (pd.DataFrame): Scraped article links
+    Returns:
+        pd.DataFrame: The merged dataset
+    """
+    df = df.copy()
+    article_links_df = article_links_df.rename(columns={'authors': 'scraped_authors', 'editors': 'scraped_editors'})
+    for column in ['volume', 'issue', 'DHQarticle-id']:
+        df[column] = df[column].astype(str)
+        article_links_df[column] = article_links_df[column].astype(str)
+    return pd.merge(df, article_links_df, on=['DHQarticle-id', 'volume', 'issue'], how='left')
+
+def synthetic_dataset(n_articles: int, seed: int = 0) -> tuple:
+    """
+    Function to generate a cleaned dataset and its scraped article links, with the columns and value shapes of the real ones
+    Args:
+        n_articles (int): Number of distinct articles
+        seed (int): Random seed
+    Returns:
+        tuple: The dataset and the article links, with object columns as read from a CSV file
+    """
+    rng = np.random.default_rng(seed)
+    df = synthetic_metadata(n_articles, seed).drop(columns=['issue_title', 'scraped_editors', 'issue_text', 'issue_link'])
+    df = check_duplicates(df).reset_index(drop=True)
+    n_rows = len(df)
+    ids = df['DHQarticle-id']
+    df['articleType'] = pd.Series(rng.choice(['article', 'editorial', 'review', 'case study'], n_rows), dtype=object)
+    df['language_ident'] = pd.Series(rng.choice(['en', 'fr', 'de', 'es'], n_rows, p=[.85, .05, .05, .05]), dtype=object)
+    df['title'] = pd.Series([f"Title of article {i}" for i in ids], dtype=object)
+    df['dhq_abstract'] = pd.Series([f"Abstract of article {i}. " * 10 for i in ids], dtype=object)
+    df['file_name'] = pd.Series([f"../data/dhq_data/{i}.xml" for i in ids], dtype=object)
+    df['authors'] = [[{'author_name': f"Author {i}-{k}", 'affiliation': f"University {(int(i) + k) % 50}"} for k in range(int(i) % 3 + 1)] for i in ids]
+
+    # One link per article, with ids zero-padded or not as on the website
+    links = df[['DHQarticle-id', 'volume', 'issue']].astype(object).copy()
+    links['article_link'] = [f"http://localhost/dhq/vol/{v}/{n}/{i}/{i}.html" for v, n, i in zip(links['volume'], links['issue'], links['DHQarticle-id'])]
+    links['article_title'] = df['title']
+    for column in ['issue_title', 'editors', 'issue_text', 'issue_link']:
+        links[column] = pd.Series([f"{column} {v}.{n}" for v, n in zip(links['volume'], links['issue'])], dtype=object)
+    links['authors'] = pd.Series([f"Author {i}-0, University" for i in ids], dtype=object)
+    return df, links
+
+def benchmark_schema(n_articles: int = 1000, scale: int = 50) -> dict:
+    """
+    Function to measure the memory footprint of a synthetic dataset scaled up `scale` times and the time of the merge
+    of its article links, with object columns and string keys before, and with the compact schema and integer keys after.
+    Both merges are checked to give the same rows.
+    Args:
+        n_articles (int): Number of articles in the base corpus
+        scale (int): Scale factor of the corpus
+    Returns:
+        dict: Number of rows, memory in MB and merge time in seconds of each representation, and the time of the integer-keyed join alone
+    """
+    df, links = synthetic_dataset(n_articles * scale)
+    compact_df = apply_schema(df)
+    result = {'rows': len(df), 'object_mb': memory_usage_mb(df), 'compact_mb': memory_usage_mb(compact_df)}
+
+    start = time.perf_counter()
+    expected = legacy_merge_article_links(df, links)
+    result['legacy_merge_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    merged = merge_article_links(compact_df, links)
+    result['compact_merge_s'] = time.perf_counter() - start
+    # The join alone, once the article links have the compact schema too
+    compact_links = apply_schema(links.rename(columns={'authors': 'scraped_authors', 'editors': 'scraped_editors'})).drop(columns=['DHQarticle-id'])
+    left, right = align_categories(compact_df, compact_links, ['volume', 'issue'])
+    start = time.perf_counter()
+    pd.merge(left, right, on=[ARTICLE_KEY, 'volume', 'issue'], how='left')
+    result['compact_join_s'] = time.perf_counter() - start
+    result['object_merged_mb'] = memory_usage_mb(expected)
+    result['compact_merged_mb'] = memory_usage_mb(merged)
+
+    columns = [column for column in expected.columns if column != 'authors']
+    pd.testing.assert_frame_equal(expected[columns].astype(str), merged[columns].astype(str))
+    return result
+
+def legacy_parse_issue_page(issue_html: str, issue_text: str, issue_link: str) -> list:
+    """
+    Function to parse an issue page as before the fast parsing path: a full BeautifulSoup tree of the page
+    Args:
+        issue_html (str): HTML of the issue page
+        issue_text (str): Text of the issue link
+        issue_link (str): Link to the issue page
+    Returns:
+        list: List of dictionaries, one per article in the issue
+    """
+    toc = BeautifulSoup(issue_html, "html.parser").find("div", {"id": "toc"})
+    if toc is None:
+        return []
+    issue_title = toc.find_all('h2')[0].get_text()
+    editors = toc.find_all('h3')
+    editors = editors[0].get_text() if len(editors) > 0 else ''
+    article_records = []
+    for article in toc.find_all('div', {'class': 'articleInfo'}):
+        abstract = article.find('span', {'class': 'viewAbstract'})
+        article_records.append({'issue_title': issue_title, 'editors': editors, 'authors': article.find_all('div')[0].get_text(),
+                                'article_link': site_url(article.find('a').get('href')), 'article_title': article.find('a').get_text(),
+                                'abstract': abstract.get_text() if abstract else '', 'issue_text': issue_text, "issue_link": issue_link})
+    return article_records
+
+def legacy_extract_xml_links(article_html: str) -> list:
+    """
+    Function to extract the XML links of an article page as before the fast parsing path: every link of a full BeautifulSoup tree
+    Args:
+        article_html (str): HTML of the article page
+    Returns:
+        list: List of hrefs containing 'xml'
+    """
+    xml_links = BeautifulSoup(article_html, "html.parser").find_all('a')
+    return [link.get('href') for link in xml_links if link.get('href') and 'xml' in link.get('href')]
+
+def html_fixtures(n_articles: int = 300, fixtures_directory: Optional[str] = None) -> tuple:
+    """
+    Function to collect the issue and article pages the HTML parsers are compared on: the pages of a synthetic corpus,
+    plus saved pages of the DHQ website if a directory is given (issue pages are the `index.html` files, the others are article pages)
+    Args:
+        n_articles (int): Number of articles of the synthetic corpus
+        fixtures_directory (Optional[str]): Directory of saved HTML pages
+    Returns:
+        tuple: Lists of issue pages and article pages
+    """
+    corpus = SyntheticCorpus(n_articles)
+    issue_pages = [corpus.issue_html(volume, issue) for volume, issue in corpus.issues()]
+    article_pages = [corpus.article_html(index) for index in range(n_articles)]
+    if fixtures_directory:
+        for path in sorted(glob.glob(os.path.join(fixtures_directory, '**', '*.html'), recursive=True)):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                (issue_pages if os.path.basename(path) == 'index.html' else article_pages).append(f.read())
+    return issue_pages, article_pages
+
+def benchmark_html_parsing(issue_pages: List[str], article_pages: List[str], repeat: int = 3) -> dict:
+    """
+    Function to time the fast parsing path, with each available parser, and the full BeautifulSoup parse per page.
+    Both give the same records and XML links, as checked by tests/test_html_parsing.py.
+    Args:
+        issue_pages (List[str]): HTML of issue pages
+        article_pages (List[str]): HTML of article pages
+        repeat (int): Number of timing runs, the best one is kept
+    Returns:
+        dict: Time per page in microseconds of each parser
+    """
+    # Time the functions themselves, without the instrumentation span
+    fast_parse_issue_page = parse_issue_page.__wrapped__
+    fast_extract_xml_links = extract_xml_links.__wrapped__
+    parsers = ["lxml", "html.parser"] if dhq_website_scraper.lxml is not None else ["html.parser"]
+    default_parser = dhq_website_scraper.HTML_PARSER
+    timings = {}
+    try:
+        for parser in parsers:
+            dhq_website_scraper.HTML_PARSER = parser
+            timings[f"{parser}_issue_us_per_page"] = min(_time_pages(lambda page: fast_parse_issue_page(page, "issue", "link"), issue_pages) for _ in range(repeat))
+    finally:
+        dhq_website_scraper.HTML_PARSER = default_parser
+    timings['legacy_issue_us_per_page'] = min(_time_pages(lambda page: legacy_parse_issue_page(page, "issue", "link"), issue_pages) for _ in range(repeat))
+    timings['regex_article_us_per_page'] = min(_time_pages(fast_extract_xml_links, article_pages) for _ in range(repeat))
+    timings['legacy_article_us_per_page'] = min(_time_pages(legacy_extract_xml_links, article_pages) for _ in range(repeat))
+    return {'issue_pages': len(issue_pages), 'article_pages': len(article_pages), **timings}
+
+def _time_pages(function: Callable[[str], object], pages: List[str]) -> float:
+    """
+    Function to time a parser over pages
+    Args:
+        function (Callable[[str], object]): The parser
+        pages (List[str]): HTML of the pages
+    Returns:
+        float: Time per page in microseconds
+    """
+    start = time.perf_counter()
+    for page in pages:
+        function(page)
+    return (time.perf_counter() - start) / max(len(pages), 1) * 1e6
+
+def benchmark_stages(n_articles: int, workers: int = 1, root: Optional[str] = None) -> dict:
+    """
+    Function to time each stage of the pipeline on a synthetic corpus, with the website served by a local server:
+    generating the corpus, listing the XML files, extracting them (from scratch, then again with nothing changed),
+    crawling the website, downloading the missing articles, creating the dataset and finalizing it.
+    Args:
+        n_articles (int): Number of articles of the corpus
+        workers (int): Number of worker processes used to extract the XML files
+        root (Optional[str]): Data root to run in, a temporary directory if None
+    Returns:
+        dict: Wall time, CPU time, peak RSS and items of each stage
+    """
+    previous_root = storage.DATA_ROOT
+    with tempfile.TemporaryDirectory() as temporary_root:
+        storage.set_data_root(root or temporary_root)
+        os.makedirs(storage.DATA_ROOT, exist_ok=True)
+        metrics = configure_metrics()
+        # No rate limit or cache, so the local server is the only bound on the crawl
+        configure_client(requests_per_second=None)
+        corpus = SyntheticCorpus(n_articles)
+        articles_path = data_path("dhq-journal", "articles")
+        try:
+            with SyntheticSite(corpus) as site:
+                configure_site(site.url, site.url)
+                with metrics.span("generate_corpus") as span:
+                    span.add(items=corpus.write_repository(articles_path))
+                with metrics.span("generate_xml_files") as span:
+                    xml_files = generate_xml_files(articles_path)
+                    span.add(items=len(xml_files))
+                with metrics.span("process_xml_files") as span:
+                    df = process_xml_files(xml_files, data_file("extracted_dhq_data"), True, workers)
+                    span.add(items=len(df))
+                with metrics.span("process_xml_files_unchanged") as span:
+                    df = process_xml_files(xml_files, data_file("extracted_dhq_data"), False, workers)
+                    span.add(items=len(df))
+                with metrics.span("crawl_website") as span:
+                    article_links_df = crawl_dhq()
+                    span.add(items=len(article_links_df))
+                with metrics.span("download_missing_articles") as span:
+                    span.add(items=len(download_missing_articles(article_links_df, df, data_path("missing_dhq_data"))))
+                with metrics.span("create_dataset") as span:
+                    processed_df = create_dataset(articles_path, data_file("processed_dhq_data"), True, workers)
+                    span.add(items=len(processed_df))
+                with metrics.span("finalize_dataset") as span:
+                    processed_df['DHQarticle-id'] = processed_df['DHQarticle-id'].astype(str).str.zfill(6)
+                    finalize_dataset(processed_df)
+                    span.add(items=len(processed_df))
+        finally:
+            storage.set_data_root(previous_root)
+    stage_names = ['generate_corpus', 'generate_xml_files', 'process_xml_files', 'process_xml_files_unchanged', 'crawl_website',
+                   'download_missing_articles', 'create_dataset', 'finalize_dataset']
+    summary = metrics.summary()
+    return {
+        'stages': {name: summary['stages'][name] for name in stage_names},
+        'http': {key: summary['http'].get(key) for key in ('requests', 'bytes', 'status_codes')},
+    }
+
+def git_revision() -> dict:
+    """
+    Function to get the commit the benchmark ran on
+    Returns:
+        dict: Commit SHA and whether the working tree had uncommitted changes, None values outside of a git repository
+    """
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).strip().decode()
+        dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], stderr=subprocess.DEVNULL).strip() != b""
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': dirty}
+
+def save_result(result: dict, results_path: Optional[str] = None) -> None:
+    """
+    Function to append a benchmark result to the results file
+    Args:
+        result (dict): The result
+        results_path (Optional[str]): Path to the JSON lines results file, data_path(RESULTS_NAME) if None
+    """
+    with open(results_path or data_path(RESULTS_NAME), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result) + "\n")
+
+def load_results(results_path: Optional[str] = None) -> List[dict]:
+    """
+    Function to load the stored benchmark results
+    Args:
+        results_path (Optional[str]): Path to the JSON lines results file, data_path(RESULTS_NAME) if None
+    Returns:
+        List[dict]: The results, oldest first
+    """
+    results_path = results_path or data_path(RESULTS_NAME)
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare_results(result: dict, baseline: dict) -> List[dict]:
+    """
+    Function to compare the stage timings of a result with a baseline run at the same scale
+    Args:
+        result (dict): The result
+        baseline (dict): The baseline result
+    Returns:
+        List[dict]: One record per stage with both wall times and the relative change
+    """
+    comparison = []
+    for name, stats in result['stages'].items():
+        before = baseline['stages'].get(name, {}).get('wall_s')
+        change = (stats['wall_s'] - before) / before if before else None
+        comparison.append({'stage': name, 'baseline_s': before, 'wall_s': stats['wall_s'], 'change': change})
+    return comparison
+
+def run_stage_benchmark(n_articles: int, workers: int, results_path: Optional[str] = None, regression_threshold: float = 0.2) -> dict:
+    """
+    Function to run the stage benchmarks, store the result with the commit it ran on,
+    and print the change of each stage against the latest stored result at the same scale from another commit.
+    Args:
+        n_articles (int): Number of articles of the synthetic corpus
+        workers (int): Number of worker processes used to extract the XML files
+        results_path (Optional[str]): Path to the JSON lines results file, data_path(RESULTS_NAME) if None
+        regression_threshold (float): Relative slowdown flagged as a regression
+    Returns:
+        dict: The result
+    """
+    # Resolved before the stages run, which switch the data root to a temporary directory
+    results_path = results_path or data_path(RESULTS_NAME)
+    result = {
+        'timestamp': time.time(),
+        **git_revision(),
+        'n_articles': n_articles,
+        'workers': workers,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        **benchmark_stages(n_articles, workers),
+    }
+    same_scale = [previous for previous in load_results(results_path)
+                  if (previous['n_articles'] == n_articles) and (previous['workers'] == workers) and (previous['commit'] != result['commit'] or previous['dirty'])]
+    save_result(result, results_path)
+
+    baseline = same_scale[-1] if same_scale else None
+    print(f"Stages on {n_articles} synthetic articles with {workers} workers" + (f", compared with {baseline['commit'][:10]}" if baseline and baseline['commit'] else ""))
+    for row in compare_results(result, baseline) if baseline else [{'stage': name, 'wall_s': stats['wall_s'], 'change': None} for name, stats in result['stages'].items()]:
+        stats = result['stages'][row['stage']]
+        change = f" ({row['change']:+.0%}{', REGRESSION' if row['change'] > regression_threshold else ''})" if row['change'] is not None else ""
+        print(f"  {row['stage']}: {row['wall_s']:.2f}s wall, {stats['cpu_s']:.2f}s CPU, {stats['items']} items{change}")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the DHQ pipeline")
+    parser.add_argument("directory", nargs="?", help="Articles directory of the micro benchmarks, dhq-journal/articles under the data root by default")
+    parser.add_argument("--synthetic", type=int, metavar="N_ARTICLES", help="Time every stage on a synthetic corpus of N articles instead, and store the result")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes used to extract the XML files")
+    parser.add_argument("--results", help="JSON lines file the stage benchmark results are appended to, benchmark_results.jsonl under the data root by default")
+    parser.add_argument("--html-fixtures", metavar="DIRECTORY", help="Directory of saved DHQ issue (index.html) and article pages to check the HTML parsers on")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        run_stage_benchmark(args.synthetic, args.workers, args.results)
+    else:
+        xml_files = generate_xml_files(args.directory or data_path("dhq-journal", "articles"))
+        result = benchmark_field_extraction(xml_files)
+        print(f"Field extraction on {result['documents']} documents: "
+              f"{result['legacy_find_us_per_doc']:.1f} us/doc before, {result['single_pass_us_per_doc']:.1f} us/doc after")
+        for result in benchmark_streaming_memory(xml_files):
+            print(f"{result['file_name']} ({result['size_kb']:.0f} KB): peak {result['tree_peak_kb']:.0f} KB with the tree, "
+                  f"{result['streaming_peak_kb']:.0f} KB streaming")
+        records, _ = extract_articles(xml_files)
+        for result in benchmark_storage(pd.DataFrame(records)):
+            print(f"{result['format']}: {result['size_mb']:.1f} MB, write {result['write_s']:.2f}s, "
+                  f"load {result['read_s']:.2f}s, metadata-only load {result['metadata_read_s']:.2f}s")
+        print(f"Incremental extraction matches a full extraction in: {', '.join(check_incremental_extraction())}")
+        print(f"Incremental crawls of an unchanged website save the same {check_incremental_crawl()} article links")
+        result = benchmark_html_parsing(*html_fixtures(fixtures_directory=args.html_fixtures))
+        parsers = ", ".join(f"{key.split('_issue')[0]} {value:.0f} us" for key, value in result.items() if key.endswith('_issue_us_per_page') and not key.startswith('legacy'))
+        print(f"Parsing {result['issue_pages']} issue pages: {result['legacy_issue_us_per_page']:.0f} us/page with the full BeautifulSoup tree, {parsers} "
+              f"from the table of contents; XML links of {result['article_pages']} article pages: {result['legacy_article_us_per_page']:.0f} us/page before, "
+              f"{result['regex_article_us_per_page']:.0f} us/page matched")
+        result = benchmark_cleaning()
+        print(f"Cleaning {result['rows']} synthetic rows: deduplication and date inference {result['deduplication_and_dates_s']:.2f}s, "
+              f"issue data {result['issue_data_s']:.2f}s")
+        result = benchmark_schema()
+        print(f"Dataset of {result['rows']} synthetic rows: {result['object_mb']:.0f} MB with object columns, {result['compact_mb']:.0f} MB compact; "
+              f"merging the article links {result['legacy_merge_s']:.2f}s on string keys ({result['object_merged_mb']:.0f} MB), "
+              f"{result['compact_merge_s']:.2f}s on integer keys ({result['compact_merged_mb']:.0f} MB) of which {result['compact_join_s']:.2f}s joining")
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+# Integer key of an article, its DHQarticle-id as a number ('000680' -> 680), used to join the tables of the dataset
+ARTICLE_KEY: str = 'article_key'
+
+# Low-cardinality columns, stored as categoricals with sorted categories so that sorting them still sorts the values
+CATEGORICAL_COLUMNS: List[str] = ['volume', 'issue', 'articleType', 'language_ident', 'issue_title', 'scraped_editors', 'issue_text', 'issue_link']
+
+# Free-text columns, stored as Arrow-backed strings
+STRING_COLUMNS: List[str] = ['DHQarticle-id', 'date_when', 'dhq_keywords', 'dhq_abstract', 'file_name', 'title', 'body_text',
+                             'scraped_authors', 'article_link', 'article_title', 'abstract']
+
+# Columns of the author table, one row per author of an article
+AUTHOR_COLUMNS: List[str] = [ARTICLE_KEY, 'position', 'author_name', 'affiliation', 'email', 'bio']
+
+try:
+    # Arrow-backed strings with NaN as the missing value, like the object columns they replace
+    STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+except (ImportError, TypeError):
+    # Without pyarrow or with pandas < 2.3 the columns are left as they are
+    STRING_DTYPE = None
+
+def article_keys(article_ids: pd.Series) -> pd.Series:
+    """
+    Function to turn DHQ article ids into integer keys, whatever their zero padding
+    Args:
+        article_ids (pd.Series): DHQarticle-id values, as strings or numbers
+    Returns:
+        pd.Series: The keys, missing for ids that are not numbers
+    """
+    return pd.to_numeric(pd.Series(article_ids, dtype=object), errors='coerce').astype('Int32')
+
+def to_categorical(values: pd.Series) -> pd.Series:
+    """
+    Function to convert a column to a categorical with sorted string categories.
+    Values read back as numbers (e.g. issues from a CSV file) become strings, like the categories.
+    Args:
+        values (pd.Series): The column
+    Returns:
+        pd.Series: The categorical column
+    """
+    values = values.astype('category')
+    categories = values.cat.categories.astype(str)
+    if not categories.is_unique:
+        # The same value both as a number and as a string
+        values = values.astype(object)
+        values = values.where(values.isna(), values.astype(str)).astype('category')
+        categories = values.cat.categories
+    values = values.cat.rename_categories(list(categories))
+    return values.cat.reorder_categories(sorted(categories))
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to convert a table of the dataset to the compact schema: an integer article key,
+    categoricals for the low-cardinality columns and Arrow-backed strings for the text columns.
+    Columns that are not in the table are ignored, and the author lists are kept as they are (see explode_authors).
+    Args:
+        df (pd.DataFrame): Table with a 'DHQarticle-id' column
+    Returns:
+        pd.DataFrame: The converted table
+    """
+    df = df.copy()
+    if 'DHQarticle-id' in df.columns:
+        df[ARTICLE_KEY] = article_keys(df['DHQarticle-id'])
+    for column in CATEGORICAL_COLUMNS:
+        if (column in df.columns) and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = to_categorical(df[column])
+    if STRING_DTYPE is not None:
+        for column in STRING_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype(STRING_DTYPE)
+    return df
+
+def align_categories(left: pd.DataFrame, right: pd.DataFrame, columns: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Function to give categorical columns of two tables the same categories, so that joining on them compares integer codes
+    Args:
+        left (pd.DataFrame): First table
+        right (pd.DataFrame): Second table
+        columns (List[str]): Categorical columns of both tables
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The tables with the same categories in the columns
+    """
+    left, right = left.copy(), right.copy()
+    for column in columns:
+        left[column], right[column] = to_categorical(left[column]), to_categorical(right[column])
+        categories = sorted(set(left[column].cat.categories) | set(right[column].cat.categories))
+        left[column] = left[column].cat.set_categories(categories)
+        right[column] = right[column].cat.set_categories(categories)
+    return left, right
+
+def explode_authors(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to build the author table of the dataset, one row per author of an article in the order of the article
+    Args:
+        df (pd.DataFrame): Dataset with 'DHQarticle-id' and 'authors' (lists of dictionaries) columns
+    Returns:
+        pd.DataFrame: The author table, keyed by the integer article key
+    """
+    keys = article_keys(df['DHQarticle-id'])
+    records = [{ARTICLE_KEY: key, 'position': position, **author}
+               for key, authors in zip(keys, df['authors']) if isinstance(authors, list) and not pd.isna(key)
+               for position, author in enumerate(authors)]
+    authors_df = pd.DataFrame(records, columns=AUTHOR_COLUMNS)
+    authors_df[ARTICLE_KEY] = authors_df[ARTICLE_KEY].astype('Int32')
+    authors_df['position'] = authors_df['position'].astype('int16')
+    authors_df['affiliation'] = authors_df['affiliation'].astype('category')
+    if STRING_DTYPE is not None:
+        for column in ['author_name', 'email', 'bio']:
+            authors_df[column] = authors_df[column].astype(STRING_DTYPE)
+    return authors_df
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """
+    Function to measure the memory used by a table, including the Python objects it refers to
+    Args:
+        df (pd.DataFrame): The table
+    Returns:
+        float: Memory in MB
+    """
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
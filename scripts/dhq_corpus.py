@@ -0,0 +1,166 @@
+import mmap
+import os
+import sys
+import time
+import pandas as pd
+from typing import Iterable, Iterator, List, Optional, Tuple
+from storage import data_file, data_path, read_table, write_table
+
+# Blob of the body texts of the corpus under the data root, concatenated as UTF-8 without separators
+CORPUS_BLOB: str = "dhq_corpus.bin"
+# Name of the metadata table of the corpus, with the offset and length of each body in the blob
+CORPUS_INDEX: str = "dhq_corpus_index"
+# Columns of the metadata table loaded when the corpus is opened, the others are loaded on first use
+INDEX_COLUMNS: List[str] = ['DHQarticle-id', 'volume', 'issue', 'title', 'body_offset', 'body_length']
+
+def export_corpus(df: pd.DataFrame, corpus_path: Optional[str] = None, index_path: Optional[str] = None) -> None:
+    """
+    Function to write the processed dataset as a corpus: the body texts in one blob file, and the metadata of every article
+    with the position of its body in the blob. Both files are written under temporary names and then replace the previous corpus.
+    Args:
+        df (pd.DataFrame): Processed dataset
+        corpus_path (Optional[str]): Path to the blob of body texts, data/dhq_corpus.bin by default
+        index_path (Optional[str]): Path to the metadata table, data/dhq_corpus_index in the configured format by default
+    """
+    corpus_path = corpus_path or data_path(CORPUS_BLOB)
+    index_path = index_path or data_file(CORPUS_INDEX)
+    df = df.drop_duplicates(subset=['DHQarticle-id'], keep='last')
+    bodies = df['body_text'] if 'body_text' in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    offsets: List[int] = []
+    lengths: List[int] = []
+    tmp_path = f"{corpus_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        offset = 0
+        for body in bodies:
+            if body is None or (not isinstance(body, str) and pd.isna(body)):
+                # No body, as opposed to an empty one
+                offsets.append(offset)
+                lengths.append(-1)
+                continue
+            data = str(body).encode('utf-8')
+            f.write(data)
+            offsets.append(offset)
+            lengths.append(len(data))
+            offset += len(data)
+    os.replace(tmp_path, corpus_path)
+
+    index_df = df.drop(columns=['body_text'], errors='ignore').copy()
+    index_df['body_offset'] = offsets
+    index_df['body_length'] = lengths
+    write_table(index_df.reset_index(drop=True), index_path)
+    print(f"Corpus: {len(index_df)} articles, {offset / 1024 ** 2:.1f} MB of body text")
+
+class DHQCorpus:
+    """
+    Read-only view of the corpus. Only the ids, volumes, issues and titles are loaded when the corpus is opened,
+    the rest of the metadata is loaded on first use, and the body texts stay in a memory-mapped blob and are only
+    decoded when asked for, so memory grows with the articles read rather than with the corpus.
+    Use as `with DHQCorpus() as corpus: corpus.body('000680')`.
+    """
+    def __init__(self, corpus_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.corpus_path = corpus_path or data_path(CORPUS_BLOB)
+        self.index_path = index_path or data_file(CORPUS_INDEX)
+        self.index = read_table(self.index_path, columns=INDEX_COLUMNS)
+        self._metadata: Optional[pd.DataFrame] = None
+        # Row of each article in the metadata
+        self._rows = {article_id: row for row, article_id in enumerate(self.index['DHQarticle-id'])}
+        self._offsets = self.index['body_offset'].tolist()
+        self._lengths = self.index['body_length'].tolist()
+        self._file = open(self.corpus_path, 'rb')
+        # An empty file cannot be memory-mapped
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(self._file.fileno()).st_size > 0 else b''
+
+    @property
+    def metadata(self) -> pd.DataFrame:
+        """
+        Metadata of every article (authors, abstract, keywords...), without the body texts
+        """
+        if self._metadata is None:
+            self._metadata = read_table(self.index_path).drop(columns=['body_offset', 'body_length'])
+        return self._metadata
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self._rows
+
+    def ids(self) -> List[str]:
+        """
+        Function to get the ids of the articles of the corpus
+        Returns:
+            List[str]: DHQ article ids, in dataset order
+        """
+        return list(self._rows)
+
+    def body(self, article_id: str) -> Optional[str]:
+        """
+        Function to get the body text of an article
+        Args:
+            article_id (str): DHQ article id, zero-padded (e.g. '000680')
+        Returns:
+            Optional[str]: The body text, None if the article has no body
+        Raises:
+            KeyError: If the article is not in the corpus
+        """
+        row = self._rows[article_id]
+        offset, length = self._offsets[row], self._lengths[row]
+        if length < 0:
+            return None
+        return self._blob[offset:offset + length].decode('utf-8')
+
+    def article(self, article_id: str) -> dict:
+        """
+        Function to get the metadata and body text of an article
+        Args:
+            article_id (str): DHQ article id, zero-padded (e.g. '000680')
+        Returns:
+            dict: The record of the article, as in the processed dataset
+        Raises:
+            KeyError: If the article is not in the corpus
+        """
+        body = self.body(article_id)
+        record = self.metadata.iloc[self._rows[article_id]].to_dict()
+        return {**record, 'body_text': body}
+
+    def __getitem__(self, article_id: str) -> dict:
+        return self.article(article_id)
+
+    def iter_bodies(self, article_ids: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Function to iterate over body texts, one at a time
+        Args:
+            article_ids (Optional[Iterable[str]]): DHQ article ids, every article in blob order if None
+        Yields:
+            Tuple[str, Optional[str]]: Article id and body text
+        """
+        for article_id in (article_ids if article_ids is not None else self._rows):
+            yield article_id, self.body(article_id)
+
+    def __iter__(self) -> Iterator[Tuple[str, Optional[str]]]:
+        return self.iter_bodies()
+
+    def close(self) -> None:
+        """
+        Function to release the memory map and the blob file
+        """
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+    def __enter__(self) -> "DHQCorpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+if __name__ == "__main__":
+    # Build the corpus from the processed dataset, or print the body of an article
+    if len(sys.argv) > 1:
+        start = time.perf_counter()
+        with DHQCorpus() as corpus:
+            print(f"Opened {len(corpus)} articles in {(time.perf_counter() - start) * 1000:.1f} ms")
+            print(corpus.body(sys.argv[1]))
+    else:
+        export_corpus(read_table(data_file("processed_dhq_data")))
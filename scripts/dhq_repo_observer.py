@@ -1,51 +1,171 @@
-import requests
 import os
+import argparse
+import hashlib
+import hmac
+import json
 import subprocess
-from typing import Optional
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
 
 import apikey
-
-# Load the GitHub personal access token
-auth_token: str = apikey.load("DH_GITHUB_DATA_PERSONAL_TOKEN")
-
-# Set up the headers for the GitHub API request
-auth_headers: dict = {'Authorization': f'token {auth_token}','User-Agent': 'request'}
+import requests
+from http_client import get_client
+from storage import data_path
 
 # GitHub Repository details
 REPO_OWNER: str = "Digital-Humanities-Quarterly"
 REPO_NAME: str = "dhq-journal"
 FOLDER_PATH: str = "articles"  # Use full path from repo root
-LOCAL_REPO_PATH: str = "../data/dhq-journal"
 API_URL: str = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/commits?path={FOLDER_PATH}&per_page=1"
+CLONE_URL: str = f"git@github.com:{REPO_OWNER}/{REPO_NAME}.git"
+
+# The local clone is the REPO_NAME directory of the data root (see storage.data_path)
+# File the list of changed articles is written to under the data root, consumed by process_dhq_articles.py
+CHANGE_FEED_NAME: str = "dhq_changes.json"
+# File the ETag and commit of the last GitHub API response are kept in under the data root, so conditional requests survive restarts
+OBSERVER_STATE_NAME: str = "dhq_observer_state.json"
+
+# Seconds between two polls of the daemon, and longest wait after failed polls
+POLL_INTERVAL_S: float = 300.0
+MAX_BACKOFF_S: float = 3600.0
+# Wait after a rate limit response without a reset time, as advised by GitHub for secondary rate limits
+RATE_LIMIT_WAIT_S: float = 60.0
+
+class CommitSource(ABC):
+    """
+    Interface for looking up the latest commit of the remote DHQ repository.
+    """
+    @abstractmethod
+    def latest_commit_sha(self) -> Optional[str]:
+        """
+        Function to get the latest remote commit SHA
+        Returns:
+            str: The latest commit SHA if successful, None otherwise
+        """
+
+    def retry_after(self) -> Optional[float]:
+        """
+        Function to get how long to wait before the next lookup because of a rate limit
+        Returns:
+            Optional[float]: Number of seconds, None if the source is not rate limited
+        """
+        return None
+
+class GitHubCommitSource(CommitSource):
+    """
+    Looks up the latest commit touching the articles folder with the GitHub API.
+    Requests are conditional: the ETag of the last response is sent with If-None-Match, and a 304 (which does not count
+    against the rate limit) means the latest commit is still the one already known. With a state path, the ETag and commit
+    are kept on disk so that this also holds across restarts.
+    """
+    def __init__(self, query: str = API_URL, token_name: str = "DH_GITHUB_DATA_PERSONAL_TOKEN", state_path: Optional[str] = None, token: Optional[str] = None):
+        self.query = query
+        # Load the GitHub personal access token and set up the headers for the GitHub API request
+        auth_token: str = token if token is not None else apikey.load(token_name)
+        self.headers: dict = {'Authorization': f'token {auth_token}', 'User-Agent': 'request'}
+        self.state_path = state_path
+        state = {}
+        if (state_path is not None) and os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        # The ETag only stands for the commit it came with if both are from the same query
+        self.etag: Optional[str] = state.get('etag') if state.get('query') == query else None
+        self.sha: Optional[str] = state.get('sha') if state.get('query') == query else None
+        self._retry_after: Optional[float] = None
+
+    def latest_commit_sha(self) -> Optional[str]:
+        headers = dict(self.headers)
+        if (self.etag is not None) and (self.sha is not None):
+            headers['If-None-Match'] = self.etag
+        response = get_client().get(self.query, headers=headers, timeout=5)
+        self._retry_after = rate_limit_delay(response)
+        if response.status_code == 304:
+            return self.sha
+        if response.status_code == 200:
+            commits = response.json()
+            self.sha = commits[0]['sha'] if commits else None
+            self.etag = response.headers.get('ETag')
+            self._save_state()
+            return self.sha
+        print(f"Failed to fetch data from GitHub API ({response.status_code})")
+        return None
+
+    def retry_after(self) -> Optional[float]:
+        return self._retry_after
+
+    def _save_state(self) -> None:
+        """
+        Function to atomically write the ETag and commit of the last response
+        """
+        if self.state_path is None:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'query': self.query, 'etag': self.etag, 'sha': self.sha}, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+class GitRemoteCommitSource(CommitSource):
+    """
+    Looks up the latest commit of a branch with `git ls-remote`, e.g. on a local bare repository.
+    """
+    def __init__(self, remote_url: str, ref: str = "HEAD"):
+        self.remote_url = remote_url
+        self.ref = ref
+
+    def latest_commit_sha(self) -> Optional[str]:
+        try:
+            output = subprocess.check_output(["git", "ls-remote", self.remote_url, self.ref]).strip().decode()
+        except subprocess.CalledProcessError:
+            print("Failed to fetch data from the git remote")
+            return None
+        return output.split()[0] if output else None
+
+class KnownCommitSource(CommitSource):
+    """
+    Commit that is already known, e.g. looked up by the daemon or announced by a push notification, so the lookup needs no request.
+    """
+    def __init__(self, sha: str):
+        self.sha = sha
+
+    def latest_commit_sha(self) -> Optional[str]:
+        return self.sha
 
-def get_latest_commit_sha(query: str) -> Optional[str]:
+def rate_limit_delay(response) -> Optional[float]:
     """
-    Function to get the latest commit SHA using the GitHub API
+    Function to get how long to wait before the next request from the rate limit headers of a GitHub API response
     Args:
-        query (str): The API URL to fetch the latest commit
+        response (requests.Response): The response
     Returns:
-        str: The latest commit SHA if successful, None otherwise
+        Optional[float]: Number of seconds to wait (Retry-After, or until X-RateLimit-Reset once no request is left), None if there is no limit to wait for
     """
-    response = requests.get(query, headers=auth_headers, timeout=5)
-    if response.status_code == 200:
-        latest_commit_sha = response.json()[0]['sha']
-        return latest_commit_sha
-    else:
-        print("Failed to fetch data from GitHub API")
-        return None
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return float(retry_after)
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset = response.headers.get('X-RateLimit-Reset', '')
+        return max(0.0, float(reset) - time.time()) if reset.isdigit() else RATE_LIMIT_WAIT_S
+    if response.status_code in (403, 429):
+        return RATE_LIMIT_WAIT_S
+    return None
 
-def get_latest_local_commit_sha() -> Optional[str]:
+def get_latest_local_commit_sha(local_repo_path: Optional[str] = None) -> Optional[str]:
     """
     Function to get the latest commit SHA from the local Git repository
+    Args:
+        local_repo_path (Optional[str]): Path to the local clone of the repository, data_path(REPO_NAME) if None
     Returns:
         str: The latest commit SHA if successful, None otherwise
     """
-    if os.path.exists(LOCAL_REPO_PATH):
+    local_repo_path = local_repo_path or data_path(REPO_NAME)
+    if os.path.exists(local_repo_path):
         try:
             # Run the Git command to get the latest commit SHA from the specified repo folder
             latest_local_commit_sha = subprocess.check_output(
                 ["git", "rev-parse", "HEAD"],
-                cwd=LOCAL_REPO_PATH
+                cwd=local_repo_path
             ).strip().decode()
             return latest_local_commit_sha
         except subprocess.CalledProcessError as e:
@@ -55,33 +175,375 @@ def get_latest_local_commit_sha() -> Optional[str]:
         print("Local repository does not exist.")
         return None
 
-def compare_commits() -> None:
+def has_commit(local_repo_path: str, sha: str) -> bool:
+    """
+    Function to check whether a commit is already in the history of the local clone, e.g. the latest commit touching
+    the articles folder while later commits only touched other folders
+    Args:
+        local_repo_path (str): Path to the local clone of the repository
+        sha (str): The commit SHA
+    Returns:
+        bool: True if the commit is HEAD or one of its ancestors
     """
-    Function to compare the latest commit SHA from the GitHub API with the latest known local commit SHA.
-    If they are different, it means there are new updates in the repository.
-    In this case, the function will pull the updates if the local repository exists, or clone the repository if it doesn't.
-    If the commit SHAs are the same, it means there are no new updates in the repository.
+    if not os.path.exists(local_repo_path):
+        return False
+    result = subprocess.run(["git", "merge-base", "--is-ancestor", sha, "HEAD"], cwd=local_repo_path, capture_output=True)
+    return result.returncode == 0
+
+def get_changed_files(local_repo_path: str, previous_commit: Optional[str], new_commit: str, folder_path: str = FOLDER_PATH) -> List[dict]:
+    """
+    Function to list the files under the articles folder that changed between two commits
+    Args:
+        local_repo_path (str): Path to the local clone of the repository
+        previous_commit (Optional[str]): Commit the dataset was built from, None if the repository was just cloned
+        new_commit (str): Commit that was just pulled
+        folder_path (str): Folder to restrict the diff to
+    Returns:
+        List[dict]: One {'status', 'path'} record per file, status being 'A' (added), 'M' (modified) or 'D' (deleted), paths relative to the repository root
+    """
+    # Everything is new after a fresh clone
+    if previous_commit is None:
+        output = subprocess.check_output(["git", "ls-tree", "-r", "--name-only", new_commit, "--", folder_path], cwd=local_repo_path).decode()
+        return [{'status': 'A', 'path': path} for path in output.splitlines() if path]
+
+    output = subprocess.check_output(["git", "diff", "--name-status", "-M", previous_commit, new_commit, "--", folder_path], cwd=local_repo_path).decode()
+    changes = []
+    for line in output.splitlines():
+        if not line:
+            continue
+        status, *paths = line.split('\t')
+        # A rename removes the old path and adds the new one, a copy only adds the new one
+        if status.startswith('R'):
+            changes.append({'status': 'D', 'path': paths[0]})
+            changes.append({'status': 'A', 'path': paths[1]})
+        elif status.startswith('C'):
+            changes.append({'status': 'A', 'path': paths[1]})
+        elif status in ('A', 'D'):
+            changes.append({'status': status, 'path': paths[0]})
+        else:
+            changes.append({'status': 'M', 'path': paths[0]})
+    return changes
+
+def load_change_feed(change_feed_path: Optional[str] = None) -> Optional[dict]:
+    """
+    Function to load the change feed that has not been consumed yet
+    Args:
+        change_feed_path (Optional[str]): Path to the change feed JSON file, data_path(CHANGE_FEED_NAME) if None
+    Returns:
+        dict: The change feed, None if there is none
     """
-    # Get the latest commit SHA from the GitHub API
-    latest_remote_commit_sha: str = get_latest_commit_sha(API_URL)
-    
+    change_feed_path = change_feed_path or data_path(CHANGE_FEED_NAME)
+    if not os.path.exists(change_feed_path):
+        return None
+    with open(change_feed_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_change_feed(change_feed: dict, change_feed_path: Optional[str] = None) -> None:
+    """
+    Function to atomically write the change feed
+    Args:
+        change_feed (dict): The change feed
+        change_feed_path (Optional[str]): Path to the change feed JSON file, data_path(CHANGE_FEED_NAME) if None
+    """
+    change_feed_path = change_feed_path or data_path(CHANGE_FEED_NAME)
+    tmp_path = f"{change_feed_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(change_feed, f, indent=1)
+    os.replace(tmp_path, change_feed_path)
+
+def compare_commits(commit_source: Optional[CommitSource] = None, local_repo_path: Optional[str] = None, clone_url: str = CLONE_URL, change_feed_path: Optional[str] = None) -> Optional[dict]:
+    """
+    Function to compare the latest remote commit SHA with the latest known local commit SHA.
+    If the remote commit is not in the local history, it means there are new updates in the repository.
+    In this case, the function will pull the updates if the local repository exists, or clone the repository if it doesn't,
+    and write the files added, modified or deleted under the articles folder to the change feed.
+    If the commit SHAs are the same, or the remote commit is an ancestor of the local one (later commits did not touch the articles),
+    it means there are no new updates in the repository. Nothing is pulled if the remote commit could not be looked up.
+    Args:
+        commit_source (Optional[CommitSource]): Where to look up the latest remote commit, the GitHub API by default
+        local_repo_path (Optional[str]): Path to the local clone of the repository, data_path(REPO_NAME) if None
+        clone_url (str): URL to clone the repository from if there is no local clone
+        change_feed_path (Optional[str]): Path to the change feed JSON file, data_path(CHANGE_FEED_NAME) if None
+    Returns:
+        dict: The change feed with the previous commit, the new commit and the changed files, None if there were no updates
+    """
+    if commit_source is None:
+        commit_source = GitHubCommitSource()
+    local_repo_path = local_repo_path or data_path(REPO_NAME)
+    change_feed_path = change_feed_path or data_path(CHANGE_FEED_NAME)
+
+    # Get the latest commit SHA from the remote
+    latest_remote_commit_sha: str = commit_source.latest_commit_sha()
+    if latest_remote_commit_sha is None:
+        print("Could not get the latest remote commit, not pulling.")
+        return None
+
     # Get the latest known local commit SHA
-    last_local_known_commit: str = get_latest_local_commit_sha()
+    last_local_known_commit: str = get_latest_local_commit_sha(local_repo_path)
 
-    # Compare the remote and local commit SHAs
-    if latest_remote_commit_sha != last_local_known_commit:
+    # Compare the remote and local commit SHAs, the remote one may also be an older commit of the local history
+    if (latest_remote_commit_sha != last_local_known_commit) and not has_commit(local_repo_path, latest_remote_commit_sha):
         print("New updates found. Cloning or pulling the repository...")
 
         # If the local repository exists, pull the updates
-        if os.path.exists(LOCAL_REPO_PATH):
-            subprocess.run(["git", "pull"], cwd=LOCAL_REPO_PATH)
+        if os.path.exists(local_repo_path):
+            subprocess.run(["git", "pull"], cwd=local_repo_path, check=True)
         # If the local repository doesn't exist, clone the repository
         else:
-            subprocess.run(["git", "clone", f"git@github.com:{REPO_OWNER}/{REPO_NAME}.git", LOCAL_REPO_PATH])
+            subprocess.run(["git", "clone", clone_url, local_repo_path], check=True)
+
+        new_commit = get_latest_local_commit_sha(local_repo_path)
+        if new_commit == last_local_known_commit:
+            print("No new commits were pulled.")
+            return None
+
+        # If a previous change feed was never consumed, diff from the commit it started at so no change is lost
+        pending_feed = load_change_feed(change_feed_path)
+        previous_commit = pending_feed['previous_commit'] if pending_feed is not None else last_local_known_commit
+
+        change_feed = {
+            'previous_commit': previous_commit,
+            'new_commit': new_commit,
+            'changes': get_changed_files(local_repo_path, previous_commit, new_commit),
+        }
+        save_change_feed(change_feed, change_feed_path)
+        print(f"{len(change_feed['changes'])} changed files under {FOLDER_PATH}/ written to {change_feed_path}")
+        return change_feed
     # If the remote and local commit SHAs are the same, there are no new updates
     else:
         print("No new updates in the repository.")
+        return None
+
+class ObserverDaemon:
+    """
+    Long-running observer: polls the commit source on a schedule, and pulls only when the latest remote commit is new.
+    Polls are spaced by the interval, or longer while the source is rate limited, and back off exponentially after failures.
+    A push notification (see WebhookServer) wakes the daemon up before the next scheduled poll.
+    """
+    def __init__(self, commit_source: CommitSource, interval: float = POLL_INTERVAL_S, local_repo_path: Optional[str] = None, clone_url: str = CLONE_URL,
+                 change_feed_path: Optional[str] = None, on_change: Optional[Callable[[dict], None]] = None, max_backoff: float = MAX_BACKOFF_S):
+        self.commit_source = commit_source
+        self.interval = interval
+        self.local_repo_path = local_repo_path or data_path(REPO_NAME)
+        self.clone_url = clone_url
+        self.change_feed_path = change_feed_path or data_path(CHANGE_FEED_NAME)
+        self.on_change = on_change
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self._wake = threading.Event()
+        self._pushed_sha: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def notify(self, sha: Optional[str] = None) -> None:
+        """
+        Function to wake the daemon up because the repository changed
+        Args:
+            sha (Optional[str]): Commit announced by the notification, looked up from the commit source if None
+        """
+        with self._lock:
+            self._pushed_sha = sha
+        self._wake.set()
+
+    def run_once(self) -> Optional[dict]:
+        """
+        Function to check the repository once, with the commit of a pending push notification if there is one
+        Returns:
+            dict: The change feed, None if there were no updates
+        """
+        with self._lock:
+            sha, self._pushed_sha = self._pushed_sha, None
+        try:
+            if sha is None:
+                sha = self.commit_source.latest_commit_sha()
+            if sha is None:
+                self.failures += 1
+                return None
+            change_feed = compare_commits(KnownCommitSource(sha), self.local_repo_path, self.clone_url, self.change_feed_path)
+        # Failed git commands and requests, but also unreadable state or change feed files and unexpected API payloads:
+        # back off instead of stopping the daemon
+        except (subprocess.CalledProcessError, requests.exceptions.RequestException, OSError, ValueError, KeyError) as e:
+            print(f"An error occurred while checking the repository: {e}")
+            self.failures += 1
+            return None
+        self.failures = 0
+        if (change_feed is not None) and (self.on_change is not None):
+            self.on_change(change_feed)
+        return change_feed
+
+    def next_delay(self) -> float:
+        """
+        Function to get how long to wait before the next poll
+        Returns:
+            float: Number of seconds
+        """
+        delay = self.interval * (2 ** self.failures) if self.failures else self.interval
+        retry_after = self.commit_source.retry_after()
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, max(self.max_backoff, retry_after or 0.0))
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Function to poll until stopped
+        Args:
+            stop (Optional[threading.Event]): Event that stops the daemon, run until interrupted if None
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.run_once()
+            delay = self.next_delay()
+            # Wake up early on a push notification or when stopped
+            deadline = time.monotonic() + delay
+            while not stop.is_set() and not self._wake.is_set() and time.monotonic() < deadline:
+                self._wake.wait(min(1.0, deadline - time.monotonic()))
+            self._wake.clear()
+
+class WebhookServer:
+    """
+    Local HTTP endpoint for GitHub push notifications (`POST /webhook`). A push to the default branch that touches the
+    articles folder wakes the daemon up with the pushed commit; other events are acknowledged and ignored.
+    With a secret, the X-Hub-Signature-256 HMAC of the payload is checked and unsigned requests are rejected.
+    """
+    def __init__(self, daemon: ObserverDaemon, host: str = "127.0.0.1", port: int = 0, secret: Optional[str] = None, folder_path: str = FOLDER_PATH):
+        self.daemon = daemon
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.folder_path = folder_path
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        """
+        Function to check the signature of a payload
+        Args:
+            body (bytes): The payload
+            signature (Optional[str]): Value of the X-Hub-Signature-256 header
+        Returns:
+            bool: True if there is no secret or the signature matches
+        """
+        if self.secret is None:
+            return True
+        expected = "sha256=" + hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return (signature is not None) and hmac.compare_digest(expected, signature)
+
+    def touches_articles(self, payload: dict) -> bool:
+        """
+        Function to check whether a push changes the articles folder of the default branch
+        Args:
+            payload (dict): Payload of the push event
+        Returns:
+            bool: True if it does, or if the payload does not list the changed files
+        """
+        default_branch = (payload.get('repository') or {}).get('default_branch')
+        if (default_branch is not None) and (payload.get('ref') != f"refs/heads/{default_branch}"):
+            return False
+        commits = payload.get('commits')
+        if not commits:
+            return commits is None
+        prefix = self.folder_path.rstrip('/') + '/'
+        return any(path.startswith(prefix) for commit in commits for key in ('added', 'modified', 'removed') for path in commit.get(key, []))
+
+    def _handler(self) -> type:
+        """
+        Function to build the request handler class of the server
+        Returns:
+            type: The handler class
+        """
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int) -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.split('?')[0] != "/webhook":
+                    self._send(404)
+                    return
+                if not webhook.verify(body, self.headers.get("X-Hub-Signature-256")):
+                    self._send(401)
+                    return
+                if self.headers.get("X-GitHub-Event") != "push":
+                    self._send(204)
+                    return
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    self._send(400)
+                    return
+                if not webhook.touches_articles(payload):
+                    self._send(204)
+                    return
+                after = payload.get('after')
+                # A deleted branch pushes the null commit
+                webhook.daemon.notify(after if after and after.strip('0') else None)
+                self._send(202)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        """
+        URL of the webhook endpoint
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def start(self) -> "WebhookServer":
+        """
+        Function to start serving in a background thread
+        Returns:
+            WebhookServer: The server
+        """
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Function to stop the server
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
 
 if __name__ == "__main__":
-    # Call the compare_commits function when the script is run directly
-    compare_commits()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check the DHQ repository for new commits and pull them")
+    parser.add_argument("--daemon", action="store_true", help="Keep polling instead of checking once")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_S, help="Seconds between two polls of the daemon")
+    parser.add_argument("--api-url", default=API_URL, help="GitHub API query of the latest commit touching the articles, e.g. of a local stand-in")
+    parser.add_argument("--remote", metavar="URL", help="Look the latest commit up with git ls-remote on this remote (e.g. a local bare repository) instead of the GitHub API")
+    parser.add_argument("--clone-url", default=CLONE_URL, help="URL to clone the repository from if there is no local clone")
+    parser.add_argument("--webhook-port", type=int, help="Also accept GitHub push notifications on this local port, at /webhook; set DHQ_WEBHOOK_SECRET to check their signature")
+    args = parser.parse_args()
+
+    if args.remote is not None:
+        commit_source = GitRemoteCommitSource(args.remote)
+    else:
+        commit_source = GitHubCommitSource(args.api_url, state_path=data_path(OBSERVER_STATE_NAME))
+    if not args.daemon:
+        # Check once when the script is run directly
+        compare_commits(commit_source, clone_url=args.clone_url)
+    else:
+        daemon = ObserverDaemon(commit_source, args.interval, clone_url=args.clone_url)
+        webhook = None
+        if args.webhook_port is not None:
+            webhook = WebhookServer(daemon, port=args.webhook_port, secret=os.environ.get("DHQ_WEBHOOK_SECRET")).start()
+            print(f"Listening for push notifications on {webhook.url}")
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if webhook is not None:
+                webhook.stop()
+    get_client().report()
@@ -0,0 +1,305 @@
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import storage
+from storage import data_file, data_path
+from utils import is_article_xml
+from process_dhq_articles import update_dataset_from_paths, finalize_dataset
+from http_cache import HTTPCache, LinkCache
+from http_client import configure_client, get_client
+from instrumentation import get_metrics
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+# Events watched on every directory: files written and closed, moved in or out, and deleted, and directories created
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+# Header of an inotify event: watch descriptor, mask, cookie and length of the name that follows
+EVENT_HEADER = struct.Struct('iIII')
+
+# Seconds without events before a burst of changes (e.g. a git pull) is processed, and longest a burst is held back
+DEBOUNCE_S: float = 2.0
+MAX_DELAY_S: float = 30.0
+
+def _load_inotify() -> Optional[ctypes.CDLL]:
+    """
+    Function to load the inotify functions of the C library
+    Returns:
+        Optional[ctypes.CDLL]: The C library, None where inotify is not available (e.g. not on Linux)
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') and hasattr(libc, 'inotify_add_watch') else None
+
+libc = _load_inotify()
+
+class InotifyWatcher:
+    """
+    Watcher of directory trees with Linux inotify. Every subdirectory gets its own watch, including the ones created
+    while watching, whose existing files are reported as changed since they may have been written before the watch was added.
+    """
+    def __init__(self, directories: Iterable[str]):
+        if libc is None:
+            raise OSError("inotify is not available on this system")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Directory of each watch descriptor
+        self._directories: Dict[int, str] = {}
+        for directory in directories:
+            self._watch_tree(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # The directory may be gone already, or be a file
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, f"inotify_add_watch failed on {directory}: {os.strerror(error)}")
+        self._directories[wd] = directory
+
+    def _watch_tree(self, directory: str) -> List[str]:
+        """
+        Function to watch a directory and its subdirectories
+        Args:
+            directory (str): Path to the directory
+        Returns:
+            List[str]: Paths to the files already in the tree
+        """
+        files = []
+        for root, _, file_names in os.walk(directory):
+            self._add_watch(root)
+            files.extend(os.path.join(root, file_name) for file_name in file_names)
+        return files
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        """
+        Function to wait for file events
+        Args:
+            timeout (float): Longest time to wait for events, in seconds
+        Returns:
+            Tuple[Set[str], bool]: Paths of the files created, modified, moved or deleted, and whether events were lost
+            (queue overflow or a directory moved out with its files), in which case the directories should be rescanned
+        """
+        paths: Set[str] = set()
+        rescan = False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return paths, rescan
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                name = os.fsdecode(buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._directories[wd]
+                    continue
+                path = os.path.join(directory, name) if name else directory
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        paths.update(self._watch_tree(path))
+                    elif mask & IN_MOVED_FROM:
+                        # Its files left with it without events of their own (a deleted directory is empty)
+                        rescan = True
+                elif name:
+                    paths.add(path)
+        return paths, rescan
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class PollingWatcher:
+    """
+    Watcher of directory trees that compares the size and modification time of every file at a fixed interval,
+    for systems without inotify.
+    """
+    def __init__(self, directories: Iterable[str], interval: float = 1.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._last_scan = time.monotonic()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            for root, _, file_names in os.walk(directory):
+                for file_name in file_names:
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        """
+        Function to wait for file changes, see InotifyWatcher.read
+        Args:
+            timeout (float): Longest time to wait for changes, in seconds
+        Returns:
+            Tuple[Set[str], bool]: Paths of the files created, modified or deleted, and False as no change can be missed
+        """
+        time.sleep(max(0.0, min(timeout, self._last_scan + self.interval - time.monotonic())))
+        if time.monotonic() < self._last_scan + self.interval:
+            return set(), False
+        snapshot = self._scan()
+        self._last_scan = time.monotonic()
+        paths = {path for path in snapshot.keys() | self._snapshot.keys() if snapshot.get(path) != self._snapshot.get(path)}
+        self._snapshot = snapshot
+        return paths, False
+
+    def close(self) -> None:
+        pass
+
+def open_watcher(directories: Iterable[str], polling: bool = False, interval: float = 1.0):
+    """
+    Function to watch directory trees with inotify where it is available, by polling otherwise
+    Args:
+        directories (Iterable[str]): Paths to the directories
+        polling (bool): Flag to poll even where inotify is available
+        interval (float): Seconds between two scans when polling
+    Returns:
+        InotifyWatcher | PollingWatcher: The watcher
+    """
+    directories = list(directories)
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling every {interval}s instead")
+    return PollingWatcher(directories, interval)
+
+def watch(watcher, on_change: Callable[[List[str], List[str], bool], Optional[bool]], debounce: float = DEBOUNCE_S, max_delay: float = MAX_DELAY_S,
+          stop: Optional[threading.Event] = None) -> None:
+    """
+    Function to collect the changes of article XML files reported by a watcher and hand them over in bursts: once no event
+    has come for `debounce` seconds, or `max_delay` seconds after the first event of a burst. Whether a file was changed or
+    deleted is decided when the burst is handed over, from whether it still exists. Changes that could not be processed are
+    handed over again with the next burst, or `max_delay` seconds later.
+    Args:
+        watcher (InotifyWatcher | PollingWatcher): The watcher
+        on_change (Callable[[List[str], List[str], bool], Optional[bool]]): Called with the changed files, the deleted files and whether the directories
+            should be rescanned, returns False if the changes could not be processed
+        debounce (float): Seconds without events that end a burst
+        max_delay (float): Longest a burst is held back, in seconds
+        stop (Optional[threading.Event]): Event that stops watching, watch until interrupted if None
+    """
+    stop = stop or threading.Event()
+    pending: Set[str] = set()
+    rescan = False
+    first_event = last_event = None
+    while not stop.is_set():
+        now = time.monotonic()
+        timeout = 1.0 if first_event is None else max(0.0, min(last_event + debounce, first_event + max_delay) - now)
+        paths, lost = watcher.read(min(timeout, 1.0))
+        paths = {path for path in paths if is_article_xml(path)}
+        now = time.monotonic()
+        if paths or lost:
+            pending |= paths
+            rescan = rescan or lost
+            last_event = now
+            first_event = first_event or now
+        if (first_event is not None) and ((now - last_event >= debounce) or (now - first_event >= max_delay)):
+            changed_files = sorted(path for path in pending if os.path.isfile(path))
+            deleted_files = sorted(path for path in pending if not os.path.exists(path))
+            burst_rescan = rescan
+            pending, rescan, first_event, last_event = set(), False, None, None
+            if on_change(changed_files, deleted_files, burst_rescan) is False:
+                # Keep the changes pending, as a burst that ends after max_delay unless new events come first
+                pending |= set(changed_files) | set(deleted_files)
+                rescan = rescan or burst_rescan
+                first_event = last_event = time.monotonic() + max_delay - debounce
+
+def watch_dataset(workers: int = 1, polling: bool = False, debounce: float = DEBOUNCE_S, finalize: bool = True, stop: Optional[threading.Event] = None) -> None:
+    """
+    Function to keep the dataset up to date: the articles of the DHQ repository and the missing articles downloaded from the website
+    are watched, and each burst of changed XML files is extracted and merged into the dataset, then finalized.
+    Args:
+        workers (int): Number of worker processes used to extract the XML files
+        polling (bool): Flag to poll the directories instead of using inotify
+        debounce (float): Seconds without events before a burst of changes is processed
+        finalize (bool): Flag to also finalize the dataset (article links, issue data, catalog, search index and corpus) after each merge
+        stop (Optional[threading.Event]): Event that stops watching, watch until interrupted if None
+    """
+    articles_path = data_path("dhq-journal", "articles")
+    missing_directory = data_path("missing_dhq_data")
+    merged_path = data_file("merged_dhq_data")
+    os.makedirs(missing_directory, exist_ok=True)
+    link_cache = LinkCache(data_path("link_cache.json"))
+
+    def on_change(changed_files: List[str], deleted_files: List[str], rescan: bool) -> bool:
+        start = time.perf_counter()
+        print(f"{len(changed_files)} XML files changed, {len(deleted_files)} deleted" + (", rescanning" if rescan else ""))
+        try:
+            with get_metrics().span("watch_update") as span:
+                processed_df = update_dataset_from_paths(changed_files, deleted_files, articles_path, missing_directory, merged_path, workers, rescan)
+                if finalize:
+                    processed_df['DHQarticle-id'] = processed_df['DHQarticle-id'].astype(str).str.zfill(6)
+                    finalize_dataset(processed_df, link_cache)
+                span.add(items=len(changed_files) + len(deleted_files))
+        except Exception as e:
+            # Keep watching, the files are processed again with the next burst
+            print(f"An error occurred while updating the dataset: {e}")
+            return False
+        print(f"Dataset updated in {time.perf_counter() - start:.1f}s")
+        return True
+
+    watcher = open_watcher([articles_path, missing_directory], polling)
+    print(f"Watching {articles_path} and {missing_directory} with {type(watcher).__name__}")
+    try:
+        watch(watcher, on_change, debounce, stop=stop)
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the DHQ articles and update the dataset when XML files change")
+    parser.add_argument("--data-root", default=storage.DATA_ROOT, help="Directory of the data files")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes used to extract the XML files")
+    parser.add_argument("--poll", action="store_true", help="Poll the directories instead of using inotify")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_S, help="Seconds without file events before a burst of changes is processed")
+    parser.add_argument("--no-finalize", action="store_true", help="Only extract and merge the changes, without finalizing the dataset")
+    args = parser.parse_args()
+
+    storage.set_data_root(args.data_root)
+    configure_client(cache=HTTPCache(data_path("http_cache"), offline=os.environ.get("DHQ_OFFLINE") == "1"))
+    try:
+        watch_dataset(args.workers, args.poll, args.debounce, not args.no_finalize)
+    except KeyboardInterrupt:
+        pass
+    get_client().report()
+    get_metrics().report()
@@ -2,77 +2,473 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 from tqdm import tqdm
+import html
+import json
 import sys
 import os
 import re
-from typing import Tuple
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
 from utils import process_xml_files, generate_xml_files
+from http_cache import HTTPCache, LinkCache
+from storage import data_file, data_path, read_table, write_table
+from instrumentation import get_metrics, instrumented
+from http_client import FetchEngine, get_client, configure_client, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+
+# Hosts of the DHQ website and of its XML files, set DHQ_SITE_URL / DHQ_XML_SITE_URL or call configure_site to crawl a mirror
+SITE_URL = os.environ.get("DHQ_SITE_URL", "http://www.digitalhumanities.org")
+XML_SITE_URL = os.environ.get("DHQ_XML_SITE_URL", "http://digitalhumanities.org:8081")
+
+def configure_site(site_url: str, xml_site_url: str) -> None:
+    """
+    Function to change the hosts the website is crawled from
+    Args:
+        site_url (str): Host of the website, e.g. "http://www.digitalhumanities.org"
+        xml_site_url (str): Host serving the article pages and XML files by path, e.g. "http://digitalhumanities.org:8081"
+    """
+    global SITE_URL, XML_SITE_URL
+    SITE_URL = site_url.rstrip('/')
+    XML_SITE_URL = xml_site_url.rstrip('/')
+
+def site_url(path: str = "/dhq/") -> str:
+    """
+    Function to get the URL of a path of the website
+    Args:
+        path (str): Absolute path, the DHQ home page by default
+    Returns:
+        str: The URL
+    """
+    return SITE_URL + path
+
+def xml_site_url(path: str) -> str:
+    """
+    Function to get the URL of a path on the host serving the XML files
+    Args:
+        path (str): Absolute path
+    Returns:
+        str: The URL
+    """
+    return XML_SITE_URL + path
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Issue and article pages are parsed with lxml when it is installed, with BeautifulSoup otherwise
+HTML_PARSER = "lxml" if lxml is not None else "html.parser"
+
+# Start of the table of contents on issue pages, only the page from there on is parsed
+TOC_PATTERN = re.compile(r'<div\b[^>]*\bid\s*=\s*["\']toc["\']', re.IGNORECASE)
+# Leading XML declaration of XHTML pages, which lxml refuses in a str
+XML_DECLARATION_PATTERN = re.compile(r'^\s*<\?xml[^>]*\?>')
+# Scripts, styles and comments, whose content is not markup
+NON_MARKUP_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+# Links of a page, with double, single or unquoted href values
+LINK_HREF_PATTERN = re.compile(r'<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE | re.DOTALL)
+
+# Marker of the DHQ page served (with a 200 status) for links that do not exist
+NOT_FOUND_MARKER = "Resource Not Found"
+
+# How much of a page is read when looking for the not found marker
+LINK_PROBE_BYTES = 64 * 1024
 
 def check_if_link_exists(link: str) -> bool:
     """ 
-    Function to check if a link exists
+    Function to check if a link exists.
+    The page is streamed and the download stops as soon as the not found marker is seen, or after the first LINK_PROBE_BYTES.
     Args:
         link (str): Link to check
     Returns:
         bool: True if the link exists, False otherwise
     """
     # Check if the link exists
-    response = requests.get(link)
-    # If the link exists and is not Resource Found Error, return True
-    if (response.status_code == 200) and ("Resource Not Found" not in response.text):
+    response = get_client().get(link, stream=True)
+    try:
+        if response.status_code != 200:
+            return False
+        # If the page is not the Resource Not Found page, the link exists
+        head = b''
+        for chunk in response.iter_content(chunk_size=8192):
+            head += chunk
+            get_client().record_streamed_bytes(len(chunk))
+            if NOT_FOUND_MARKER.encode() in head:
+                return False
+            if len(head) >= LINK_PROBE_BYTES:
+                break
         return True
-    else:
-        return False
+    finally:
+        response.close()
+
+def resolve_links(links: list, link_cache: Optional[LinkCache] = None, max_workers: int = DEFAULT_MAX_WORKERS, per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> dict:
+    """
+    Function to check whether a batch of links exist.
+    Links are deduplicated, results still fresh in the cache are reused, and the other links are probed concurrently.
+    Args:
+        links (list): Links to check
+        link_cache (Optional[LinkCache]): Persistent cache of previous checks
+        max_workers (int): Maximum number of concurrent requests
+        per_host_limit (int): Maximum number of concurrent requests per host
+    Returns:
+        dict: Whether each link exists
+    """
+    results = {}
+    to_probe = []
+    for link in dict.fromkeys(links):
+        cached = link_cache.get(link) if link_cache is not None else None
+        if cached is None:
+            to_probe.append(link)
+        else:
+            results[link] = cached
+    print(f"Checking {len(to_probe)} links ({len(results)} cached)")
+
+    engine = FetchEngine(fetch=check_if_link_exists, max_workers=max_workers, per_host_limit=per_host_limit)
+    probed = dict(zip(to_probe, engine.fetch_all(to_probe, desc='Checking links')))
+    # Failed requests are not cached so they are retried on the next run
+    if link_cache is not None:
+        link_cache.update({link: exists for link, exists in probed.items() if exists is not None})
+    results.update({link: bool(exists) for link, exists in probed.items()})
+    return results
+
+# Columns produced by parse_issue_page
+ARTICLE_LINK_COLUMNS = ['issue_title', 'editors', 'authors', 'article_link', 'article_title', 'abstract', 'issue_text', 'issue_link']
+
+def _class_xpath(tag: str, class_name: str) -> str:
+    """
+    Function to build the XPath of descendant elements having a class, matching whole class names as BeautifulSoup does
+    Args:
+        tag (str): Tag of the elements
+        class_name (str): Class of the elements
+    Returns:
+        str: The XPath
+    """
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def _parse_toc_lxml(toc_html: str) -> Optional[dict]:
+    """
+    Function to extract the table of contents of an issue page with lxml
+    Args:
+        toc_html (str): HTML of the issue page, from the table of contents on
+    Returns:
+        Optional[dict]: Issue title, editors and articles (authors, href, title and abstract), None if there is no table of contents
+    """
+    if not toc_html.strip():
+        return None
+    toc = lxml.html.fromstring(XML_DECLARATION_PATTERN.sub('', toc_html, count=1)).xpath("descendant-or-self::div[@id='toc']")
+    if not toc:
+        return None
+    toc = toc[0]
+    editors = toc.xpath('.//h3')
+    articles = []
+    for article in toc.xpath(_class_xpath('div', 'articleInfo')):
+        link = article.xpath('.//a')[0]
+        abstract = article.xpath(_class_xpath('span', 'viewAbstract'))
+        articles.append({'authors': article.xpath('.//div')[0].text_content(), 'href': link.get('href'),
+                         'title': link.text_content(), 'abstract': abstract[0].text_content() if abstract else ''})
+    return {'issue_title': toc.xpath('.//h2')[0].text_content(), 'editors': editors[0].text_content() if editors else '', 'articles': articles}
+
+def _parse_toc_soup(toc_html: str) -> Optional[dict]:
+    """
+    Function to extract the table of contents of an issue page with BeautifulSoup
+    Args:
+        toc_html (str): HTML of the issue page, from the table of contents on
+    Returns:
+        Optional[dict]: Issue title, editors and articles (authors, href, title and abstract), None if there is no table of contents
+    """
+    toc = BeautifulSoup(toc_html, "html.parser").find("div", {"id": "toc"})
+    if toc is None:
+        return None
+    editors = toc.find_all('h3')
+    articles = []
+    for article in toc.find_all('div', {'class': 'articleInfo'}):
+        abstract = article.find('span', {'class': 'viewAbstract'})
+        articles.append({'authors': article.find_all('div')[0].get_text(), 'href': article.find('a').get('href'),
+                         'title': article.find('a').get_text(), 'abstract': abstract.get_text() if abstract else ''})
+    return {'issue_title': toc.find_all('h2')[0].get_text(), 'editors': editors[0].get_text() if editors else '', 'articles': articles}
+
+@instrumented("parse_issue_page")
+def parse_issue_page(issue_html: str, issue_text: str, issue_link: str) -> list:
+    """
+    Function to parse the table of contents of an issue page into article records.
+    Only the page from the `toc` div on is parsed, with lxml if it is installed.
+    Args:
+        issue_html (str): HTML of the issue page
+        issue_text (str): Text of the issue link
+        issue_link (str): Link to the issue page
+    Returns:
+        list: List of dictionaries, one per article in the issue, empty if the page has no table of contents
+    """
+    toc_start = TOC_PATTERN.search(issue_html)
+    toc_html = issue_html[toc_start.start():] if toc_start else issue_html
+    toc = _parse_toc_lxml(toc_html) if HTML_PARSER == "lxml" else _parse_toc_soup(toc_html)
+    if toc is None:
+        return []
+    article_records = []
+    for article in toc['articles']:
+        data = {'issue_title': toc['issue_title'], 'editors': toc['editors'], 'authors': article['authors'], 'article_link': site_url(article['href']),
+                'article_title': article['title'], 'abstract': article['abstract'], 'issue_text': issue_text, "issue_link": issue_link}
+        article_records.append(data)
+    return article_records
+
+def crawl_article_links(issue_links_df: pd.DataFrame, max_workers: int = DEFAULT_MAX_WORKERS,
+                        per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Function to crawl the given issue pages and extract their article links
+    Args:
+        issue_links_df (pd.DataFrame): Dataframe containing the issue links to crawl
+        max_workers (int): Maximum number of concurrent requests
+        per_host_limit (int): Maximum number of concurrent requests per host
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: Dataframe containing the scraped article links, and the links of the issues that could not be fetched
+    """
+    # Fetch all issue pages concurrently, responses come back in issue order
+    engine = FetchEngine(max_workers=max_workers, per_host_limit=per_host_limit)
+    issue_responses = engine.fetch_all(issue_links_df.issue_link.tolist(), desc='Scraping articles')
 
-def process_article_links(issue_links_df: pd.DataFrame) -> pd.DataFrame:
+    # DataFrame to store extracted data
+    article_links_dfs = []
+    failed_issue_links = []
+    for row, issue_response in zip(issue_links_df.itertuples(index=False), issue_responses):
+        # Check if the issue link exists
+        if (issue_response is not None) and (issue_response.status_code == 200):
+            article_links_dfs.extend(parse_issue_page(issue_response.text, row.issue_text, row.issue_link))
+        else:
+            failed_issue_links.append(row.issue_link)
+    if failed_issue_links:
+        print(f"Failed to fetch {len(failed_issue_links)} issues: {', '.join(failed_issue_links)}")
+    article_links_df = pd.DataFrame(article_links_dfs, columns=ARTICLE_LINK_COLUMNS)
+    pattern = r'.*vol/([^/]*)/([^/]*)/(\d+)/\3\.html'
+    article_links_df[['volume', 'issue', 'DHQarticle-id']] = article_links_df.article_link.str.extract(pattern)
+    article_links_df['DHQarticle-id'] = article_links_df['DHQarticle-id'].astype(str)
+    return article_links_df, failed_issue_links
+
+def process_article_links(issue_links_df: pd.DataFrame, max_workers: int = DEFAULT_MAX_WORKERS,
+                          per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> Tuple[pd.DataFrame, List[str]]:
     """ 
     Function to scrape the article links from the issue links dataframe
     Args:
         issue_links_df (pd.DataFrame): Dataframe containing the issue links
+        max_workers (int): Maximum number of concurrent requests
+        per_host_limit (int): Maximum number of concurrent requests per host
     Returns:
-        pd.DataFrame: Dataframe containing the scraped article links
+        Tuple[pd.DataFrame, List[str]]: Dataframe containing the scraped article links, and the links of the issues that could not be fetched
     """
     # If the CSV file exists, read it into a DataFrame 
-    if os.path.exists("../data/dhq_article_links.csv"):
-        article_links_df = pd.read_csv("../data/dhq_article_links.csv")
+    if os.path.exists(data_file("dhq_article_links")):
+        article_links_df, failed_issue_links = read_table(data_file("dhq_article_links")), []
     else:
-        # DataFrame to store extracted data
-        article_links_dfs = []
-        progress_bar = tqdm(total=len(issue_links_df), desc='Scraping articles')
-        for _, row in issue_links_df.iterrows():
-            # Check if the issue link exists
-            issue_response = requests.get(row.issue_link)
-            progress_bar.update(1)
-            if issue_response.status_code == 200:
-                issue_soup = BeautifulSoup(issue_response.text, "html.parser")
-                toc = issue_soup.find("div", {"id": "toc"})
-                issue_title = toc.find_all('h2')[0].get_text()
-                editors = toc.find_all('h3')
-
-                editors = editors[0].get_text() if len(editors) > 0 else ''
-                articles = toc.find_all('div', {'class': 'articleInfo'})
-                for article in articles:
-                    authors = article.find_all('div')[0].get_text()
-                    article_link = "http://www.digitalhumanities.org" + article.find('a').get('href')
-                    article_text = article.find('a').get_text()
-                    abstract = article.find('span', {'class': 'viewAbstract'})
-                    abstract = abstract.get_text() if abstract else ''
-                    data = {'issue_title': issue_title, 'editors': editors, 'authors': authors, 'article_link': article_link, 'article_title': article_text, 'abstract': abstract, 'issue_text': row.issue_text, "issue_link": row.issue_link}
-                    article_links_dfs.append(data)
-        progress_bar.close()
-        article_links_df = pd.DataFrame(article_links_dfs)
-        pattern = r'.*vol/([^/]*)/([^/]*)/(\d+)/\3\.html'
-        article_links_df[['volume', 'issue', 'DHQarticle-id']] = article_links_df.article_link.str.extract(pattern)
-        article_links_df['DHQarticle-id'] = article_links_df['DHQarticle-id'].astype(str)
-        article_links_df.to_csv("../data/dhq_article_links.csv", index=False)
-    return article_links_df
+        article_links_df, failed_issue_links = crawl_article_links(issue_links_df, max_workers, per_host_limit)
+        write_table(article_links_df, data_file("dhq_article_links"))
+    return article_links_df, failed_issue_links
+
+def update_article_links(issues_to_crawl_df: pd.DataFrame, max_workers: int = DEFAULT_MAX_WORKERS,
+                         per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Function to crawl only the given issues and merge their articles into the stored article links.
+    The stored articles of an issue that could not be fetched are kept.
+    Args:
+        issues_to_crawl_df (pd.DataFrame): Dataframe containing the new or changed issue links
+        max_workers (int): Maximum number of concurrent requests
+        per_host_limit (int): Maximum number of concurrent requests per host
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: Dataframe containing all article links, and the links of the issues that could not be fetched
+    """
+    if os.path.exists(data_file("dhq_article_links")):
+        stored_df = read_table(data_file("dhq_article_links"))
+    else:
+        stored_df = pd.DataFrame(columns=ARTICLE_LINK_COLUMNS + ['volume', 'issue', 'DHQarticle-id'])
+
+    crawled_df, failed_issue_links = crawl_article_links(issues_to_crawl_df, max_workers, per_host_limit)
+    crawled_issue_links = issues_to_crawl_df.issue_link[~issues_to_crawl_df.issue_link.isin(failed_issue_links)]
+    print(f"Crawled {len(crawled_issue_links)} issues, found {len(crawled_df)} articles")
+
+    # Replace every stored row of a recrawled issue, so articles that left the preview issue are dropped.
+    # The crawled rows come first, as the newest issues do on the website.
+    stored_df = stored_df[~stored_df.issue_link.isin(crawled_issue_links)]
+    article_links_df = pd.concat([crawled_df, stored_df], ignore_index=True)
+
+    # An article listed in the preview issue and in its volume and issue keeps the row of its volume and issue,
+    # otherwise the row just crawled, and rows stay in order
+    is_preview = article_links_df.issue_link.astype(str).str.contains('preview')
+    article_links_df = article_links_df.loc[is_preview.sort_values(kind='stable').index]
+    article_links_df = article_links_df.drop_duplicates(subset=['article_link'], keep='first').sort_index().reset_index(drop=True)
+    write_table(article_links_df, data_file("dhq_article_links"))
+    return article_links_df, failed_issue_links
+
+@instrumented("extract_xml_links")
+def extract_xml_links(article_html: str) -> list:
+    """
+    Function to extract the links to XML files from an article page
+    Args:
+        article_html (str): HTML of the article page
+    Returns:
+        list: List of hrefs containing 'xml'
+    """
+    # The links are matched directly, without parsing the article text
+    markup = NON_MARKUP_PATTERN.sub('', article_html)
+    hrefs = (html.unescape(next(value for value in match.groups() if value is not None)) for match in LINK_HREF_PATTERN.finditer(markup))
+    return [href for href in hrefs if 'xml' in href]
+
+# Article page links from which the XML link can be derived, e.g. /dhq/vol/17/2/000680/000680.html -> /dhq/vol/17/2/000680.xml
+ARTICLE_PAGE_PATTERN = re.compile(r'(/dhq/vol/(\d+)/(\d+)/)(\d+)/\4\.html')
+# XML links found on article pages
+XML_LINK_PATTERN = re.compile(r'/dhq/vol/(\d+)/(\d+)/(\d+)\.xml')
+
+def derive_xml_link(article_link: str) -> Optional[Tuple[str, Tuple[str, str, str]]]:
+    """
+    Function to derive the link to the XML file of an article from the link to its page
+    Args:
+        article_link (str): Link to the article page
+    Returns:
+        Optional[Tuple[str, Tuple[str, str, str]]]: XML link and its volume, issue and DHQarticle-id, None if the link does not follow the volume/issue layout (e.g. preview articles)
+    """
+    match = ARTICLE_PAGE_PATTERN.search(article_link)
+    if not match:
+        return None
+    return f"{match.group(1)}{match.group(4)}.xml", (match.group(2), match.group(3), match.group(4))
 
-def download_xml_links(article_links_df: pd.DataFrame, missing_directory: str) -> pd.DataFrame:
+def download_file(url: str, file_path: str, chunk_size: int = 65536) -> int:
+    """
+    Function to stream a file to disk in chunks. The file is written under a temporary name and renamed once complete,
+    so an interrupted download never leaves a partial file behind. A file already on disk is revalidated with If-Modified-Since
+    and only downloaded again if it changed on the server, or kept as it is when the client is offline.
+    Args:
+        url (str): URL of the file
+        file_path (str): Path to save the file to
+        chunk_size (int): Size of the chunks read from the response
+    Returns:
+        int: Status code of the response, 200 for a file on disk that is up to date and 404 for the DHQ not found page (which is served with a 200)
+    """
+    headers = {}
+    if os.path.exists(file_path):
+        if get_client().offline:
+            # The file on disk is kept as it is, without asking the server
+            return 200
+        headers['If-Modified-Since'] = formatdate(os.path.getmtime(file_path), usegmt=True)
+    response = get_client().get(url, stream=True, headers=headers)
+    try:
+        if response.status_code == 304:
+            # The file on disk is up to date
+            return 200
+        if response.status_code != 200:
+            return response.status_code
+        tmp_path = f"{file_path}.part"
+        found = True
+        try:
+            with open(tmp_path, 'wb') as file:
+                # The not found marker is looked for in the first LINK_PROBE_BYTES, whatever the chunks they come in
+                head = b''
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    get_client().record_streamed_bytes(len(chunk))
+                    if len(head) < LINK_PROBE_BYTES:
+                        head += chunk
+                        if NOT_FOUND_MARKER.encode() in head:
+                            found = False
+                            break
+                    file.write(chunk)
+            if found:
+                os.replace(tmp_path, file_path)
+                set_modification_time(file_path, response.headers.get('Last-Modified'))
+                return 200
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return 404
+    finally:
+        response.close()
+
+def set_modification_time(file_path: str, last_modified: Optional[str]) -> None:
+    """
+    Function to give a downloaded file the modification time of the server, which the next If-Modified-Since sends back
+    Args:
+        file_path (str): Path to the file
+        last_modified (Optional[str]): Last-Modified header of the response, the file is left as it is without one
+    """
+    if not last_modified:
+        return
+    try:
+        timestamp = parsedate_to_datetime(last_modified).timestamp()
+    except (TypeError, ValueError):
+        return
+    os.utime(file_path, (timestamp, timestamp))
+
+class DownloadJournal:
+    """
+    Durable record of the XML files downloaded so far, stored as a JSON lines file with one line per file,
+    written and synced as soon as the file is complete. A download interrupted by a crash or Ctrl-C resumes from it,
+    skipping the articles whose files are already on disk.
+    """
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._entries: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut short by a crash
+                        continue
+                    self._entries.setdefault(entry['article_link'], []).append(entry)
+
+    def completed(self, article_link: str, save_path: str) -> List[dict]:
+        """
+        Function to get the files already downloaded for an article
+        Args:
+            article_link (str): Link to the article page
+            save_path (str): Directory the XML files are saved to
+        Returns:
+            List[dict]: Journal entries of the article, empty if it has none or one of its files is no longer on disk
+        """
+        entries = self._entries.get(article_link, [])
+        if all(os.path.exists(os.path.join(save_path, f"{entry['DHQarticle-id']}.xml")) for entry in entries):
+            return entries
+        return []
+
+    def record(self, article_link: str, xml_link: str, volume: str, issue: str, dhq_id: str) -> None:
+        """
+        Function to append a downloaded file to the journal
+        Args:
+            article_link (str): Link to the article page
+            xml_link (str): Link to the XML file
+            volume (str): Volume of the article
+            issue (str): Issue of the article
+            dhq_id (str): DHQarticle-id of the article
+        """
+        entry = {'article_link': article_link, 'xml_link': xml_link, 'volume': volume, 'issue': issue, 'DHQarticle-id': dhq_id}
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries.setdefault(article_link, []).append(entry)
+
+    def clear(self) -> None:
+        """
+        Function to delete the journal once the downloads it records have been saved
+        """
+        with self._lock:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._entries = {}
+
+def download_xml_links(article_links_df: pd.DataFrame, missing_directory: str, max_workers: int = DEFAULT_MAX_WORKERS, per_host_limit: int = DEFAULT_PER_HOST_LIMIT, direct: bool = True, journal: Optional[DownloadJournal] = None) -> pd.DataFrame:
     """
     Download XML files from provided article links and extract volume, issue, and DHQarticle-id from the link.
+    In direct mode the XML link is derived from the article link, and the article page is only fetched
+    to discover the XML link when that is not possible or the derived link is not found.
+    With a journal, each file is recorded as soon as it is downloaded and articles already in the journal are skipped,
+    so an interrupted download resumes where it stopped.
 
     Parameters:
     - article_links_df: DataFrame containing article links.
+    - missing_directory: Directory to save the XML files to.
+    - max_workers: Maximum number of concurrent requests.
+    - per_host_limit: Maximum number of concurrent requests per host.
+    - direct: Flag to derive the XML links instead of fetching every article page.
+    - journal: Journal of the downloaded files to resume from.
 
     Returns:
     - DataFrame with columns ['xml_link', 'volume', 'issue', 'DHQarticle-id'].
@@ -81,55 +477,106 @@ def download_xml_links(article_links_df: pd.DataFrame, missing_directory: str) -
     # Ensure the save directory exists
     if not os.path.exists(save_path):
         os.makedirs(save_path)
-
-    # DataFrame to store extracted data
-    xml_data = []
-
-    article_progress_bar = tqdm(total=len(article_links_df), desc='Scraping articles')
-
-    for _, row in article_links_df.iterrows():
-        article_progress_bar.update(1)
-
-        article_response = requests.get(row.article_link)
-
-        if article_response.status_code == 200:
-            article_soup = BeautifulSoup(article_response.text, "html.parser")
-            xml_links = article_soup.find_all('a')
-            xml_links = [link.get('href') for link in xml_links if link.get('href') and 'xml' in link.get('href')]
-            # Download xml
-            for link in xml_links:
+    # Remove the partial files of a download that was killed
+    for file_name in os.listdir(save_path):
+        if file_name.endswith('.part'):
+            os.remove(os.path.join(save_path, file_name))
+
+    def download_xml(xml_candidates: list) -> list:
+        # Stream all XML files to disk concurrently, each file once, returning the status code of each candidate (None for failed requests)
+        candidates_by_url = {}
+        for article_link, (link, (volume, issue, dhq_id)) in xml_candidates:
+            candidates_by_url.setdefault(xml_site_url(link), []).append((article_link, link, volume, issue, dhq_id))
+
+        def fetch(url: str) -> int:
+            status = download_file(url, os.path.join(save_path, f"{candidates_by_url[url][0][4]}.xml"))
+            if (status == 200) and (journal is not None):
+                for candidate in candidates_by_url[url]:
+                    journal.record(*candidate)
+            return status
+
+        urls = list(candidates_by_url)
+        engine = FetchEngine(fetch=fetch, max_workers=max_workers, per_host_limit=per_host_limit)
+        statuses = dict(zip(urls, engine.fetch_all(urls, desc='Downloading XML')))
+        return [statuses[xml_site_url(link)] for _, (link, _) in xml_candidates]
+
+    article_links = article_links_df.article_link.tolist()
+    # XML files downloaded for each article, starting from the ones recorded by an interrupted run
+    downloaded = {article_link: [] for article_link in article_links}
+    if journal is not None:
+        for article_link in article_links:
+            downloaded[article_link] = [(entry['xml_link'], (entry['volume'], entry['issue'], entry['DHQarticle-id'])) for entry in journal.completed(article_link, save_path)]
+        resumed = sum(1 for candidates in downloaded.values() if candidates)
+        if resumed:
+            print(f"Resuming: {resumed} articles already downloaded")
+    pending = [article_link for article_link in article_links if not downloaded[article_link]]
+
+    # Download the XML files whose link can be derived, the others are discovered from the article page
+    to_discover = pending
+    if direct:
+        direct_candidates = [(article_link, derive_xml_link(article_link)) for article_link in pending]
+        direct_candidates = [(article_link, candidate) for article_link, candidate in direct_candidates if candidate is not None]
+        statuses = download_xml(direct_candidates)
+        not_found = set()
+        for (article_link, candidate), status in zip(direct_candidates, statuses):
+            if status == 200:
+                downloaded[article_link].append(candidate)
+            elif status == 404:
+                not_found.add(article_link)
+            else:
+                print(f"Failed to download {candidate[0]}")
+        derived = {article_link for article_link, _ in direct_candidates}
+        to_discover = [article_link for article_link in pending if (article_link not in derived) or (article_link in not_found)]
+    get_metrics().count('xml_links_discovered', len(to_discover))
+
+    # Fetch the remaining article pages concurrently
+    engine = FetchEngine(max_workers=max_workers, per_host_limit=per_host_limit)
+    article_responses = engine.fetch_all(to_discover, desc='Scraping articles')
+
+    # Collect the XML links of every article, keeping the article order
+    xml_candidates = []
+    for article_link, article_response in zip(to_discover, article_responses):
+        if (article_response is not None) and (article_response.status_code == 200):
+            for link in extract_xml_links(article_response.text):
                 # Extract the required components from the link
-                match = re.search(r'/dhq/vol/(\d+)/(\d+)/(\d+)\.xml', link)
+                match = XML_LINK_PATTERN.search(link)
                 if match:
-                    volume, issue, dhq_id = match.groups()
-
-                    base_url = "http://digitalhumanities.org:8081"
-                    absolute_link = base_url + link
-                    xml_response = requests.get(absolute_link)
-
-
-                    # If request is successful, save XML to file
-                    if xml_response.status_code == 200:
-                        # Save the XML content to a file
-                        file_name = f"{dhq_id}.xml"
-                        file_path = os.path.join(save_path, file_name)
-                        with open(file_path, 'wb') as file:
-                            file.write(xml_response.content)
-                        
-                        # Save link and extracted data to the xml_data list
-                        xml_data.append({'xml_link': link, 'volume': volume, 'issue': issue, 'DHQarticle-id': dhq_id})
-                    else:
-                        print(f"Failed to download {link}")
+                    xml_candidates.append((article_link, (link, match.groups())))
         else:
-            print(f"Failed to scrape {row.article_link}")
+            print(f"Failed to scrape {article_link}")
 
-    article_progress_bar.close()
+    # Download the discovered XML files
+    statuses = download_xml(xml_candidates)
+    for (article_link, candidate), status in zip(xml_candidates, statuses):
+        if status == 200:
+            downloaded[article_link].append(candidate)
+        else:
+            print(f"Failed to download {candidate[0]}")
+
+    # Links and extracted data of the downloaded files, in article order
+    xml_data = [{'xml_link': link, 'volume': volume, 'issue': issue, 'DHQarticle-id': dhq_id}
+                for article_link in article_links for link, (volume, issue, dhq_id) in downloaded[article_link]]
 
     # Convert the xml_data list to a DataFrame
     xml_df = pd.DataFrame(xml_data)
 
     return xml_df
 
+def extract_issue_links(issue_links: list) -> pd.DataFrame:
+    """
+    Function to turn the links of the navigation sidebar into an issue links dataframe
+    Args:
+        issue_links (list): List containing the issue links
+    Returns:
+        pd.DataFrame: Dataframe containing the issue links
+    """
+    # List to store the issue links
+    issue_links_dfs = []
+    for link in issue_links:
+        if ('vol' in link.get('href')) or ('preview' in link.get('href')):
+            issue_links_dfs.append({'issue_link': site_url(link.get('href')), 'issue_text': link.get_text()})
+    return pd.DataFrame(issue_links_dfs, columns=['issue_link', 'issue_text'])
+
 def process_issue_links(issue_links: list) -> pd.DataFrame:
     """
     Function to scrape the issue links from the issue links list
@@ -139,78 +586,123 @@ def process_issue_links(issue_links: list) -> pd.DataFrame:
         pd.DataFrame: Dataframe containing the scraped issue links
     """
     # If the CSV file exists, read it into a DataFrame
-    if os.path.exists("../data/dhq_issue_links.csv"):
-        issue_links_df = pd.read_csv("../data/dhq_issue_links.csv")
+    if os.path.exists(data_path("dhq_issue_links.csv")):
+        issue_links_df = pd.read_csv(data_path("dhq_issue_links.csv"))
     else:
-        # List to store the issue links
-        issue_links_dfs = []
-        for link in issue_links:
-            if ('vol' in link.get('href')) or ('preview' in link.get('href')):
-                issue_links_dfs.append({'issue_link': "http://www.digitalhumanities.org" +link.get('href'), 'issue_text': link.get_text()})
-        issue_links_df = pd.DataFrame(issue_links_dfs)
-        issue_links_df.to_csv("../data/dhq_issue_links.csv", index=False)
+        issue_links_df = extract_issue_links(issue_links)
     return issue_links_df
 
-def scrape_dhq(existing_articles_df: pd.DataFrame, missing_directory: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def update_issue_links(issue_links: list) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
-    Function to scrape the DHQ website and download missing articles.
-    
+    Function to diff the current issue links against the stored ones.
+    New issues and the preview issue (which changes in place) need to be crawled.
     Args:
-        existing_articles_df (pd.DataFrame): DataFrame of existing articles.
-        missing_directory (str): Directory to save the missing data.
-
+        issue_links (list): List containing the issue links
     Returns:
-        Tuple[pd.DataFrame, pd.DataFrame]: Tuple containing two DataFrames. The first DataFrame contains the links to all articles. The second DataFrame contains the scraped data of the missing articles.
+        Tuple[pd.DataFrame, pd.DataFrame]: All current issue links, and the issue links that need to be crawled
     """
-    try:
-        # URL of the DHQ website
-        url = "http://www.digitalhumanities.org/dhq/"
+    issue_links_df = extract_issue_links(issue_links)
+    if os.path.exists(data_path("dhq_issue_links.csv")):
+        stored_df = pd.read_csv(data_path("dhq_issue_links.csv"))
+    else:
+        stored_df = pd.DataFrame(columns=['issue_link', 'issue_text'])
 
-        # Send a GET request to the DHQ website
-        response = requests.get(url)
+    is_new = ~issue_links_df.issue_link.isin(stored_df.issue_link)
+    is_preview = issue_links_df.issue_link.str.contains('preview')
+    issues_to_crawl_df = issue_links_df[is_new | is_preview]
+    return issue_links_df, issues_to_crawl_df
 
-        # Parse the response text with BeautifulSoup
-        soup = BeautifulSoup(response.text, "html.parser")
+def crawl_dhq(incremental: bool = False) -> pd.DataFrame:
+    """
+    Function to crawl the issue and article links of the DHQ website.
 
-        # Find the div with id "leftsidenav" that contains the issue links
-        div = soup.find("div", {"id": "leftsidenav"})
+    Args:
+        incremental (bool): Flag to only crawl new issues and the preview issue, merging them into the stored article links.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the links to all articles.
+    """
+    # Send a GET request to the DHQ website
+    response = get_client().get(site_url())
+    response.raise_for_status()
 
-        # Find all 'a' elements (links) in the div
-        issue_links = div.find_all('a')
+    # Parse the response text with BeautifulSoup
+    soup = BeautifulSoup(response.text, "html.parser")
 
+    # Find the div with id "leftsidenav" that contains the issue links
+    div = soup.find("div", {"id": "leftsidenav"})
+
+    # Find all 'a' elements (links) in the div
+    issue_links = div.find_all('a')
+
+    if incremental:
+        # Only crawl the issues that are new or may have changed since the last run
+        issue_links_df, issues_to_crawl_df = update_issue_links(issue_links)
+        article_links_df, failed_issue_links = update_article_links(issues_to_crawl_df)
+    else:
         # Process the issue links to extract the required data
         issue_links_df = process_issue_links(issue_links)
 
         # Process the article links to extract the required data
-        article_links_df = process_article_links(issue_links_df)
+        article_links_df, failed_issue_links = process_article_links(issue_links_df)
+
+    # Save the issue links once they are crawled, leaving out the issues that could not be fetched so the next run crawls them again
+    issue_links_df[~issue_links_df.issue_link.isin(failed_issue_links)].to_csv(data_path("dhq_issue_links.csv"), index=False)
+    return article_links_df
+
+def download_missing_articles(article_links_df: pd.DataFrame, existing_articles_df: pd.DataFrame, missing_directory: str) -> pd.DataFrame:
+    """
+    Function to download the articles of the website that are missing from the existing articles, and extract their data.
+
+    Args:
+        article_links_df (pd.DataFrame): DataFrame containing the links to all articles.
+        existing_articles_df (pd.DataFrame): DataFrame of existing articles.
+        missing_directory (str): Directory to save the missing data.
 
-        # Find the articles that are missing from the existing articles
-        missing_articles = article_links_df[~article_links_df['DHQarticle-id'].isin(existing_articles_df['DHQarticle-id'])]
+    Returns:
+        pd.DataFrame: DataFrame containing the scraped data of the missing articles.
+    """
+    # Find the articles that are missing from the existing articles
+    missing_articles = article_links_df[~article_links_df['DHQarticle-id'].isin(existing_articles_df['DHQarticle-id'])]
 
-        print(f"Missing articles: {len(missing_articles)}")
+    print(f"Missing articles: {len(missing_articles)}")
 
-        # If there are missing articles, download them
-        if len(missing_articles) > 0:
-            print("Downloading missing articles...")
+    # If there are no missing articles, return an empty DataFrame
+    if len(missing_articles) == 0:
+        return pd.DataFrame()
 
-            # Download the XML links of the missing articles
-            xml_links_df = download_xml_links(missing_articles, missing_directory)
+    print("Downloading missing articles...")
 
-            # Save the XML links to a CSV file
-            xml_links_df.to_csv("../data/missing_dhq_xml_links.csv", index=False)
+    # Download the XML links of the missing articles, resuming an interrupted download
+    journal = DownloadJournal(data_path("missing_dhq_download_journal.jsonl"))
+    xml_links_df = download_xml_links(missing_articles, missing_directory, journal=journal)
 
-            # Generate the XML files of the missing articles
-            updated_xml_files = generate_xml_files(missing_directory)
+    # Save the XML links to a CSV file, the journal is no longer needed once they are saved
+    xml_links_df.to_csv(data_path("missing_dhq_xml_links.csv"), index=False)
+    journal.clear()
 
-            # Process the XML files to extract the required data
-            updated_df = process_xml_files(updated_xml_files, missing_directory)
+    # Generate the XML files of the missing articles
+    updated_xml_files = generate_xml_files(missing_directory)
 
-            # Save the scraped data to a CSV file
-            updated_df.to_csv("../data/missing_dhq_data.csv", index=False)
-        else:
-            # If there are no missing articles, create an empty DataFrame
-            updated_df = pd.DataFrame()
+    # Process the XML files to extract the required data, process_xml_files saves it
+    updated_df = process_xml_files(updated_xml_files, data_file("missing_dhq_data"), False)
+    return updated_df
 
+def scrape_dhq(existing_articles_df: pd.DataFrame, missing_directory: str, incremental: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Function to scrape the DHQ website and download missing articles.
+    
+    Args:
+        existing_articles_df (pd.DataFrame): DataFrame of existing articles.
+        missing_directory (str): Directory to save the missing data.
+        incremental (bool): Flag to only crawl new issues and the preview issue, merging them into the stored article links.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Tuple containing two DataFrames. The first DataFrame contains the links to all articles. The second DataFrame contains the scraped data of the missing articles.
+    """
+    try:
+        article_links_df = crawl_dhq(incremental)
+        updated_df = download_missing_articles(article_links_df, existing_articles_df, missing_directory)
         return article_links_df, updated_df
     
     except requests.exceptions.RequestException as e:
@@ -224,6 +716,12 @@ def scrape_dhq(existing_articles_df: pd.DataFrame, missing_directory: str) -> Tu
 
 
 if __name__ == "__main__":
-    existing_articles_df = pd.read_csv("../data/initial_dhq_data.csv")
-    missing_directory = "../data/missing_dhq_data"
-    scrape_dhq(existing_articles_df, missing_directory)
\ No newline at end of file
+    # Cache pages on disk so that reruns only revalidate them, set DHQ_OFFLINE=1 to run from the cache alone
+    configure_client(cache=HTTPCache(data_path("http_cache"), offline=os.environ.get("DHQ_OFFLINE") == "1"))
+    existing_articles_df = read_table(data_file("initial_dhq_data"), columns=['DHQarticle-id'])
+    missing_directory = data_path("missing_dhq_data")
+    incremental = True
+    scrape_dhq(existing_articles_df, missing_directory, incremental)
+    get_client().report()
+    get_metrics().report()
+    get_metrics().write_report(data_path("run_report.json"))
\ No newline at end of file
@@ -0,0 +1,241 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+from typing import Dict, Optional
+
+# Default cache policy
+DEFAULT_MAX_AGE: float = 0.0  # Always revalidate with the server unless running offline
+DEFAULT_MAX_BYTES: int = 2 * 1024 ** 3
+
+class HTTPCache:
+    """
+    On-disk HTTP response cache keyed by URL. Each entry stores the body alongside its ETag and
+    Last-Modified validators so that repeat crawls can be revalidated with conditional requests.
+    Entries are evicted least-recently-used first once the cache grows past `max_bytes`. Uses of the entries are
+    only recorded in memory, and saved once when the cache is closed (at the latest when the process exits).
+    """
+    def __init__(self, cache_dir: str, max_age: float = DEFAULT_MAX_AGE, max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # Load the metadata of every entry so lookups and eviction never have to scan the directory
+        self._index: Dict[str, dict] = {}
+        for file_name in os.listdir(cache_dir):
+            if file_name.endswith('.json'):
+                try:
+                    with open(os.path.join(cache_dir, file_name), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    self._index[meta['url']] = meta
+                except (OSError, ValueError, KeyError):
+                    continue
+        self.total_bytes = sum(meta['size'] for meta in self._index.values())
+        # Entries whose last access or revalidation has not been saved yet
+        self._dirty: set = set()
+        atexit.register(self.close)
+
+    def _paths(self, url: str) -> tuple:
+        """
+        Function to get the body and metadata paths of a cache entry
+        Args:
+            url (str): URL of the entry
+        Returns:
+            tuple: Path to the body file and path to the metadata file
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.body"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_meta(self, meta: dict) -> None:
+        """
+        Function to atomically write the metadata of a cache entry
+        Args:
+            meta (dict): Metadata of the entry
+        """
+        _, meta_path = self._paths(meta['url'])
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Function to get the metadata of a cached URL
+        Args:
+            url (str): URL to look up
+        Returns:
+            Optional[dict]: Metadata of the entry, None if the URL is not cached
+        """
+        with self._lock:
+            return self._index.get(url)
+
+    def is_fresh(self, meta: dict) -> bool:
+        """
+        Function to check whether an entry can be served without revalidation
+        Args:
+            meta (dict): Metadata of the entry
+        Returns:
+            bool: True if the entry is younger than max_age
+        """
+        return (time.time() - meta['stored_at']) < self.max_age
+
+    def validators(self, meta: Optional[dict]) -> dict:
+        """
+        Function to build the conditional request headers for an entry
+        Args:
+            meta (Optional[dict]): Metadata of the entry, if cached
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers
+        """
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def to_response(self, meta: dict) -> requests.Response:
+        """
+        Function to rebuild a requests.Response from a cache entry
+        Args:
+            meta (dict): Metadata of the entry
+        Returns:
+            requests.Response: Response with the cached body and headers
+        """
+        body_path, _ = self._paths(meta['url'])
+        with open(body_path, 'rb') as f:
+            content = f.read()
+        response = requests.Response()
+        response.status_code = 200
+        response.url = meta['url']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response._content = content
+        # The body is already read, so iter_content serves it from memory for streamed requests
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def touch(self, url: str, revalidated: bool) -> None:
+        """
+        Function to mark an entry as recently used, and optionally as freshly revalidated.
+        The change is kept in memory until the cache is closed.
+        Args:
+            url (str): URL of the entry
+            revalidated (bool): True if the server just confirmed the entry with a 304
+        """
+        with self._lock:
+            meta = self._index.get(url)
+            if meta is None:
+                return
+            meta['last_access'] = time.time()
+            if revalidated:
+                meta['stored_at'] = meta['last_access']
+            self._dirty.add(url)
+
+    def close(self) -> None:
+        """
+        Function to save the last access and revalidation times of the entries used since they were written
+        """
+        with self._lock:
+            for url in self._dirty:
+                if url in self._index:
+                    self._write_meta(self._index[url])
+            self._dirty.clear()
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        Function to store a successful response in the cache
+        Args:
+            url (str): URL that was requested
+            response (requests.Response): Response with status 200
+        """
+        body_path, _ = self._paths(url)
+        content = response.content
+        tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, body_path)
+        now = time.time()
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {key: value for key, value in response.headers.items() if key.lower() in ('content-type', 'etag', 'last-modified')},
+            'size': len(content),
+            'stored_at': now,
+            'last_access': now,
+        }
+        with self._lock:
+            previous = self._index.get(url)
+            self.total_bytes += meta['size'] - (previous['size'] if previous else 0)
+            self._index[url] = meta
+            self._write_meta(meta)
+            self._dirty.discard(url)
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Function to remove least-recently-used entries until the cache fits in max_bytes.
+        Must be called with the lock held.
+        """
+        if self.total_bytes <= self.max_bytes:
+            return
+        for meta in sorted(self._index.values(), key=lambda m: m['last_access']):
+            if self.total_bytes <= self.max_bytes:
+                break
+            for path in self._paths(meta['url']):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.total_bytes -= meta['size']
+            del self._index[meta['url']]
+            self._dirty.discard(meta['url'])
+
+# Default time-to-live of link existence checks
+DEFAULT_LINK_TTL: float = 7 * 24 * 3600.0
+
+class LinkCache:
+    """
+    Persistent cache of link existence checks, stored as a JSON file mapping each URL to whether it exists
+    and when it was checked. Results older than `ttl` seconds are checked again.
+    """
+    def __init__(self, cache_path: str, ttl: float = DEFAULT_LINK_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def get(self, url: str) -> Optional[bool]:
+        """
+        Function to get the cached existence of a link
+        Args:
+            url (str): Link to look up
+        Returns:
+            Optional[bool]: Whether the link exists, None if it was never checked or the check expired
+        """
+        entry = self._entries.get(url)
+        if (entry is None) or (time.time() - entry['checked_at'] >= self.ttl):
+            return None
+        return entry['exists']
+
+    def update(self, results: Dict[str, bool]) -> None:
+        """
+        Function to record link checks and atomically save the cache
+        Args:
+            results (Dict[str, bool]): Whether each link exists
+        """
+        now = time.time()
+        for url, exists in results.items():
+            self._entries[url] = {'exists': exists, 'checked_at': now}
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.cache_path)
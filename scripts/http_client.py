@@ -0,0 +1,348 @@
+import math
+import requests
+import threading
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from tqdm import tqdm
+from http_cache import HTTPCache
+from instrumentation import get_metrics
+from typing import Callable, Dict, List, Optional
+
+# Default concurrency settings for crawling the DHQ website
+DEFAULT_MAX_WORKERS: int = 8
+DEFAULT_PER_HOST_LIMIT: int = 4
+
+# Default settings for the shared HTTP client
+DEFAULT_TIMEOUT: float = 30.0
+DEFAULT_MAX_RETRIES: int = 4
+DEFAULT_BACKOFF_FACTOR: float = 0.5
+DEFAULT_MAX_BACKOFF: float = 30.0
+DEFAULT_REQUESTS_PER_SECOND: Optional[float] = 10.0
+RETRY_STATUS_CODES: frozenset = frozenset({429, 500, 502, 503, 504})
+
+class HTTPClient:
+    """
+    Shared HTTP client with pooled keep-alive connections per host, timeouts, retries with
+    exponential backoff and jitter on connection errors/5xx/429, and per-host rate limiting.
+    Keeps counters so that throughput and failures can be reported at the end of a run.
+    """
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR, max_backoff: float = DEFAULT_MAX_BACKOFF, requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND, pool_maxsize: int = DEFAULT_MAX_WORKERS, headers: Optional[dict] = None, cache: Optional[HTTPCache] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self._next_request_time: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.stats: Counter = Counter()
+        self.status_codes: Counter = Counter()
+        self.latencies: Dict[str, List[float]] = {}
+
+    def _wait_for_host(self, url: str) -> None:
+        """
+        Function to block until the rate limit allows another request to the host of a URL
+        Args:
+            url (str): URL about to be requested
+        """
+        if self.min_interval <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_request_time.get(host, now))
+            self._next_request_time[host] = scheduled + self.min_interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Function to compute how long to sleep before the next retry
+        Args:
+            attempt (int): Number of the attempt that just failed, starting at 0
+            response (Optional[requests.Response]): Failed response, used to honour Retry-After
+        Returns:
+            float: Number of seconds to sleep
+        """
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.max_backoff)
+        # Full jitter: a random delay between 0 and the exponential backoff ceiling
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _record(self, key: str, amount: int = 1) -> None:
+        """
+        Function to increment one of the run counters
+        Args:
+            key (str): Name of the counter
+            amount (int): Amount to add
+        """
+        with self._lock:
+            self.stats[key] += amount
+
+    def _record_response(self, url: str, status_code: int, latency: float) -> None:
+        """
+        Function to record the status code and latency of a response
+        Args:
+            url (str): URL that was requested
+            status_code (int): Status code of the response
+            latency (float): Time until the response headers were received, in seconds
+        """
+        with self._lock:
+            self.status_codes[status_code] += 1
+            self.latencies.setdefault(urlparse(url).netloc, []).append(latency)
+
+    def record_streamed_bytes(self, amount: int) -> None:
+        """
+        Function to count the bytes read from a streamed response, whose body the client does not read itself
+        Args:
+            amount (int): Number of bytes read
+        """
+        self._record('bytes', amount)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Function to send a request, retrying on connection errors and retryable status codes
+        Args:
+            method (str): HTTP method
+            url (str): URL to request
+            **kwargs: Extra arguments passed to requests.Session.request
+        Returns:
+            requests.Response: The final response (which may still be an error status once retries are exhausted)
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_host(url)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._record('connection_errors')
+                if attempt == self.max_retries:
+                    self._record('failures')
+                    raise
+                self._record('retries')
+                time.sleep(self._backoff(attempt))
+                continue
+            self._record('requests')
+            self._record_response(url, response.status_code, time.perf_counter() - start)
+            if not kwargs.get('stream'):
+                self._record('bytes', len(response.content))
+            if (response.status_code in RETRY_STATUS_CODES) and (attempt < self.max_retries):
+                self._record('retries')
+                response.close()
+                time.sleep(self._backoff(attempt, response))
+                continue
+            if response.status_code >= 400:
+                self._record('failures')
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Function to send a GET request through the shared client.
+        If a cache is configured, fresh entries are served from disk and stale ones are revalidated
+        with If-None-Match/If-Modified-Since. Streamed requests are also served from fresh entries, and never reach
+        the network when the cache is offline, but their responses are not stored since they may only be read in part.
+        Args:
+            url (str): URL to request
+            **kwargs: Extra arguments passed to requests.Session.request
+        Returns:
+            requests.Response: The response
+        """
+        if self.cache is None:
+            return self.request("GET", url, **kwargs)
+
+        entry = self.cache.lookup(url)
+        if (entry is not None) and (self.cache.offline or self.cache.is_fresh(entry)):
+            self._record('cache_hits')
+            self.cache.touch(url, revalidated=False)
+            return self.cache.to_response(entry)
+        if self.cache.offline:
+            self._record('failures')
+            raise requests.exceptions.ConnectionError(f"{url} is not cached and the client is offline")
+        if kwargs.get('stream'):
+            return self.request("GET", url, **kwargs)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update(self.cache.validators(entry))
+        response = self.request("GET", url, headers=headers, **kwargs)
+        if (response.status_code == 304) and (entry is not None):
+            self._record('not_modified')
+            self.cache.touch(url, revalidated=True)
+            return self.cache.to_response(entry)
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        return response
+
+    @property
+    def offline(self) -> bool:
+        """
+        Whether the client only serves responses from its cache
+        """
+        return (self.cache is not None) and self.cache.offline
+
+    def summary(self) -> dict:
+        """
+        Function to get the statistics of the run so far
+        Returns:
+            dict: Counters, status code histogram and latency percentiles in milliseconds per host
+        """
+        with self._lock:
+            latencies = {host: sorted(values) for host, values in self.latencies.items()}
+            summary = {
+                'elapsed_s': time.monotonic() - self.started_at,
+                **dict(self.stats),
+                'status_codes': {str(status): count for status, count in sorted(self.status_codes.items())},
+            }
+        summary['latency_ms'] = {
+            host: {'count': len(values), **{f"p{q}": percentile(values, q) * 1000 for q in (50, 90, 99)}, 'max': values[-1] * 1000}
+            for host, values in latencies.items()
+        }
+        return summary
+
+    def report(self) -> None:
+        """
+        Function to print the throughput and failure counts of the run so far
+        """
+        elapsed = time.monotonic() - self.started_at
+        requests_made = self.stats['requests']
+        rate = requests_made / elapsed if elapsed > 0 else 0.0
+        print(f"HTTP: {requests_made} requests ({rate:.1f}/s), {self.stats['bytes'] / 1e6:.1f} MB downloaded, "
+              f"{self.stats['retries']} retries, {self.stats['connection_errors']} connection errors, "
+              f"{self.stats['failures']} failures in {elapsed:.1f}s")
+        if self.cache is not None:
+            print(f"HTTP cache: {self.stats['cache_hits']} served from cache, {self.stats['not_modified']} revalidated (304)")
+        summary = self.summary()
+        if summary['status_codes']:
+            print(f"HTTP status codes: {', '.join(f'{status}: {count}' for status, count in summary['status_codes'].items())}")
+        for host, latency in summary['latency_ms'].items():
+            print(f"{host}: {latency['count']} requests, p50 {latency['p50']:.0f} ms, p90 {latency['p90']:.0f} ms, p99 {latency['p99']:.0f} ms")
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Function to get a percentile of sorted values with the nearest-rank method
+    Args:
+        sorted_values (List[float]): Values in ascending order, not empty
+        q (float): Percentile between 0 and 100
+    Returns:
+        float: The percentile
+    """
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+def configure_client(**kwargs) -> HTTPClient:
+    """
+    Function to replace the process-wide shared HTTP client, e.g. to attach a cache
+    Args:
+        **kwargs: Arguments passed to HTTPClient
+    Returns:
+        HTTPClient: The new shared client
+    """
+    global _client
+    with _client_lock:
+        _client = HTTPClient(**kwargs)
+        return _client
+
+def get_client() -> HTTPClient:
+    """
+    Function to get the process-wide shared HTTP client, creating it on first use
+    Returns:
+        HTTPClient: The shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+class FetchEngine:
+    """
+    Bounded-concurrency fetch engine. Requests are run on a thread pool with at most
+    `max_workers` in flight overall and at most `per_host_limit` in flight per host.
+    """
+    def __init__(self, fetch: Optional[Callable[[str], requests.Response]] = None, max_workers: int = DEFAULT_MAX_WORKERS, per_host_limit: int = DEFAULT_PER_HOST_LIMIT):
+        self.fetch = fetch if fetch is not None else get_client().get
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """
+        Function to get (or create) the semaphore limiting concurrent requests to the host of a URL
+        Args:
+            url (str): URL being fetched
+        Returns:
+            threading.BoundedSemaphore: Semaphore for the URL's host
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def _fetch_one(self, url: str) -> Optional[requests.Response]:
+        """
+        Function to fetch a single URL while holding its host's semaphore
+        Args:
+            url (str): URL to fetch
+        Returns:
+            Optional[requests.Response]: The response, or None if the request failed
+        """
+        with self._host_semaphore(url):
+            try:
+                return self.fetch(url)
+            except requests.exceptions.RequestException as e:
+                print(f"Failed to fetch {url}: {e}")
+                return None
+
+    def fetch_all(self, urls: List[str], desc: Optional[str] = None) -> List[Optional[requests.Response]]:
+        """
+        Function to fetch a list of URLs concurrently
+        Args:
+            urls (List[str]): URLs to fetch
+            desc (Optional[str]): Description for the progress bar, no progress bar if None
+        Returns:
+            List[Optional[requests.Response]]: Responses in the same order as the input URLs (None for failed requests)
+        """
+        results: List[Optional[requests.Response]] = [None] * len(urls)
+        if len(urls) == 0:
+            return results
+        progress_bar = tqdm(total=len(urls), desc=desc) if desc else None
+        with get_metrics().span("fetch_all") as span, ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            span.add(items=len(urls))
+            futures = {executor.submit(self._fetch_one, url): index for index, url in enumerate(urls)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if progress_bar is not None:
+                    progress_bar.update(1)
+        if progress_bar is not None:
+            progress_bar.close()
+        return results
+
+def fetch_all(urls: List[str], desc: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS, per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> List[Optional[requests.Response]]:
+    """
+    Function to fetch a list of URLs concurrently with a fresh FetchEngine
+    Args:
+        urls (List[str]): URLs to fetch
+        desc (Optional[str]): Description for the progress bar
+        max_workers (int): Maximum number of requests in flight overall
+        per_host_limit (int): Maximum number of requests in flight per host
+    Returns:
+        List[Optional[requests.Response]]: Responses in the same order as the input URLs
+    """
+    engine = FetchEngine(max_workers=max_workers, per_host_limit=per_host_limit)
+    return engine.fetch_all(urls, desc=desc)
@@ -0,0 +1,238 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from storage import data_path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Stage to profile, e.g. DHQ_PROFILE=extract, and profiler to use (cprofile or pyinstrument)
+PROFILE_STAGE: Optional[str] = os.environ.get("DHQ_PROFILE")
+PROFILER: str = os.environ.get("DHQ_PROFILER", "cprofile")
+
+def _resource_usage() -> tuple:
+    """
+    Function to get the CPU time and peak resident memory of the process and its finished child processes (e.g. extraction workers)
+    Returns:
+        tuple: CPU time in seconds, and peak RSS in MB (None where the resource module is not available)
+    """
+    if resource is None:
+        return time.process_time(), None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_s = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    unit = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return cpu_s, max(own.ru_maxrss, children.ru_maxrss) / unit
+
+class Span:
+    """
+    Measurement of one call of a stage or function. Items and bytes processed can be added while it runs.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+
+    def add(self, items: int = 0, bytes: int = 0) -> None:
+        """
+        Function to record items and bytes processed in the span
+        Args:
+            items (int): Number of items (files, pages, rows...)
+            bytes (int): Number of bytes
+        """
+        self.items += items
+        self.bytes += bytes
+
+class RunMetrics:
+    """
+    Lightweight recorder of the run: wall time, CPU time, peak RSS, items and bytes of every stage and instrumented function,
+    aggregated by name so that functions called once per page stay cheap to record, plus named counters.
+    """
+    def __init__(self, profile_stage: Optional[str] = PROFILE_STAGE, profiler: str = PROFILER, profile_dir: Optional[str] = None):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.stages: Dict[str, dict] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        """
+        Function to increment a named counter
+        Args:
+            key (str): Name of the counter
+            amount (int): Amount to add
+        """
+        with self._lock:
+            self.counters[key] += amount
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """
+        Context manager measuring a stage or function call, e.g. `with get_metrics().span("merge") as span: span.add(items=len(df))`.
+        The stage named by `profile_stage` is also profiled. CPU time and peak RSS are those of the whole process,
+        so spans that run concurrently include each other's CPU time.
+        Args:
+            name (str): Name of the stage or function
+        Yields:
+            Span: The span, to record items and bytes
+        """
+        span = Span(name)
+        profiler = self._start_profiler() if name == self.profile_stage else None
+        cpu_start, _ = _resource_usage()
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            wall_s = time.perf_counter() - start
+            cpu_end, peak_rss_mb = _resource_usage()
+            if profiler is not None:
+                self._stop_profiler(profiler, name)
+            with self._lock:
+                stats = self.stages.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'items': 0, 'bytes': 0, 'peak_rss_mb': None})
+                stats['calls'] += 1
+                stats['wall_s'] += wall_s
+                stats['cpu_s'] += cpu_end - cpu_start
+                stats['items'] += span.items
+                stats['bytes'] += span.bytes
+                stats['peak_rss_mb'] = peak_rss_mb
+
+    def _start_profiler(self):
+        """
+        Function to start profiling the current thread
+        Returns:
+            The running profiler
+        """
+        if (self.profiler == "pyinstrument") and (pyinstrument is not None):
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler, name: str) -> None:
+        """
+        Function to stop a profiler, save its results in the profile directory (data/profiles by default) and print the top functions
+        Args:
+            profiler: The running profiler
+            name (str): Name of the profiled stage
+        """
+        profile_dir = self.profile_dir or data_path("profiles")
+        os.makedirs(profile_dir, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = os.path.join(profile_dir, f"profile_{name}.prof")
+            profiler.dump_stats(path)
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(20)
+            print(output.getvalue())
+        else:
+            profiler.stop()
+            path = os.path.join(profile_dir, f"profile_{name}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(profiler.output_text())
+        print(f"Profile of {name} written to {path}")
+
+    def summary(self) -> dict:
+        """
+        Function to build the run report
+        Returns:
+            dict: Timings of every stage, counters and HTTP statistics of the run so far
+        """
+        # Imported here as the HTTP client itself records its fetches with this module
+        from http_client import get_client
+        cpu_s, peak_rss_mb = _resource_usage()
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'wall_s': time.perf_counter() - self._started,
+                'cpu_s': cpu_s,
+                'peak_rss_mb': peak_rss_mb,
+                'stages': {name: dict(stats) for name, stats in self.stages.items()},
+                'counters': dict(self.counters),
+                'http': get_client().summary(),
+            }
+
+    def report(self) -> None:
+        """
+        Function to print the timings of every stage
+        """
+        for name, stats in self.summary()['stages'].items():
+            rss = f", peak RSS {stats['peak_rss_mb']:.0f} MB" if stats['peak_rss_mb'] is not None else ""
+            print(f"{name}: {stats['calls']} calls, {stats['wall_s']:.2f}s wall, {stats['cpu_s']:.2f}s CPU, {stats['items']} items{rss}")
+
+    def write_report(self, path: str) -> None:
+        """
+        Function to atomically write the run report as JSON
+        Args:
+            path (str): Path to the report
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=1)
+        os.replace(tmp_path, path)
+
+_metrics: Optional[RunMetrics] = None
+_metrics_lock = threading.Lock()
+
+def configure_metrics(**kwargs) -> RunMetrics:
+    """
+    Function to replace the process-wide metrics recorder, e.g. to profile a stage
+    Args:
+        **kwargs: Arguments passed to RunMetrics
+    Returns:
+        RunMetrics: The new recorder
+    """
+    global _metrics
+    with _metrics_lock:
+        _metrics = RunMetrics(**kwargs)
+        return _metrics
+
+def get_metrics() -> RunMetrics:
+    """
+    Function to get the process-wide metrics recorder, creating it on first use
+    Returns:
+        RunMetrics: The recorder
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = RunMetrics()
+        return _metrics
+
+def instrumented(name: str) -> Callable:
+    """
+    Decorator recording every call of a function under a span name
+    Args:
+        name (str): Name of the span
+    Returns:
+        Callable: The decorator
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_metrics().span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,193 +1,397 @@
 import pandas as pd
-from typing import List, Any
-from tqdm import tqdm
-from utils import process_xml_files, generate_xml_files, get_scraped_dhq_files
-from dhq_website_scraper import check_if_link_exists
+from typing import List, Any, Optional
+from utils import process_xml_files, generate_xml_files, get_scraped_dhq_files, apply_xml_changes
+from dhq_website_scraper import resolve_links, xml_site_url
+from http_client import get_client, configure_client
+from http_cache import HTTPCache, LinkCache
+from storage import data_file, data_path, read_table, write_table
+from sqlite_catalog import export_catalog
+from instrumentation import get_metrics, instrumented
+from search_index import export_search_index
+from dhq_corpus import CORPUS_BLOB, CORPUS_INDEX, export_corpus
+from dataset_schema import ARTICLE_KEY, align_categories, apply_schema, explode_authors
+import argparse
 import os
+import json
 
-def check_duplicates(rows: pd.DataFrame) -> pd.DataFrame:
+def check_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Function to check for duplicate rows based on the 'date_when' column.
-    If duplicates are found, it keeps only the row with the latest date.
+    For each 'DHQarticle-id' with several rows, it keeps only the row with the latest date.
+    Vectorized equivalent of applying the check to every 'DHQarticle-id' group: rows are sorted by article id,
+    and rows without an article id are dropped.
 
     Args:
-        rows (pd.DataFrame): DataFrame to check for duplicates.
+        df (pd.DataFrame): DataFrame to check for duplicates.
 
     Returns:
         pd.DataFrame: DataFrame with duplicates removed.
     """
-    # If there is more than one row, sort them by 'date_when' in descending order
-    if len(rows) > 1:
-        rows = rows.sort_values(by=['date_when'], ascending=False)
-        # Keep only the first row (the one with the latest date)
-        rows = rows[0:1]
-    return rows
+    df = df[df['DHQarticle-id'].notna()]
+    # Sort by 'date_when' in descending order and keep the first row (the one with the latest date) of each article
+    df = df.sort_values(by=['date_when'], ascending=False, kind='stable')
+    df = df.drop_duplicates(subset=['DHQarticle-id'], keep='first')
+    return df.sort_values(by=['DHQarticle-id'], kind='stable')
 
-def infer_dates(rows: pd.DataFrame) -> pd.DataFrame:
+def infer_dates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Function to infer missing dates in the 'date_processed' column.
-    It assigns the maximum date to the rows with missing dates.
+    It assigns the maximum date of each 'volume' and 'issue' to the rows of that issue with missing dates.
+    Vectorized equivalent of applying the inference to every issue group: rows are sorted by issue,
+    with the rows that had missing dates first within each issue.
 
     Args:
-        rows (pd.DataFrame): DataFrame to infer missing dates.
+        df (pd.DataFrame): DataFrame to infer missing dates.
 
     Returns:
         pd.DataFrame: DataFrame with missing dates inferred.
     """
-    # Separate the rows with missing dates and the rows with dates
-    missing_dates = rows[rows.date_processed.isna()]
-    has_dates = rows[rows.date_processed.notna()]
+    df = df[df['volume'].notna() & df['issue'].notna()].copy()
+    had_date = df.date_processed.notna()
 
-    # Find the latest date
-    latest_date = has_dates.date_processed.max()
+    # Assign the latest date of the issue to the rows with missing dates
+    latest_date = df.groupby(['volume', 'issue']).date_processed.transform('max')
+    df['date_processed'] = df.date_processed.fillna(latest_date)
 
-    # Assign the latest date to the rows with missing dates
-    missing_dates.date_processed = latest_date
+    # Order the rows by issue, rows with missing dates first
+    order = pd.DataFrame({'volume': df['volume'], 'issue': df['issue'], 'had_date': had_date}).sort_values(by=['volume', 'issue', 'had_date'], kind='stable').index
+    return df.loc[order]
 
-    # Concatenate the rows with missing dates and the rows with dates
-    rows = pd.concat([missing_dates, has_dates])
-    return rows
+@instrumented("clean_dataset")
+def clean_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to clean the data extracted from the XML files: parse dates, remove duplicate articles and infer missing values.
+
+    Args:
+        df (pd.DataFrame): DataFrame of extracted data.
+
+    Returns:
+        pd.DataFrame: The cleaned DataFrame.
+    """
+    # Correct a typo in the 'date_when' column
+    df.date_when = df.date_when.str.replace('Feburary', 'February')
+
+    # Convert the 'date_when' column to datetime format
+    df['date_processed'] = pd.to_datetime(df['date_when'])
+
+    # Keep the latest row of each 'DHQarticle-id'
+    df = check_duplicates(df)
+
+    # Correct the 'volume' and 'issue' values for a specific file
+    df.loc[df.file_name == "../data/dhq_data/000664.xml", "volume"] = "016"
+    df.loc[df.file_name == "../data/dhq_data/000664.xml", "issue"] = "4"
+
+    # Assign a default value to the missing 'volume' and 'issue' values
+    df.loc[df.volume.isna(), 'volume'] = 'yet to be assigned'
+    df.loc[df.issue.isna(), 'issue'] = 'yet to be assigned'
+
+    # Infer the missing dates of each issue
+    df = infer_dates(df)
+    return df
+
+def merge_article_links(df: pd.DataFrame, article_links_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to merge the scraped article links into the dataset on the integer article key and the volume and issue categories,
+    so the join compares integers instead of strings. Links whose id is not a number (e.g. previews) cannot match any article and are dropped.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the compact schema (see dataset_schema.apply_schema).
+        article_links_df (pd.DataFrame): DataFrame of scraped article links, with 'DHQarticle-id', 'volume' and 'issue' columns.
+
+    Returns:
+        pd.DataFrame: The merged DataFrame.
+    """
+    article_links_df = article_links_df.rename(columns={'authors': 'scraped_authors', 'editors': 'scraped_editors'})
+    article_links_df = apply_schema(article_links_df).drop(columns=['DHQarticle-id'])
+    article_links_df = article_links_df[article_links_df[ARTICLE_KEY].notna()]
+    df, article_links_df = align_categories(df, article_links_df, ['volume', 'issue'])
+    return pd.merge(df, article_links_df, on=[ARTICLE_KEY, 'volume', 'issue'], how='left')
+
+@instrumented("merge_scraped_data")
+def merge_scraped_data(df: pd.DataFrame, processed_df_output_path: str) -> pd.DataFrame:
+    """
+    Function to add the articles downloaded from the website and merge the scraped article links into the dataset.
+    The merged dataset is saved with the configured storage backend.
+
+    Args:
+        df (pd.DataFrame): DataFrame of cleaned data.
+        processed_df_output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+
+    Returns:
+        pd.DataFrame: DataFrame containing the processed data.
+    """
+    # Get the scraped DHQ files
+    article_links_df, updated_df = get_scraped_dhq_files()
+
+    # If there are updated files, concatenate them to the DataFrame
+    if len(updated_df) > 0:
+        df = pd.concat([df, updated_df])
+        df = apply_schema(df.reset_index(drop=True))
+
+    # If there are article links, merge them with the DataFrame
+    if len(article_links_df) > 0:
+        processed_df = merge_article_links(apply_schema(df), article_links_df)
+        write_table(processed_df, processed_df_output_path)
+    else:
+        print("No article links found")
+        processed_df = df
+    return processed_df
+
+def extract_dataset(directory_path: str, rerun_code: bool, workers: int = 1, change_feed_path: Optional[str] = None, repo_path: Optional[str] = None,
+                    changed_files: Optional[List[str]] = None, deleted_files: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Function to extract and clean the data of the XML files, saved as the initial dataset.
+    The rows extracted from each file are kept as they are in their own table, which the manifest describes,
+    so files dropped by the cleaning (e.g. duplicate articles) are still known to the next incremental run.
+    With a change feed, only the XML files added or modified since the previous commit are extracted and rows of deleted files are dropped,
+    and likewise with explicit lists of changed and deleted files, otherwise every XML file in the directory is checked against the manifest.
+
+    Args:
+        directory_path (str): Path to the directory containing the XML files.
+        rerun_code (bool): Flag to reprocess every XML file instead of only the new or modified ones.
+        workers (int): Number of worker processes used to extract the XML files.
+        change_feed_path (Optional[str]): Path to the change feed JSON file written by dhq_repo_observer.py.
+        repo_path (Optional[str]): Path to the local clone of the DHQ repository, which the paths of the change feed are relative to.
+        changed_files (Optional[List[str]]): Paths to the XML files that were added or modified, e.g. reported by dhq_watcher.py.
+        deleted_files (Optional[List[str]]): Paths to the XML files that were deleted.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the cleaned data.
+    """
+    if change_feed_path is not None:
+        with open(change_feed_path, 'r', encoding='utf-8') as f:
+            change_feed = json.load(f)
+        print(f"Applying changes from {change_feed['previous_commit']} to {change_feed['new_commit']}")
+
+        changed_files = [os.path.join(repo_path, change['path']) for change in change_feed['changes'] if change['status'] in ('A', 'M')]
+        deleted_files = [os.path.join(repo_path, change['path']) for change in change_feed['changes'] if change['status'] == 'D']
+
+    if (changed_files is not None) or (deleted_files is not None):
+        # Update the extracted data with the changed files only
+        df = apply_xml_changes(changed_files or [], deleted_files or [], data_file("extracted_dhq_data"), workers)
+    else:
+        # Process the XML files of the directory and save the data to a DataFrame
+        df = process_xml_files(generate_xml_files(directory_path), data_file("extracted_dhq_data"), rerun_code, workers)
+
+    # Clean the extracted data, convert it to the compact schema and save it
+    df = apply_schema(clean_dataset(df))
+    write_table(df, data_file("initial_dhq_data"))
+
+    # Reset the index of the DataFrame
+    return df.reset_index(drop=True)
 
-def create_dataset(directory_path: str, processed_df_output_path: str, rerun_code: bool) -> pd.DataFrame:
+def create_dataset(directory_path: str, processed_df_output_path: str, rerun_code: bool, workers: int = 1) -> pd.DataFrame:
     """
     Function to create a dataset from XML files in a given directory.
-    The dataset is saved to a CSV file.
+    The dataset is saved with the configured storage backend.
 
     Args:
         directory_path (str): Path to the directory containing the XML files.
-        processed_df_output_path (str): Path to the output CSV file.
+        processed_df_output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+        workers (int): Number of worker processes used to extract the XML files.
 
     Returns:
         pd.DataFrame: DataFrame containing the processed data.
     """
     # If the output file already exists, load it into a DataFrame
     if os.path.exists(processed_df_output_path) and not rerun_code:
-        processed_df = pd.read_csv(processed_df_output_path)
+        processed_df = read_table(processed_df_output_path)
     else:
-        # Generate a list of XML files in the directory
-        xml_files = generate_xml_files(directory_path)
-
-        # Process the XML files and save the data to a DataFrame
-        df = process_xml_files(xml_files, "../data/initial_dhq_data.csv", rerun_code)
-
-        # Correct a typo in the 'date_when' column
-        df.date_when = df.date_when.str.replace('Feburary', 'February')
-
-        # Convert the 'date_when' column to datetime format
-        df['date_processed'] = pd.to_datetime(df['date_when'])
-
-        # Apply the 'check_duplicates' function to each group of rows with the same 'DHQarticle-id'
-        tqdm.pandas(desc="Checking duplicates")
-        df = df.groupby('DHQarticle-id', group_keys=False).progress_apply(check_duplicates)
-
-        # Correct the 'volume' and 'issue' values for a specific file
-        df.loc[df.file_name == "../data/dhq_data/000664.xml", "volume"] = "016"
-        df.loc[df.file_name == "../data/dhq_data/000664.xml", "issue"] = "4"
-
-        # Assign a default value to the missing 'volume' and 'issue' values
-        df.loc[df.volume.isna(), 'volume'] = 'yet to be assigned'
-        df.loc[df.issue.isna(), 'issue'] = 'yet to be assigned'
-
-        # Apply the 'infer_dates' function to each group of rows with the same 'volume' and 'issue'
-        df = df.groupby(['volume', 'issue'], group_keys=False).progress_apply(infer_dates)
-
-        # Save the DataFrame to a CSV file
-        df.to_csv("../data/initial_dhq_data.csv", index=False)
-
-        # Reset the index of the DataFrame
-        df = df.reset_index(drop=True)
-
-        # Get the scraped DHQ files
-        article_links_df, updated_df = get_scraped_dhq_files()
-
-        # If there are updated files, concatenate them to the DataFrame
-        if len(updated_df) > 0:
-            df = pd.concat([df, updated_df])
-            df = df.reset_index(drop=True)
-
-        # If there are article links, merge them with the DataFrame
-        if len(article_links_df) > 0:
-            article_links_df = article_links_df.rename(columns={'authors': 'scraped_authors', 'editors': 'scraped_editors'})
-            df['volume'] = df['volume'].astype(str)
-            df['issue'] = df['issue'].astype(str)
-            df['DHQarticle-id'] = df['DHQarticle-id'].astype(str)
-            article_links_df['volume'] = article_links_df['volume'].astype(str)
-            article_links_df['issue'] = article_links_df['issue'].astype(str)
-            article_links_df['DHQarticle-id'] = article_links_df['DHQarticle-id'].astype(str)
-            processed_df = pd.merge(df, article_links_df, on=['DHQarticle-id', 'volume', 'issue'], how='left')
-            processed_df.to_csv(processed_df_output_path, index=False)
-        else:
-            print("No article links found")
-            processed_df = df
+        # Extract and clean the data of the XML files
+        df = extract_dataset(directory_path, rerun_code, workers)
+
+        # Merge the website data into the extracted data
+        processed_df = merge_scraped_data(df, processed_df_output_path)
 
     return processed_df
 
-def create_article_link(row: pd.Series) -> pd.Series:
+def update_dataset(directory_path: str, processed_df_output_path: str, workers: int = 1) -> pd.DataFrame:
     """
-    Function to create an article link for a given row if it doesn't exist.
-    
+    Function to update the dataset from the XML files in a given directory.
+    Only the XML files that are new or modified according to the manifest are extracted, and rows of deleted files are dropped,
+    before the cleaning and merging steps are rerun.
+
+    Args:
+        directory_path (str): Path to the directory containing the XML files.
+        processed_df_output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+        workers (int): Number of worker processes used to extract the XML files.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the processed data.
+    """
+    # Extract and clean the data of the new or modified files
+    df = extract_dataset(directory_path, False, workers)
+
+    # Merge the website data into the extracted data
+    return merge_scraped_data(df, processed_df_output_path)
+
+def update_dataset_from_changes(change_feed_path: str, repo_path: str, processed_df_output_path: str, workers: int = 1) -> pd.DataFrame:
+    """
+    Function to update the dataset from the change feed written by dhq_repo_observer.py.
+    Only the XML files added or modified since the previous commit are extracted, and rows of deleted files are dropped,
+    before the cleaning and merging steps are rerun. The change feed is removed once it has been applied.
+
     Args:
-        row (pd.Series): A row of the DataFrame.
+        change_feed_path (str): Path to the change feed JSON file.
+        repo_path (str): Path to the local clone of the DHQ repository, which the paths of the change feed are relative to.
+        processed_df_output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+        workers (int): Number of worker processes used to extract the XML files.
 
     Returns:
-        pd.Series: The row with the created article link.
+        pd.DataFrame: DataFrame containing the processed data.
     """
-    # If the article link is missing, create it
-    if pd.isna(row.article_link):
-        volume = row.volume
-        issue = row.issue
-        article_id = row['DHQarticle-id']
-        base_url = "http://digitalhumanities.org:8081"
-        article_link = f"{base_url}/dhq/vol/{volume}/{issue}/{article_id}/{article_id}.html"
+    # Extract and clean the data of the changed files
+    df = extract_dataset(os.path.join(repo_path, "articles"), False, workers, change_feed_path, repo_path)
 
-        # If the created link exists, assign it to the 'article_link' column
-        if check_if_link_exists(article_link):
-            row['article_link'] = article_link
+    # Merge the website data into the extracted data
+    processed_df = merge_scraped_data(df, processed_df_output_path)
 
-    return row
+    # The change feed has been applied
+    os.remove(change_feed_path)
+    return processed_df
 
-def infer_issue_data(rows: pd.DataFrame) -> pd.DataFrame:
+def update_dataset_from_paths(changed_files: List[str], deleted_files: List[str], articles_path: str, missing_directory: str,
+                              processed_df_output_path: str, workers: int = 1, rescan: bool = False) -> pd.DataFrame:
     """
-    Function to infer issue data for a given group of rows.
+    Function to update the dataset from the paths of the XML files that changed, as reported by dhq_watcher.py.
+    Files under the articles directory update the initial dataset and files under the directory of the missing articles
+    update the missing articles, without walking either directory, before the cleaning and merging steps are rerun.
+
+    Args:
+        changed_files (List[str]): Paths to the XML files that were added or modified.
+        deleted_files (List[str]): Paths to the XML files that were deleted.
+        articles_path (str): Path to the articles directory of the DHQ repository.
+        missing_directory (str): Path to the directory of the missing articles downloaded from the website.
+        processed_df_output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+        workers (int): Number of worker processes used to extract the XML files.
+        rescan (bool): Flag to check every XML file of both directories against the manifests instead, e.g. after missed events.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the processed data.
+    """
+    def under(directory: str, paths: List[str]) -> List[str]:
+        return [path for path in paths if os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)]
+
+    if rescan:
+        df = extract_dataset(articles_path, False, workers)
+        process_xml_files(generate_xml_files(missing_directory), data_file("missing_dhq_data"), False, workers)
+    else:
+        article_changes, article_deletions = under(articles_path, changed_files), under(articles_path, deleted_files)
+        if article_changes or article_deletions:
+            df = extract_dataset(articles_path, False, workers, changed_files=article_changes, deleted_files=article_deletions)
+        else:
+            df = read_table(data_file("initial_dhq_data"))
+        missing_changes, missing_deletions = under(missing_directory, changed_files), under(missing_directory, deleted_files)
+        if missing_changes or missing_deletions:
+            apply_xml_changes(missing_changes, missing_deletions, data_file("missing_dhq_data"), workers)
+
+    # Merge the website data into the extracted data
+    return merge_scraped_data(df, processed_df_output_path)
+
+def create_article_links(df: pd.DataFrame, link_cache: Optional[LinkCache] = None) -> pd.DataFrame:
+    """
+    Function to create the article links that are missing.
+    Candidate links are built from the volume, issue and article id, checked as one batch, and the ones that exist are assigned in one step.
     
     Args:
-        rows (pd.DataFrame): A group of rows of the DataFrame.
+        df (pd.DataFrame): The DataFrame.
+        link_cache (Optional[LinkCache]): Persistent cache of link checks.
 
     Returns:
-        pd.DataFrame: The group of rows with the inferred issue data.
+        pd.DataFrame: The DataFrame with the created article links.
+    """
+    missing = df.article_link.isna()
+    if not missing.any():
+        return df
+
+    # Build the candidate links of the rows without an article link
+    rows = df[missing]
+    article_ids = rows['DHQarticle-id'].astype(str)
+    candidates = xml_site_url("/dhq/vol/") + rows.volume.astype(str) + "/" + rows.issue.astype(str) + "/" + article_ids + "/" + article_ids + ".html"
+
+    # Check every candidate link at once and assign the ones that exist
+    exists = resolve_links(candidates.tolist(), link_cache)
+    found = candidates[candidates.map(exists).astype(bool)]
+    df = df.copy()
+    df.loc[found.index, 'article_link'] = found
+    return df
+
+def infer_issue_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to infer issue data for each 'volume' and 'issue'.
+    Every row of an issue gets the first non-null value of the issue for each issue column.
+    Vectorized equivalent of applying the inference to every issue group: rows are sorted by issue,
+    and rows without a volume or issue are dropped.
+    
+    Args:
+        df (pd.DataFrame): DataFrame to infer issue data.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the inferred issue data.
     """
     # List of columns to infer
     columns = ['issue_title', 'scraped_editors', 'issue_text', 'issue_link']
 
-    # For each column, assign the first unique non-null value to all rows
+    df = df[df['volume'].notna() & df['issue'].notna()].copy()
+    df = df.sort_values(by=['volume', 'issue'], kind='stable')
+
+    # For each column, assign the first non-null value of the issue to all rows
+    first_values = df.groupby(['volume', 'issue'])[columns].transform('first')
     for col in columns:
-        unique_values = rows[col].dropna().unique()
-        rows[col] = unique_values[0] if unique_values.size > 0 else None
+        df[col] = first_values[col]
 
-    return rows
+    return df
 
-def finalize_dataset(processed_df: pd.DataFrame) -> None:
+@instrumented("finalize_dataset")
+def finalize_dataset(processed_df: pd.DataFrame, link_cache: Optional[LinkCache] = None) -> None:
     """
     Function to finalize the dataset by creating missing article links and inferring issue data.
-    The finalized dataset is saved to a CSV file.
+    The finalized dataset is saved with the configured storage backend and exported to the SQLite catalog, the search index,
+    the corpus of memory-mapped body texts and the author table.
 
     Args:
         processed_df (pd.DataFrame): The processed DataFrame.
+        link_cache (Optional[LinkCache]): Persistent cache of link checks, so reruns do not probe the same links again.
     """
     # Create missing article links
-    tqdm.pandas(desc="Creating article links")
-    processed_df = processed_df.progress_apply(create_article_link, axis=1, result_type="expand")
+    processed_df = create_article_links(apply_schema(processed_df), link_cache)
 
-    # Infer issue data by grouping by 'volume' and 'issue'
-    processed_df = processed_df.groupby(['volume', 'issue'], group_keys=False).progress_apply(infer_issue_data)
+    # Infer issue data for each 'volume' and 'issue'
+    processed_df = infer_issue_data(processed_df)
 
-    # Save the finalized dataset to a CSV file
-    processed_df.to_csv("../data/processed_dhq_data.csv", index=False)
+    # Save the finalized dataset
+    write_table(processed_df, data_file("processed_dhq_data"))
+
+    # Update the SQLite catalog of articles, authors and issues, and the full-text search index
+    export_catalog(processed_df, data_path("dhq_catalog.sqlite"))
+    export_search_index(processed_df, data_path("dhq_search.sqlite"))
+
+    # Update the corpus read by DHQCorpus, with the body texts in one blob
+    export_corpus(processed_df, data_path(CORPUS_BLOB), data_file(CORPUS_INDEX))
+
+    # Save the authors as their own table, one row per author keyed by the integer article key
+    write_table(explode_authors(processed_df), data_file("dhq_authors"))
 
 
 if __name__ == "__main__":
-    rerun_code = True
-    processed_df = create_dataset("../data/dhq-journal/articles", "../data/processed_dhq_data.csv", rerun_code)
+    parser = argparse.ArgumentParser(description="Create or update the DHQ dataset from the XML files")
+    parser.add_argument("--rerun", action="store_true", help="Reprocess every XML file instead of only the new or modified ones")
+    args = parser.parse_args()
+
+    configure_client(cache=HTTPCache(data_path("http_cache"), offline=os.environ.get("DHQ_OFFLINE") == "1"))
+    workers = os.cpu_count() or 1
+    change_feed_path = data_path("dhq_changes.json")
+    if args.rerun:
+        processed_df = create_dataset(data_path("dhq-journal", "articles"), data_file("processed_dhq_data"), True, workers)
+    elif os.path.exists(change_feed_path):
+        # Only process the articles that changed since the last pull
+        processed_df = update_dataset_from_changes(change_feed_path, data_path("dhq-journal"), data_file("processed_dhq_data"), workers)
+    else:
+        # Only process the articles that are new or modified according to the manifest
+        processed_df = update_dataset(data_path("dhq-journal", "articles"), data_file("processed_dhq_data"), workers)
     processed_df['DHQarticle-id'] = processed_df['DHQarticle-id'].astype(str)
     processed_df['DHQarticle-id'] = processed_df['DHQarticle-id'].str.zfill(6)
-    finalize_dataset(processed_df)
\ No newline at end of file
+    finalize_dataset(processed_df, LinkCache(data_path("link_cache.json")))
+    get_client().report()
+    get_metrics().report()
+    get_metrics().write_report(data_path("run_report.json"))
@@ -0,0 +1,279 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+import storage
+from storage import data_file, data_path, read_table, write_table
+from http_client import get_client, configure_client
+from http_cache import HTTPCache, LinkCache
+from instrumentation import configure_metrics, get_metrics
+from dhq_repo_observer import GitHubCommitSource, compare_commits
+from dhq_website_scraper import crawl_dhq, site_url, download_missing_articles
+from process_dhq_articles import extract_dataset, merge_scraped_data, finalize_dataset
+from dhq_corpus import CORPUS_BLOB, CORPUS_INDEX
+
+# File recording the fingerprints of the inputs and outputs of every stage after its last run
+STATE_FILE: str = "pipeline_state.json"
+
+class Stage:
+    """
+    Step of the pipeline with the files it reads and writes. A stage is skipped when its inputs and outputs have the same
+    fingerprints as after its last run and its probe (a cheap check of remote state, e.g. the page that lists the issues)
+    returns the same value. The outputs of the stages it depends on must be among its inputs for changes to propagate.
+    """
+    def __init__(self, name: str, run: Callable[[], None], inputs: Optional[List[str]] = None, outputs: Optional[List[str]] = None,
+                 depends_on: Optional[List[str]] = None, probe: Optional[Callable[[], Optional[str]]] = None, always_run: bool = False):
+        self.name = name
+        self.run = run
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.depends_on = depends_on or []
+        self.probe = probe
+        self.always_run = always_run
+
+def path_fingerprint(path: str) -> Optional[str]:
+    """
+    Function to fingerprint a file or directory from its size and modification time, without reading its content.
+    Directories are fingerprinted from every file below them, git metadata excluded.
+    Args:
+        path (str): Path to the file or directory
+    Returns:
+        Optional[str]: The fingerprint, None if the path does not exist
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, directories, files in os.walk(path):
+        directories[:] = sorted(directory for directory in directories if directory != '.git')
+        for file_name in sorted(files):
+            stat = os.stat(os.path.join(root, file_name))
+            digest.update(f"{os.path.relpath(os.path.join(root, file_name), path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+class Pipeline:
+    """
+    Runs stages in dependency order, independent stages concurrently, and skips the stages that are up to date.
+    """
+    def __init__(self, stages: List[Stage], state_path: str, max_parallel: int = 2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.max_parallel = max_parallel
+        self.state: Dict[str, dict] = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        for stage in stages:
+            missing = [name for name in stage.depends_on if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(missing)}")
+
+    def _fingerprints(self, stage: Stage) -> dict:
+        """
+        Function to fingerprint the inputs and outputs of a stage
+        Args:
+            stage (Stage): The stage
+        Returns:
+            dict: Fingerprints of the inputs and outputs
+        """
+        return {
+            'inputs': {path: path_fingerprint(path) for path in stage.inputs},
+            'outputs': {path: path_fingerprint(path) for path in stage.outputs},
+        }
+
+    def is_up_to_date(self, stage: Stage, probe: Optional[str]) -> bool:
+        """
+        Function to check whether a stage can be skipped
+        Args:
+            stage (Stage): The stage
+            probe (Optional[str]): Current value of the probe of the stage
+        Returns:
+            bool: True if the stage has run before and nothing it depends on has changed since
+        """
+        previous = self.state.get(stage.name)
+        if stage.always_run or (previous is None):
+            return False
+        if any(path_fingerprint(path) is None for path in stage.outputs):
+            return False
+        return (previous['probe'] == probe) and ({key: previous[key] for key in ('inputs', 'outputs')} == self._fingerprints(stage))
+
+    def _save_state(self) -> None:
+        """
+        Function to atomically write the state of the stages
+        """
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def _run_stage(self, stage: Stage, force: bool) -> bool:
+        """
+        Function to run a stage unless it is up to date
+        Args:
+            stage (Stage): The stage
+            force (bool): Flag to run the stage even if it is up to date
+        Returns:
+            bool: True if the stage ran, False if it was skipped
+        """
+        probe = stage.probe() if stage.probe is not None else None
+        if (not force) and self.is_up_to_date(stage, probe):
+            print(f"[{stage.name}] up to date, skipped")
+            return False
+        print(f"[{stage.name}] running")
+        start = time.perf_counter()
+        with get_metrics().span(f"stage:{stage.name}"):
+            stage.run()
+        # Fingerprints are taken after the run, as stages may consume their inputs (e.g. the change feed)
+        self.state[stage.name] = {'probe': probe, **self._fingerprints(stage), 'finished_at': time.time()}
+        print(f"[{stage.name}] done in {time.perf_counter() - start:.1f}s")
+        return True
+
+    def run(self, force: bool = False) -> Dict[str, bool]:
+        """
+        Function to run the pipeline. A stage starts as soon as all the stages it depends on are finished.
+        Args:
+            force (bool): Flag to run every stage even if it is up to date
+        Returns:
+            Dict[str, bool]: Whether each stage ran
+        """
+        ran: Dict[str, bool] = {}
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in ran for dependency in stage.depends_on):
+                        running[executor.submit(self._run_stage, stage, force)] = name
+                        del pending[name]
+                if not running:
+                    raise ValueError(f"Dependency cycle between stages: {', '.join(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        ran[name] = future.result()
+                    finally:
+                        # Keep the state of the stages that finished even if another one failed
+                        self._save_state()
+        return ran
+
+def probe_website() -> Optional[str]:
+    """
+    Function to fingerprint the remote state the website scrape depends on: the page that lists the issues and the preview issue,
+    which changes in place. With the HTTP cache, unchanged pages are revalidated with conditional requests.
+    Returns:
+        Optional[str]: Hash of the pages, None if they could not be fetched (the stage then always runs)
+    """
+    try:
+        response = get_client().get(site_url())
+        if response.status_code != 200:
+            return None
+        digest = hashlib.sha256(response.content)
+        div = BeautifulSoup(response.text, "html.parser").find("div", {"id": "leftsidenav"})
+        preview_links = [link.get('href') for link in div.find_all('a') if 'preview' in (link.get('href') or '')] if div is not None else []
+        for link in preview_links:
+            preview = get_client().get(urljoin(site_url(), link))
+            if preview.status_code != 200:
+                return None
+            digest.update(preview.content)
+    except requests.exceptions.RequestException:
+        return None
+    return digest.hexdigest()
+
+def build_pipeline(workers: int = 1, incremental_scrape: bool = True, observe: bool = True) -> Pipeline:
+    """
+    Function to build the DHQ pipeline: observer -> XML extraction -> website scrape -> merge -> finalize,
+    with the XML extraction and the website crawl running concurrently. Paths are under the configured data root.
+    Args:
+        workers (int): Number of worker processes used to extract the XML files
+        incremental_scrape (bool): Flag to only crawl new issues and the preview issue
+        observe (bool): Flag to check the DHQ repository for new commits first
+    Returns:
+        Pipeline: The pipeline
+    """
+    repo_path = data_path("dhq-journal")
+    articles_path = data_path("dhq-journal", "articles")
+    change_feed_path = data_path("dhq_changes.json")
+    missing_directory = data_path("missing_dhq_data")
+    merged_path = data_file("merged_dhq_data")
+
+    def run_observe() -> None:
+        # The ETag of the last lookup is kept so that an unchanged repository only costs a 304
+        commit_source = GitHubCommitSource(state_path=data_path("dhq_observer_state.json"))
+        compare_commits(commit_source, local_repo_path=repo_path, change_feed_path=change_feed_path)
+
+    def run_extract() -> None:
+        if os.path.exists(change_feed_path):
+            extract_dataset(articles_path, False, workers, change_feed_path, repo_path)
+            # The change feed has been applied
+            os.remove(change_feed_path)
+        else:
+            extract_dataset(articles_path, False, workers)
+
+    def run_scrape() -> None:
+        crawl_dhq(incremental_scrape)
+
+    def run_download() -> None:
+        os.makedirs(missing_directory, exist_ok=True)
+        existing_articles_df = read_table(data_file("initial_dhq_data"), columns=['DHQarticle-id'])
+        updated_df = download_missing_articles(read_table(data_file("dhq_article_links")), existing_articles_df, missing_directory)
+        # An empty table still records that nothing is missing
+        if updated_df.empty:
+            write_table(pd.DataFrame(columns=['DHQarticle-id']), data_file("missing_dhq_data"))
+
+    def run_merge() -> None:
+        df = read_table(data_file("initial_dhq_data"))
+        merged_df = merge_scraped_data(df, merged_path)
+        if not os.path.exists(merged_path):
+            write_table(merged_df, merged_path)
+
+    def run_finalize() -> None:
+        processed_df = read_table(merged_path)
+        processed_df['DHQarticle-id'] = processed_df['DHQarticle-id'].astype(str).str.zfill(6)
+        finalize_dataset(processed_df, LinkCache(data_path("link_cache.json")))
+
+    stages = [
+        Stage("extract", run_extract, inputs=[articles_path, change_feed_path], outputs=[data_file("extracted_dhq_data"), data_file("initial_dhq_data")],
+              depends_on=["observe"] if observe else []),
+        Stage("scrape", run_scrape, outputs=[data_path("dhq_issue_links.csv"), data_file("dhq_article_links")], probe=probe_website),
+        Stage("download", run_download, inputs=[data_file("initial_dhq_data"), data_file("dhq_article_links")],
+              outputs=[data_file("missing_dhq_data")], depends_on=["extract", "scrape"]),
+        Stage("merge", run_merge, inputs=[data_file("initial_dhq_data"), data_file("dhq_article_links"), data_file("missing_dhq_data")],
+              outputs=[merged_path], depends_on=["download"]),
+        Stage("finalize", run_finalize, inputs=[merged_path],
+              outputs=[data_file("processed_dhq_data"), data_path("dhq_catalog.sqlite"), data_path("dhq_search.sqlite"),
+                       data_path(CORPUS_BLOB), data_file(CORPUS_INDEX), data_file("dhq_authors")], depends_on=["merge"]),
+    ]
+    if observe:
+        # The observer only makes one API call when there are no new commits, so it always runs
+        stages.insert(0, Stage("observe", run_observe, always_run=True))
+    return Pipeline(stages, data_path(STATE_FILE))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the DHQ pipeline, skipping the stages that are up to date")
+    parser.add_argument("--data-root", default=storage.DATA_ROOT, help="Directory of the data files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes used to extract the XML files")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if it is up to date")
+    parser.add_argument("--full-scrape", action="store_true", help="Crawl every issue of the website instead of only the new ones and the preview issue")
+    parser.add_argument("--no-observe", action="store_true", help="Do not check the DHQ repository for new commits")
+    parser.add_argument("--profile", metavar="SPAN", help="Profile one stage or function, e.g. stage:extract or extract_articles")
+    args = parser.parse_args()
+
+    storage.set_data_root(args.data_root)
+    configure_metrics(profile_stage=args.profile)
+    configure_client(cache=HTTPCache(data_path("http_cache"), offline=os.environ.get("DHQ_OFFLINE") == "1"))
+    start = time.perf_counter()
+    ran = build_pipeline(args.workers, not args.full_scrape, not args.no_observe).run(force=args.force)
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s, ran: {', '.join(name for name, did_run in ran.items() if did_run) or 'nothing'}")
+    get_client().report()
+    get_metrics().report()
+    get_metrics().write_report(data_path("run_report.json"))
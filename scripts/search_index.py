@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import sqlite3
+import time
+import pandas as pd
+from typing import Iterable, List, Optional
+from storage import data_file, data_path, read_table
+
+# File of the search index under the data root
+SEARCH_INDEX_NAME: str = "dhq_search.sqlite"
+
+# Indexed columns and their BM25 weights, a hit in the title counts more than a hit in the body
+SEARCH_COLUMNS: List[str] = ['title', 'dhq_abstract', 'body_text']
+BM25_WEIGHTS: List[float] = [10.0, 5.0, 1.0]
+
+SCHEMA: str = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    dhq_article_id UNINDEXED,
+    title,
+    dhq_abstract,
+    body_text,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed_articles (
+    dhq_article_id TEXT PRIMARY KEY,
+    fts_rowid INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Function to open the search index, creating it if needed
+    Args:
+        db_path (Optional[str]): Path to the SQLite database, data_path(SEARCH_INDEX_NAME) if None
+    Returns:
+        sqlite3.Connection: Connection to the search index
+    """
+    conn = sqlite3.connect(db_path or data_path(SEARCH_INDEX_NAME))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _text(value) -> str:
+    """
+    Function to turn a dataset value into indexable text
+    Args:
+        value: Value of a dataset cell
+    Returns:
+        str: The text, empty if the value is missing
+    """
+    return "" if value is None or pd.isna(value) else str(value)
+
+def index_articles(conn: sqlite3.Connection, records: Iterable[dict]) -> int:
+    """
+    Function to add or update articles in the search index. Articles whose title, abstract and body did not change are skipped.
+    Args:
+        conn (sqlite3.Connection): Connection to the search index
+        records (Iterable[dict]): Article records with 'DHQarticle-id', 'title', 'dhq_abstract' and 'body_text'
+    Returns:
+        int: Number of articles added or updated
+    """
+    updated = 0
+    with conn:
+        for record in records:
+            article_id = _text(record.get('DHQarticle-id'))
+            if not article_id:
+                continue
+            texts = [_text(record.get(column)) for column in SEARCH_COLUMNS]
+            content_hash = hashlib.sha256('\x00'.join(texts).encode('utf-8')).hexdigest()
+            existing = conn.execute("SELECT fts_rowid, content_hash FROM indexed_articles WHERE dhq_article_id = ?", (article_id,)).fetchone()
+            if existing is not None:
+                if existing['content_hash'] == content_hash:
+                    continue
+                conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (existing['fts_rowid'],))
+            cursor = conn.execute("INSERT INTO articles_fts (dhq_article_id, title, dhq_abstract, body_text) VALUES (?, ?, ?, ?)", (article_id, *texts))
+            conn.execute("INSERT OR REPLACE INTO indexed_articles (dhq_article_id, fts_rowid, content_hash) VALUES (?, ?, ?)", (article_id, cursor.lastrowid, content_hash))
+            updated += 1
+    return updated
+
+def remove_articles(conn: sqlite3.Connection, article_ids: Iterable[str]) -> None:
+    """
+    Function to remove articles from the search index
+    Args:
+        conn (sqlite3.Connection): Connection to the search index
+        article_ids (Iterable[str]): DHQ article ids to remove
+    """
+    with conn:
+        for article_id in article_ids:
+            existing = conn.execute("SELECT fts_rowid FROM indexed_articles WHERE dhq_article_id = ?", (article_id,)).fetchone()
+            if existing is None:
+                continue
+            conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (existing['fts_rowid'],))
+            conn.execute("DELETE FROM indexed_articles WHERE dhq_article_id = ?", (article_id,))
+
+def export_search_index(df: pd.DataFrame, db_path: Optional[str] = None) -> None:
+    """
+    Function to bring the search index in line with the processed dataset: changed articles are reindexed
+    and articles that are no longer in the dataset are removed.
+    Args:
+        df (pd.DataFrame): Processed dataset
+        db_path (Optional[str]): Path to the SQLite database, data_path(SEARCH_INDEX_NAME) if None
+    """
+    conn = connect(db_path)
+    try:
+        columns = ['DHQarticle-id'] + [column for column in SEARCH_COLUMNS if column in df.columns]
+        records = df[columns].to_dict('records')
+        updated = index_articles(conn, records)
+        current_ids = {_text(record['DHQarticle-id']) for record in records}
+        stale_ids = [row['dhq_article_id'] for row in conn.execute("SELECT dhq_article_id FROM indexed_articles") if row['dhq_article_id'] not in current_ids]
+        remove_articles(conn, stale_ids)
+        if updated or stale_ids:
+            with conn:
+                conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+        print(f"Search index: {updated} articles added or updated, {len(stale_ids)} removed")
+    finally:
+        conn.close()
+
+def _quote_query(query: str) -> str:
+    """
+    Function to turn free text into an FTS5 query matching all of its words, for queries that are not valid FTS5 syntax
+    Args:
+        query (str): Free text query
+    Returns:
+        str: FTS5 query with each word quoted
+    """
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 10) -> List[dict]:
+    """
+    Function to search the title, abstract and body of the articles, ranked by BM25.
+    The query uses the FTS5 syntax (e.g. `"digital archive" NOT museum`, `title:network*`),
+    and falls back to matching all of its words when it is not valid FTS5 syntax.
+    Args:
+        conn (sqlite3.Connection): Connection to the search index
+        query (str): Search query
+        limit (int): Maximum number of hits
+    Returns:
+        List[dict]: Hits with the article id, title, score (lower is better) and a snippet of the body
+    """
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    # Ordering by the built-in rank column lets FTS5 sort the hits itself, so snippets are only built for the returned hits
+    sql = ("SELECT dhq_article_id, title, rank AS score, snippet(articles_fts, 3, '[', ']', '...', 16) AS snippet "
+           f"FROM articles_fts WHERE articles_fts MATCH ? AND rank MATCH 'bm25(0, {weights})' ORDER BY rank LIMIT ?")
+    try:
+        rows = conn.execute(sql, (query, limit)).fetchall()
+    except sqlite3.OperationalError:
+        rows = conn.execute(sql, (_quote_query(query), limit)).fetchall()
+    return [dict(row) for row in rows]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index of the DHQ articles")
+    parser.add_argument("query", nargs="?", help="Search query, in FTS5 syntax")
+    parser.add_argument("--build", nargs="?", const=data_file("processed_dhq_data"), metavar="DATASET", help="Build or update the index from the processed dataset")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of hits")
+    parser.add_argument("--index", help="Path to the search index, dhq_search.sqlite under the data root by default")
+    args = parser.parse_args()
+
+    if args.build:
+        export_search_index(read_table(args.build, columns=['DHQarticle-id'] + SEARCH_COLUMNS), args.index)
+    if args.query:
+        conn = connect(args.index)
+        start = time.perf_counter()
+        hits = search(conn, args.query, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['dhq_article_id']}  {hit['score']:.2f}  {hit['title']}\n    {hit['snippet']}")
+        print(f"{len(hits)} hits in {elapsed_ms:.1f} ms")
+        conn.close()
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import pandas as pd
+from typing import Iterable, List, Optional
+from storage import data_file, data_path, read_table
+
+# File of the catalog under the data root
+CATALOG_NAME: str = "dhq_catalog.sqlite"
+
+# Columns of the processed dataset loaded into the catalog (everything but the body text)
+CATALOG_COLUMNS: List[str] = [
+    'DHQarticle-id', 'volume', 'issue', 'articleType', 'date_when', 'date_processed', 'language_ident', 'title',
+    'dhq_abstract', 'dhq_keywords', 'authors', 'file_name', 'article_link', 'issue_title', 'scraped_editors',
+    'issue_text', 'issue_link',
+]
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS issues (
+    issue_id INTEGER PRIMARY KEY,
+    volume TEXT NOT NULL,
+    issue TEXT NOT NULL,
+    issue_title TEXT,
+    issue_text TEXT,
+    issue_link TEXT,
+    editors TEXT,
+    UNIQUE (volume, issue)
+);
+CREATE TABLE IF NOT EXISTS articles (
+    article_id INTEGER PRIMARY KEY,
+    dhq_article_id TEXT NOT NULL UNIQUE,
+    issue_id INTEGER REFERENCES issues (issue_id),
+    volume TEXT,
+    issue TEXT,
+    article_type TEXT,
+    date_when TEXT,
+    date_processed TEXT,
+    language_ident TEXT,
+    title TEXT,
+    dhq_abstract TEXT,
+    article_link TEXT,
+    file_name TEXT,
+    record_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS authors (
+    author_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS article_authors (
+    article_id INTEGER NOT NULL REFERENCES articles (article_id) ON DELETE CASCADE,
+    author_id INTEGER NOT NULL REFERENCES authors (author_id),
+    position INTEGER NOT NULL,
+    affiliation TEXT,
+    email TEXT,
+    bio TEXT,
+    PRIMARY KEY (article_id, position)
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    keyword_id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS article_keywords (
+    article_id INTEGER NOT NULL REFERENCES articles (article_id) ON DELETE CASCADE,
+    keyword_id INTEGER NOT NULL REFERENCES keywords (keyword_id),
+    PRIMARY KEY (article_id, keyword_id)
+);
+CREATE INDEX IF NOT EXISTS articles_volume_issue ON articles (volume, issue);
+CREATE INDEX IF NOT EXISTS articles_date ON articles (date_processed);
+CREATE INDEX IF NOT EXISTS article_authors_author ON article_authors (author_id);
+CREATE INDEX IF NOT EXISTS article_keywords_keyword ON article_keywords (keyword_id);
+"""
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Function to open the catalog, creating its tables and indexes if needed
+    Args:
+        db_path (Optional[str]): Path to the SQLite database, data_path(CATALOG_NAME) if None
+    Returns:
+        sqlite3.Connection: Connection to the catalog
+    """
+    conn = sqlite3.connect(db_path or data_path(CATALOG_NAME))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _clean(value) -> Optional[str]:
+    """
+    Function to turn a dataset value into a value SQLite can store, with missing values as NULL
+    Args:
+        value: Value of a dataset cell
+    Returns:
+        Optional[str]: The value as a string, None if it is missing
+    """
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    return str(value)
+
+def _split_keywords(value) -> List[str]:
+    """
+    Function to split the keywords field into individual keywords
+    Args:
+        value: Value of the 'dhq_keywords' column
+    Returns:
+        List[str]: The keywords
+    """
+    value = _clean(value)
+    if value is None:
+        return []
+    return [keyword.strip() for keyword in re.split(r'[;,]', value) if keyword.strip()]
+
+def _record_hash(record: dict) -> str:
+    """
+    Function to fingerprint a record so that unchanged articles are skipped on incremental updates
+    Args:
+        record (dict): Article record
+    Returns:
+        str: SHA-256 of the record
+    """
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _get_or_create(conn: sqlite3.Connection, table: str, column: str, value: str) -> int:
+    """
+    Function to get the id of a row of a lookup table (authors, keywords), inserting it if needed
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+        table (str): Name of the table
+        column (str): Name of the unique column
+        value (str): Value to look up
+    Returns:
+        int: Id of the row
+    """
+    conn.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+    return conn.execute(f"SELECT rowid FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+
+def _remove_orphans(conn: sqlite3.Connection) -> None:
+    """
+    Function to drop the authors and keywords no article refers to anymore, e.g. after an article was updated or removed.
+    Must be called within a transaction.
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+    """
+    conn.execute("DELETE FROM authors WHERE author_id NOT IN (SELECT author_id FROM article_authors)")
+    conn.execute("DELETE FROM keywords WHERE keyword_id NOT IN (SELECT keyword_id FROM article_keywords)")
+
+def upsert_articles(conn: sqlite3.Connection, records: Iterable[dict]) -> int:
+    """
+    Function to insert or update articles in the catalog. Articles whose record did not change are skipped,
+    and the authors and keywords the updated articles no longer refer to are dropped.
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+        records (Iterable[dict]): Article records with the columns of the processed dataset
+    Returns:
+        int: Number of articles inserted or updated
+    """
+    updated = 0
+    with conn:
+        for record in records:
+            record = {column: record.get(column) for column in CATALOG_COLUMNS}
+            article_id = _clean(record['DHQarticle-id'])
+            if article_id is None:
+                continue
+            record_hash = _record_hash(record)
+            existing = conn.execute("SELECT record_hash FROM articles WHERE dhq_article_id = ?", (article_id,)).fetchone()
+            if (existing is not None) and (existing['record_hash'] == record_hash):
+                continue
+
+            # Issue of the article
+            issue_id = None
+            volume, issue = _clean(record['volume']), _clean(record['issue'])
+            if (volume is not None) and (issue is not None):
+                conn.execute(
+                    "INSERT INTO issues (volume, issue, issue_title, issue_text, issue_link, editors) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (volume, issue) DO UPDATE SET issue_title = COALESCE(excluded.issue_title, issue_title), "
+                    "issue_text = COALESCE(excluded.issue_text, issue_text), issue_link = COALESCE(excluded.issue_link, issue_link), "
+                    "editors = COALESCE(excluded.editors, editors)",
+                    (volume, issue, _clean(record['issue_title']), _clean(record['issue_text']), _clean(record['issue_link']), _clean(record['scraped_editors'])))
+                issue_id = conn.execute("SELECT issue_id FROM issues WHERE volume = ? AND issue = ?", (volume, issue)).fetchone()[0]
+
+            # Replace the article and its author and keyword links
+            conn.execute("DELETE FROM articles WHERE dhq_article_id = ?", (article_id,))
+            cursor = conn.execute(
+                "INSERT INTO articles (dhq_article_id, issue_id, volume, issue, article_type, date_when, date_processed, language_ident, "
+                "title, dhq_abstract, article_link, file_name, record_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (article_id, issue_id, volume, issue, _clean(record['articleType']), _clean(record['date_when']),
+                 _clean(record['date_processed']), _clean(record['language_ident']), _clean(record['title']),
+                 _clean(record['dhq_abstract']), _clean(record['article_link']), _clean(record['file_name']), record_hash))
+            article_key = cursor.lastrowid
+
+            authors = record['authors'] if isinstance(record['authors'], list) else []
+            for position, author in enumerate(authors):
+                name = _clean(author.get('author_name'))
+                if name is None:
+                    continue
+                conn.execute(
+                    "INSERT INTO article_authors (article_id, author_id, position, affiliation, email, bio) VALUES (?, ?, ?, ?, ?, ?)",
+                    (article_key, _get_or_create(conn, 'authors', 'name', name), position,
+                     _clean(author.get('affiliation')), _clean(author.get('email')), _clean(author.get('bio'))))
+            for keyword in dict.fromkeys(_split_keywords(record['dhq_keywords'])):
+                conn.execute("INSERT INTO article_keywords (article_id, keyword_id) VALUES (?, ?)",
+                             (article_key, _get_or_create(conn, 'keywords', 'keyword', keyword)))
+            updated += 1
+        if updated > 0:
+            _remove_orphans(conn)
+    return updated
+
+def remove_articles(conn: sqlite3.Connection, article_ids: Iterable[str]) -> None:
+    """
+    Function to remove articles from the catalog
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+        article_ids (Iterable[str]): DHQ article ids to remove
+    """
+    with conn:
+        conn.executemany("DELETE FROM articles WHERE dhq_article_id = ?", [(article_id,) for article_id in article_ids])
+        _remove_orphans(conn)
+
+def export_catalog(df: pd.DataFrame, db_path: Optional[str] = None) -> None:
+    """
+    Function to bring the catalog in line with the processed dataset: changed articles are updated
+    and articles that are no longer in the dataset are removed.
+    Args:
+        df (pd.DataFrame): Processed dataset (the body text is not needed)
+        db_path (Optional[str]): Path to the SQLite database, data_path(CATALOG_NAME) if None
+    """
+    conn = connect(db_path)
+    try:
+        records = df.to_dict('records')
+        updated = upsert_articles(conn, records)
+        current_ids = {_clean(record.get('DHQarticle-id')) for record in records}
+        stale_ids = [row['dhq_article_id'] for row in conn.execute("SELECT dhq_article_id FROM articles") if row['dhq_article_id'] not in current_ids]
+        remove_articles(conn, stale_ids)
+        print(f"Catalog: {updated} articles added or updated, {len(stale_ids)} removed")
+    finally:
+        conn.close()
+
+def articles_by_author(conn: sqlite3.Connection, author_name: str) -> List[sqlite3.Row]:
+    """
+    Function to get the articles of an author
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+        author_name (str): Full name of the author
+    Returns:
+        List[sqlite3.Row]: The articles, most recent first
+    """
+    return conn.execute(
+        "SELECT articles.* FROM articles JOIN article_authors USING (article_id) JOIN authors USING (author_id) "
+        "WHERE authors.name = ? ORDER BY articles.date_processed DESC", (author_name,)).fetchall()
+
+def articles_in_issue(conn: sqlite3.Connection, volume: str, issue: str) -> List[sqlite3.Row]:
+    """
+    Function to get the articles of an issue
+    Args:
+        conn (sqlite3.Connection): Connection to the catalog
+        volume (str): Volume, zero-padded as in the dataset (e.g. '012')
+        issue (str): Issue number
+    Returns:
+        List[sqlite3.Row]: The articles, ordered by article id
+    """
+    return conn.execute("SELECT * FROM articles WHERE volume = ? AND issue = ? ORDER BY dhq_article_id", (volume, issue)).fetchall()
+
+if __name__ == "__main__":
+    # Build or update the catalog from the processed dataset, without loading the body text
+    dataset_path = sys.argv[1] if len(sys.argv) > 1 else data_file("processed_dhq_data")
+    export_catalog(read_table(dataset_path, columns=CATALOG_COLUMNS))
@@ -0,0 +1,383 @@
+import ast
+import os
+from abc import ABC, abstractmethod
+import pandas as pd
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Format of the dataset files written by the pipeline, set DHQ_DATA_FORMAT=parquet to store them as Parquet
+DATA_FORMAT: str = os.environ.get("DHQ_DATA_FORMAT", "csv")
+# Directory of the data files, set DHQ_DATA_ROOT or call set_data_root to keep them elsewhere
+DATA_ROOT: str = os.environ.get("DHQ_DATA_ROOT", "../data")
+
+# Columns that hold zero-padded identifiers and must never be parsed as numbers
+STRING_COLUMNS: List[str] = ['DHQarticle-id', 'volume', 'issue']
+
+# Columns that hold lists of dictionaries, stringified in CSV files
+NESTED_COLUMNS: List[str] = ['authors']
+
+# Keys of the dictionaries of the nested columns, so that tables written in batches have the same Arrow schema throughout
+NESTED_FIELDS: Dict[str, List[str]] = {'authors': ['author_name', 'affiliation', 'email', 'bio']}
+
+class DatasetStore(ABC):
+    """
+    Interface of a storage backend for the dataset tables. Writes are atomic: the table is written to a
+    temporary file which then replaces the destination, so readers never see a partially written file.
+    Backends implement read, _write and _write_batch, and cannot be instantiated otherwise.
+    """
+    extension: str = ""
+
+    @abstractmethod
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Function to read a table
+        Args:
+            path (str): Path to the file
+            columns (Optional[List[str]]): Columns to load, all columns if None
+        Returns:
+            pd.DataFrame: The table
+        """
+
+    @abstractmethod
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        """
+        Function to write a whole table to a file, which write then moves to its destination
+        Args:
+            df (pd.DataFrame): The table
+            path (str): Path to the file
+        """
+
+    def write(self, df: pd.DataFrame, path: str) -> None:
+        """
+        Function to atomically write a table
+        Args:
+            df (pd.DataFrame): The table
+            path (str): Path to the file
+        """
+        tmp_path = f"{path}.tmp"
+        self._write(df, tmp_path)
+        os.replace(tmp_path, path)
+
+    def writer(self, path: str, columns: Optional[List[str]] = None) -> "TableWriter":
+        """
+        Function to open a writer adding a table batch by batch, e.g. while records are extracted
+        Args:
+            path (str): Path to the file
+            columns (Optional[List[str]]): Columns of the table, those of the first batch if None
+        Returns:
+            TableWriter: The writer
+        """
+        return TableWriter(self, path, columns)
+
+    @abstractmethod
+    def _write_batch(self, df: pd.DataFrame, path: str, state):
+        """
+        Function to add a batch to a file being written
+        Args:
+            df (pd.DataFrame): The batch
+            path (str): Path to the file
+            state: State returned for the previous batch, None for the first batch
+        Returns:
+            The state of the file being written
+        """
+
+    def _finish(self, state) -> None:
+        """
+        Function to finish a file written in batches
+        Args:
+            state: State returned for the last batch
+        """
+
+class TableWriter:
+    """
+    Writer adding a table batch by batch to a temporary file, which replaces the destination when the writer is closed,
+    so that only one batch is in memory at a time and readers never see a partial table. Used as a context manager,
+    the table is kept if the block succeeds and discarded otherwise.
+    """
+    def __init__(self, store: DatasetStore, path: str, columns: Optional[List[str]] = None):
+        self.store = store
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.columns = list(columns) if columns is not None else None
+        self.rows = 0
+        self._state = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Function to add a batch to the table
+        Args:
+            df (pd.DataFrame): The batch, its columns are aligned on those of the table
+        """
+        if self.columns is None:
+            self.columns = list(df.columns)
+        self._state = self.store._write_batch(df.reindex(columns=self.columns), self.tmp_path, self._state)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        """
+        Function to finish the table and move it to its destination
+        """
+        if self._state is None:
+            self.store._write(pd.DataFrame(columns=self.columns or []), self.tmp_path)
+        else:
+            self.store._finish(self._state)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        """
+        Function to discard the table
+        """
+        if self._state is not None:
+            self.store._finish(self._state)
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class CSVStore(DatasetStore):
+    """
+    CSV backend. Identifier columns are read back as strings and the nested author lists are parsed back from their string form.
+    """
+    extension = ".csv"
+
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if columns is not None:
+            header = pd.read_csv(path, nrows=0).columns
+            columns = [column for column in columns if column in header]
+        df = pd.read_csv(path, usecols=columns, dtype={column: str for column in STRING_COLUMNS})
+        for column in NESTED_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].apply(lambda value: ast.literal_eval(value) if isinstance(value, str) and value.startswith('[') else value)
+        return df
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        df.to_csv(path, index=False)
+
+    def _write_batch(self, df: pd.DataFrame, path: str, state) -> bool:
+        df.to_csv(path, mode='w' if state is None else 'a', header=state is None, index=False)
+        return True
+
+class ArrowStore(DatasetStore):
+    """
+    Base of the Arrow-based backends, which keep column types, including the nested author structs.
+    """
+    def __init__(self):
+        if pa is None:
+            raise ImportError("pyarrow is required to store the dataset as Parquet or Arrow, install it with `pip install pyarrow`")
+
+    def _to_table(self, df: pd.DataFrame, schema: Optional["pa.Schema"] = None) -> "pa.Table":
+        """
+        Function to convert a DataFrame to an Arrow table. Flat object columns that mix types
+        (e.g. an identifier read as a number in one file and a string in another) are stored as strings.
+        Args:
+            df (pd.DataFrame): The table
+            schema (Optional[pa.Schema]): Schema of the table, inferred from the values if None
+        Returns:
+            pa.Table: The Arrow table
+        """
+        df = df.copy()
+        if schema is not None:
+            # Conform the batch to the schema of the first one: categoricals as their values, columns without any value as nulls of any type
+            for column in schema.names:
+                if isinstance(df[column].dtype, pd.CategoricalDtype):
+                    df[column] = df[column].astype(object)
+                if df[column].isna().all():
+                    df[column] = pd.Series(None, index=df.index, dtype=object)
+        for column in df.columns:
+            if df[column].dtype != object:
+                continue
+            values = df[column].dropna()
+            if (len(values) > 0) and isinstance(values.iloc[0], (list, dict)):
+                continue
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    def _batch_schema(self, df: pd.DataFrame) -> "pa.Schema":
+        """
+        Function to get the schema of a table written in batches from its first batch: columns without any value
+        in the first batch are strings, categoricals are stored as their values, and nested columns are lists of structs with every known key
+        Args:
+            df (pd.DataFrame): The first batch
+        Returns:
+            pa.Schema: The schema
+        """
+        fields = []
+        for field in self._to_table(df).schema:
+            if field.name in NESTED_FIELDS:
+                field = field.with_type(pa.list_(pa.struct([(key, pa.string()) for key in NESTED_FIELDS[field.name]])))
+            elif pa.types.is_dictionary(field.type):
+                # Categoricals are stored as their values, which later batches may hold as plain strings
+                field = field.with_type(field.type.value_type)
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    @abstractmethod
+    def _open_batch_writer(self, path: str, schema: "pa.Schema"):
+        """
+        Function to open the Arrow writer of a file written in batches
+        Args:
+            path (str): Path to the file
+            schema (pa.Schema): Schema of the table
+        Returns:
+            The writer, closed by _finish
+        """
+
+    def _write_batch(self, df: pd.DataFrame, path: str, state):
+        if state is None:
+            schema = self._batch_schema(df)
+            state = (self._open_batch_writer(path, schema), schema)
+        writer, schema = state
+        writer.write_table(self._to_table(df, schema))
+        return state
+
+    def _finish(self, state) -> None:
+        state[0].close()
+
+    def _from_table(self, table: "pa.Table") -> pd.DataFrame:
+        """
+        Function to convert an Arrow table back to a DataFrame, turning nested struct lists into lists of dictionaries
+        without the keys that were absent from the original dictionaries.
+        Args:
+            table (pa.Table): The Arrow table
+        Returns:
+            pd.DataFrame: The table
+        """
+        df = table.to_pandas()
+        for field in table.schema:
+            if pa.types.is_list(field.type) and pa.types.is_struct(field.type.value_type):
+                df[field.name] = df[field.name].apply(lambda items: [{key: value for key, value in item.items() if value is not None} for item in items] if items is not None else None)
+        return df
+
+class ParquetStore(ArrowStore):
+    """
+    Parquet backend. Supports column projection, so readers of the metadata never load `body_text`.
+    """
+    extension = ".parquet"
+
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if columns is not None:
+            schema_columns = pq.read_schema(path).names
+            columns = [column for column in columns if column in schema_columns]
+        return self._from_table(pq.read_table(path, columns=columns))
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        pq.write_table(self._to_table(df), path, compression='zstd')
+
+    def _open_batch_writer(self, path: str, schema: "pa.Schema") -> "pq.ParquetWriter":
+        # Each batch is a row group
+        return pq.ParquetWriter(path, schema, compression='zstd')
+
+class ArrowIPCStore(ArrowStore):
+    """
+    Arrow IPC (Feather v2) backend. Faster to load than Parquet at the cost of larger files.
+    """
+    extension = ".arrow"
+
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if columns is not None:
+            with pa.memory_map(path) as source:
+                schema_columns = pa.ipc.open_file(source).schema.names
+            columns = [column for column in columns if column in schema_columns]
+        return self._from_table(feather.read_table(path, columns=columns, memory_map=True))
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        feather.write_feather(self._to_table(df), path, compression='lz4')
+
+    def _open_batch_writer(self, path: str, schema: "pa.Schema") -> "pa.ipc.RecordBatchFileWriter":
+        return pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+
+STORES: Dict[str, type] = {
+    'csv': CSVStore,
+    'parquet': ParquetStore,
+    'arrow': ArrowIPCStore,
+}
+
+def get_store(path: str) -> DatasetStore:
+    """
+    Function to get the storage backend of a file from its extension
+    Args:
+        path (str): Path to the file
+    Returns:
+        DatasetStore: The backend
+    """
+    extension = os.path.splitext(path)[1].lstrip('.')
+    if extension not in STORES:
+        raise ValueError(f"No storage backend for '{path}', expected one of {', '.join(STORES)}")
+    return STORES[extension]()
+
+def open_table_writer(path: str, columns: Optional[List[str]] = None) -> TableWriter:
+    """
+    Function to open a writer adding a dataset table batch by batch, with the backend matching its extension
+    Args:
+        path (str): Path to the file
+        columns (Optional[List[str]]): Columns of the table, those of the first batch if None
+    Returns:
+        TableWriter: The writer, to use as a context manager
+    """
+    return get_store(path).writer(path, columns)
+
+def set_data_root(data_root: str) -> None:
+    """
+    Function to change the directory of the data files for the rest of the run
+    Args:
+        data_root (str): Directory of the data files
+    """
+    global DATA_ROOT
+    DATA_ROOT = data_root
+
+def data_path(*parts: str) -> str:
+    """
+    Function to get the path of a file or directory under the data root, e.g. data_path("dhq-journal", "articles")
+    Args:
+        parts (str): Path components relative to the data root
+    Returns:
+        str: Path under the data root
+    """
+    return os.path.join(DATA_ROOT, *parts)
+
+def data_file(name: str, data_format: Optional[str] = None, data_root: Optional[str] = None) -> str:
+    """
+    Function to get the path of a dataset table in the configured format, e.g. data_file("initial_dhq_data")
+    Args:
+        name (str): Name of the table, without extension
+        data_format (Optional[str]): Format of the file, DATA_FORMAT if None
+        data_root (Optional[str]): Directory of the dataset, DATA_ROOT if None
+    Returns:
+        str: Path to the file
+    """
+    return os.path.join(data_root or DATA_ROOT, f"{name}.{data_format or DATA_FORMAT}")
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Function to read a dataset table with the backend matching its extension
+    Args:
+        path (str): Path to the file
+        columns (Optional[List[str]]): Columns to load, all columns if None
+    Returns:
+        pd.DataFrame: The table
+    """
+    return get_store(path).read(path, columns)
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Function to atomically write a dataset table with the backend matching its extension
+    Args:
+        df (pd.DataFrame): The table
+        path (str): Path to the file
+    """
+    get_store(path).write(df, path)
@@ -0,0 +1,617 @@
+import html
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from typing import List, Optional, Tuple
+
+# Vocabulary of the generated text
+WORDS: List[str] = (
+    "digital humanities text corpus archive edition encoding markup analysis reading network model data "
+    "history literature language culture media visualization method theory scholarship museum library "
+    "computational interpretation narrative poetry novel author reader collection metadata infrastructure "
+    "the of and to in a is that for as with on by this are be from which it an not or at their"
+).split()
+
+ISSUES_PER_VOLUME: int = 4
+
+TEI_TEMPLATE: str = """<?xml version="1.0" encoding="UTF-8"?>
+<?oxygen RNGSchema="../../common/schema/DHQauthor-TEI.rng" type="xml"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0" xmlns:cc="http://web.resource.org/cc/" xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:dhq="http://www.digitalhumanities.org/ns/dhq">
+    <teiHeader>
+        <fileDesc>
+            <titleStmt>
+                <title type="article" xml:lang="en">{title}</title>
+{authors}
+            </titleStmt>
+            <publicationStmt>
+                <publisher>Alliance of Digital Humanities Organizations</publisher>
+                <publisher>Association for Computers and the Humanities</publisher>
+                <idno type="DHQarticle-id">{article_id}</idno>
+                <idno type="volume">{volume:03d}</idno>
+                <idno type="issue">{issue}</idno>
+                <date when="{date_iso}">{date_text}</date>
+                <dhq:articleType>article</dhq:articleType>
+                <availability status="CC-BY-ND"><cc:License rdf:about="http://creativecommons.org/licenses/by-nd/2.5/"/></availability>
+            </publicationStmt>
+            <sourceDesc><p>This is the source</p></sourceDesc>
+        </fileDesc>
+        <encodingDesc>
+            <classDecl>
+                <taxonomy xml:id="dhq_keywords"><bibl>DHQ classification scheme; full list available at http://www.digitalhumanities.org/dhq/taxonomy.xml</bibl></taxonomy>
+                <taxonomy xml:id="authorial_keywords"><bibl>Keywords supplied by author; no controlled vocabulary</bibl></taxonomy>
+            </classDecl>
+        </encodingDesc>
+        <profileDesc>
+            <langUsage><language ident="en" extent="original"/></langUsage>
+            <textClass><keywords scheme="#dhq_keywords"><list type="simple"><item/></list></keywords></textClass>
+        </profileDesc>
+        <revisionDesc><change>The version history for this file can be found on GitHub</change></revisionDesc>
+    </teiHeader>
+    <text xml:lang="en" type="original">
+        <front>
+            <dhq:abstract><p>{abstract}</p></dhq:abstract>
+            <dhq:teaser><p>{teaser}</p></dhq:teaser>
+        </front>
+        <body>
+{body}
+        </body>
+        <back>
+            <listBibl>
+{bibliography}
+            </listBibl>
+        </back>
+    </text>
+</TEI>
+"""
+
+AUTHOR_TEMPLATE: str = """                <dhq:authorInfo>
+                    <dhq:author_name>{first} <dhq:family>{family}</dhq:family></dhq:author_name>
+                    <idno type="ORCID">https://orcid.org/0000-0000-0000-{orcid:04d}</idno>
+                    <dhq:affiliation>{affiliation}</dhq:affiliation>
+                    <email>{email}</email>
+                    <dhq:bio><p>{bio}</p></dhq:bio>
+                </dhq:authorInfo>"""
+
+MONTHS: List[str] = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+class SyntheticCorpus:
+    """
+    Deterministic synthetic DHQ corpus: TEI files shaped like the articles of the DHQ repository, and the HTML of the
+    website (home page, issue tables of contents, article pages) listing the same articles. Every article is generated
+    from its index and the seed, so pages and files can be produced on demand at any scale.
+    The most recent `missing_fraction` of the articles only exist on the website, and `unlisted_fraction` of the articles
+    are left out of the tables of contents, so that downloading missing articles and resolving article links are exercised.
+    """
+    def __init__(self, n_articles: int, articles_per_issue: int = 15, mean_words: int = 3000, missing_fraction: float = 0.05, unlisted_fraction: float = 0.05, seed: int = 0):
+        self.n_articles = n_articles
+        self.articles_per_issue = articles_per_issue
+        self.mean_words = mean_words
+        self.seed = seed
+        self.n_missing = math.ceil(n_articles * missing_fraction)
+        self.unlisted_every = round(1 / unlisted_fraction) if unlisted_fraction > 0 else 0
+        self._issues = list(dict.fromkeys(self.volume_issue(index) for index in range(n_articles)))
+        self._issue_set = set(self._issues)
+
+    def article_id(self, index: int) -> str:
+        """
+        Function to get the DHQ article id of an article
+        Args:
+            index (int): Index of the article
+        Returns:
+            str: Zero-padded article id
+        """
+        return f"{index + 1:06d}"
+
+    def volume_issue(self, index: int) -> Tuple[int, int]:
+        """
+        Function to get the volume and issue of an article
+        Args:
+            index (int): Index of the article
+        Returns:
+            Tuple[int, int]: Volume and issue numbers
+        """
+        issue_index = index // self.articles_per_issue
+        return issue_index // ISSUES_PER_VOLUME + 1, issue_index % ISSUES_PER_VOLUME + 1
+
+    def issues(self) -> List[Tuple[int, int]]:
+        """
+        Function to list the issues of the corpus
+        Returns:
+            List[Tuple[int, int]]: Volume and issue numbers, oldest first
+        """
+        return self._issues
+
+    def has_issue(self, volume: int, issue: int) -> bool:
+        """
+        Function to check whether an issue exists
+        Args:
+            volume (int): Volume number
+            issue (int): Issue number
+        Returns:
+            bool: True if the corpus has the issue
+        """
+        return (volume, issue) in self._issue_set
+
+    def issue_articles(self, volume: int, issue: int) -> List[int]:
+        """
+        Function to list the articles of an issue
+        Args:
+            volume (int): Volume number
+            issue (int): Issue number
+        Returns:
+            List[int]: Indexes of the articles
+        """
+        first = ((volume - 1) * ISSUES_PER_VOLUME + issue - 1) * self.articles_per_issue
+        return list(range(first, min(first + self.articles_per_issue, self.n_articles)))
+
+    def is_in_repository(self, index: int) -> bool:
+        """
+        Function to check whether an article has a TEI file in the repository, the most recent ones only being on the website
+        Args:
+            index (int): Index of the article
+        Returns:
+            bool: True if the article is in the repository
+        """
+        return index < self.n_articles - self.n_missing
+
+    def is_listed(self, index: int) -> bool:
+        """
+        Function to check whether an article is listed in the table of contents of its issue
+        Args:
+            index (int): Index of the article
+        Returns:
+            bool: True if the article is listed
+        """
+        return (self.unlisted_every == 0) or (index % self.unlisted_every != self.unlisted_every - 1)
+
+    def _rng(self, index: int) -> random.Random:
+        """
+        Function to get the random generator of an article, seeded from its index
+        Args:
+            index (int): Index of the article
+        Returns:
+            random.Random: The generator
+        """
+        return random.Random(self.seed * 1_000_003 + index)
+
+    def _words(self, rng: random.Random, n: int) -> str:
+        """
+        Function to generate random text
+        Args:
+            rng (random.Random): Random generator
+            n (int): Number of words
+        Returns:
+            str: The text
+        """
+        return " ".join(rng.choices(WORDS, k=n))
+
+    def _article(self, index: int) -> dict:
+        """
+        Function to generate the metadata of an article
+        Args:
+            index (int): Index of the article
+        Returns:
+            dict: Title, authors, date, abstract and body length of the article
+        """
+        rng = self._rng(index)
+        volume, issue = self.volume_issue(index)
+        year = 2006 + volume
+        month = (issue - 1) * 3 + 1
+        authors = []
+        for _ in range(rng.choice([1, 1, 2, 2, 3])):
+            family = rng.choice(["Smith", "Garcia", "Nguyen", "Müller", "Rossi", "Kowalski", "Tanaka", "Okafor"]) + str(rng.randrange(1000))
+            authors.append({
+                'first': rng.choice(["Ada", "Ben", "Chloé", "Dev", "Eva", "Femi", "Gus", "Hana"]),
+                'family': family,
+                'affiliation': f"University of {rng.choice(['Leeds', 'Toronto', 'Sydney', 'Utrecht', 'Kyoto'])}",
+                'email': f"{family.lower()}@example.org",
+                'bio': self._words(rng, 30),
+            })
+        return {
+            'article_id': self.article_id(index),
+            'volume': volume,
+            'issue': issue,
+            'title': self._words(rng, rng.randint(4, 10)).capitalize(),
+            'authors': authors,
+            'date_iso': f"{year}-{month:02d}-01",
+            'date_text': f"1 {MONTHS[month - 1]} {year}",
+            'abstract': self._words(rng, rng.randint(80, 200)),
+            'words': max(200, int(rng.lognormvariate(math.log(self.mean_words), 0.5))),
+            'rng': rng,
+        }
+
+    def article_tei(self, index: int) -> str:
+        """
+        Function to generate the TEI file of an article
+        Args:
+            index (int): Index of the article
+        Returns:
+            str: The XML document
+        """
+        article = self._article(index)
+        rng = article['rng']
+        paragraphs = []
+        remaining = article['words']
+        section = 0
+        while remaining > 0:
+            section += 1
+            paras = []
+            for _ in range(rng.randint(2, 6)):
+                n = min(remaining, rng.randint(60, 200))
+                remaining -= n
+                words = self._words(rng, n).split()
+                # Inline markup as in DHQ articles
+                words[0] = f'<hi rend="italic">{words[0]}</hi>'
+                if len(words) > 10:
+                    words[5] = f'<ref target="#ref{section}">{words[5]}</ref>'
+                    words[9] = f'<quote rend="inline">{words[9]}</quote>'
+                paras.append(f"                <p>{' '.join(words)}<note>{self._words(rng, 12)}</note></p>")
+                if remaining <= 0:
+                    break
+            paragraphs.append(f'            <div>\n                <head>{self._words(rng, 3)}</head>\n' + "\n".join(paras) + "\n            </div>")
+        bibliography = "\n".join(f'                <bibl label="Ref {n}" xml:id="ref{n}">{self._words(rng, 15)}</bibl>' for n in range(1, section + 1))
+        authors = "\n".join(AUTHOR_TEMPLATE.format(orcid=rng.randrange(10000), **author) for author in article['authors'])
+        title_words = article['title'].split(' ', 1)
+        title = f'{title_words[0]} <title rend="quotes">{title_words[1] if len(title_words) > 1 else title_words[0]}</title> study'
+        return TEI_TEMPLATE.format(title=title, authors=authors, article_id=article['article_id'], volume=article['volume'], issue=article['issue'],
+                                   date_iso=article['date_iso'], date_text=article['date_text'], abstract=article['abstract'],
+                                   teaser=self._words(rng, 20), body="\n".join(paragraphs), bibliography=bibliography)
+
+    def write_repository(self, articles_directory: str) -> int:
+        """
+        Function to write the TEI files of the articles in the repository, laid out as in the DHQ repository (`<id>/<id>.xml`)
+        Args:
+            articles_directory (str): Directory to write the files to
+        Returns:
+            int: Number of files written
+        """
+        written = 0
+        for index in range(self.n_articles):
+            if not self.is_in_repository(index):
+                continue
+            article_id = self.article_id(index)
+            os.makedirs(os.path.join(articles_directory, article_id), exist_ok=True)
+            with open(os.path.join(articles_directory, article_id, f"{article_id}.xml"), 'w', encoding='utf-8') as f:
+                f.write(self.article_tei(index))
+            written += 1
+        return written
+
+    def home_html(self) -> str:
+        """
+        Function to generate the DHQ home page, whose sidebar lists the issues
+        Returns:
+            str: The HTML page
+        """
+        links = ['<a href="/dhq/preview/index.html">Preview</a>']
+        links += [f'<a href="/dhq/vol/{volume}/{issue}/index.html">Issue {volume}.{issue}</a>' for volume, issue in reversed(self.issues())]
+        return ('<html><head><title>DHQ: Digital Humanities Quarterly</title></head><body><div id="main">'
+                '<div id="leftsidenav"><span>Current Issue</span><br/>' + "<br/>".join(links) + '</div>'
+                '<div id="mainContent"><p>Welcome to DHQ</p><a href="/dhq/about/about.html">About</a></div></div></body></html>')
+
+    def issue_html(self, volume: int, issue: int, preview: bool = False) -> str:
+        """
+        Function to generate the table of contents of an issue
+        Args:
+            volume (int): Volume number
+            issue (int): Issue number
+            preview (bool): Flag to title the page as the preview issue
+        Returns:
+            str: The HTML page
+        """
+        entries = []
+        for index in self.issue_articles(volume, issue):
+            if not self.is_listed(index):
+                continue
+            article = self._article(index)
+            authors = "; ".join(f"{author['first']} {author['family']}, {author['affiliation']}" for author in article['authors'])
+            entries.append(f'<div class="articleInfo"><a href="/dhq/vol/{volume}/{issue}/{article["article_id"]}/{article["article_id"]}.html">{html.escape(article["title"])}</a>'
+                           f'<div style="padding-left:1em; margin:0;text-indent:-1em;">{html.escape(authors)}</div>'
+                           f'<span class="viewAbstract">Abstract [en]</span><div class="abstract">{article["abstract"]}</div></div>')
+        title = "Preview" if preview else f"{2006 + volume} {volume}.{issue}"
+        return ('<html><head><title>DHQ</title></head><body><div id="leftsidenav"><a href="/dhq/">Home</a></div>'
+                f'<div id="toc"><h2>{title}</h2><h3>Editors: Ada Editor, Ben Editor</h3>' + "".join(entries) + '</div></body></html>')
+
+    def article_html(self, index: int) -> str:
+        """
+        Function to generate the page of an article, with a link to its XML file
+        Args:
+            index (int): Index of the article
+        Returns:
+            str: The HTML page
+        """
+        article = self._article(index)
+        rng = article['rng']
+        volume, issue, article_id = article['volume'], article['issue'], article['article_id']
+        paragraphs = "".join(f"<p>{self._words(rng, 120)}</p>" for _ in range(max(1, article['words'] // 120)))
+        navigation = "".join(f'<a href="/dhq/vol/{volume}/{issue}/index.html#{n}">Section {n}</a>' for n in range(20))
+        return (f'<html><head><title>DHQ: {html.escape(article["title"])}</title></head><body><div id="leftsidenav">{navigation}</div>'
+                f'<div id="mainContent"><div class="toolbar"><a href="/dhq/vol/{volume}/{issue}/index.html">Issue</a> | '
+                f'<a rel="external" href="/dhq/vol/{volume}/{issue}/{article_id}.xml">XML</a> | <a href="#">Discuss</a></div>'
+                f'<h1 class="articleTitle">{html.escape(article["title"])}</h1>{paragraphs}</div></body></html>')
+
+def synthetic_metadata(n_articles: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Function to generate article metadata shaped like the dataset before cleaning: about 10% duplicated articles,
+    missing dates and partially missing issue data.
+    Args:
+        n_articles (int): Number of distinct articles
+        seed (int): Random seed
+    Returns:
+        pd.DataFrame: The metadata
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.concatenate([np.arange(n_articles), rng.choice(n_articles, n_articles // 10)])
+    n_rows = len(ids)
+    n_issues = max(n_articles // 15, 1)
+    issue_index = ids % n_issues
+    dates = pd.to_datetime('2007-01-01') + pd.to_timedelta(rng.integers(0, 6000, n_rows), unit='D')
+    date_when = pd.Series(dates.strftime('%d %B %Y'), dtype=object).where(rng.random(n_rows) > 0.05, None)
+    df = pd.DataFrame({
+        'DHQarticle-id': [f"{i:06d}" for i in ids],
+        'date_when': date_when,
+        'volume': [f"{i // 4 + 1:03d}" for i in issue_index],
+        'issue': [str(i % 4 + 1) for i in issue_index],
+    })
+    df['date_processed'] = pd.to_datetime(df['date_when'], format='%d %B %Y')
+    for col in ['issue_title', 'scraped_editors', 'issue_text', 'issue_link']:
+        values = pd.Series([f"{col} {i}" for i in issue_index], dtype=object)
+        df[col] = values.where(rng.random(n_rows) > 0.3, None)
+    return df
+
+class SyntheticSite:
+    """
+    Local HTTP server serving the website of a synthetic corpus: the home page, issue tables of contents,
+    article pages and XML files, with the DHQ "Resource Not Found" page (served with a 200) for any other path,
+    except the pages of issues that do not exist, which get a 404.
+    Use `configure_site(site.url, site.url)` from dhq_website_scraper to crawl it.
+    """
+    def __init__(self, corpus: SyntheticCorpus):
+        self.corpus = corpus
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def page(self, path: str) -> Optional[Tuple[str, str]]:
+        """
+        Function to get the page served at a path
+        Args:
+            path (str): Path of the request
+        Returns:
+            Optional[Tuple[str, str]]: Content type and body, None if there is no such page
+        """
+        corpus = self.corpus
+        if path in ("/dhq/", "/dhq/index.html"):
+            return "text/html", corpus.home_html()
+        if path == "/dhq/preview/index.html":
+            volume, issue = corpus.issues()[-1]
+            return "text/html", corpus.issue_html(volume, issue, preview=True)
+        match = re.fullmatch(r"/dhq/vol/(\d+)/(\d+)/(?:index\.html|(\d+)/\3\.html|(\d+)\.xml)", path)
+        if match is None:
+            return None
+        volume, issue = int(match.group(1)), int(match.group(2))
+        if not corpus.has_issue(volume, issue):
+            return None
+        if match.group(3) is None and match.group(4) is None:
+            return "text/html", corpus.issue_html(volume, issue)
+        index = int(match.group(3) or match.group(4)) - 1
+        if (index >= corpus.n_articles) or (corpus.volume_issue(index) != (volume, issue)):
+            return None
+        if match.group(3) is not None:
+            return "text/html", corpus.article_html(index)
+        return "application/xml", corpus.article_tei(index)
+
+    def is_missing_issue(self, path: str) -> bool:
+        """
+        Function to check whether a path is under the directory of an issue that does not exist
+        Args:
+            path (str): Path of the request
+        Returns:
+            bool: True if the path is under /dhq/vol/ and its volume and issue are not in the corpus
+        """
+        match = re.match(r"/dhq/vol/(\d+)/(\d+)/", path)
+        return (match is not None) and not self.corpus.has_issue(int(match.group(1)), int(match.group(2)))
+
+    def _handler(self) -> type:
+        """
+        Function to build the request handler class of the server
+        Returns:
+            type: The handler class
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path.split('#')[0]
+                page = site.page(path)
+                content_type, body = page if page is not None else ("text/html", "<html><body><h1>Resource Not Found</h1></body></html>")
+                data = body.encode('utf-8')
+                self.send_response(404 if site.is_missing_issue(path) else 200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        """
+        URL of the running server
+        """
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "SyntheticSite":
+        """
+        Function to start serving on a free local port in a background thread
+        Returns:
+            SyntheticSite: The site
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Function to stop the server
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "SyntheticSite":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+class GitHubAPIStandIn:
+    """
+    Local HTTP server standing in for the commits endpoint of the GitHub API on a local (bare) repository:
+    `GET /repos/<owner>/<name>/commits?path=<folder>&per_page=1` returns the latest commit touching the folder, with an ETag.
+    Conditional requests whose ETag still matches get a 304 and, as on GitHub, do not count against the rate limit;
+    once `rate_limit` requests have been counted, requests get a 403 with `X-RateLimit-Remaining: 0` until the window resets.
+    """
+    def __init__(self, repo_path: str, rate_limit: int = 60, window: float = 3600.0):
+        self.repo_path = repo_path
+        self.rate_limit = rate_limit
+        self.window = window
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._counted: List[float] = []
+
+    def latest_commit(self, folder_path: Optional[str]) -> Optional[str]:
+        """
+        Function to get the latest commit of the repository touching a folder
+        Args:
+            folder_path (Optional[str]): Folder, the whole repository if None
+        Returns:
+            Optional[str]: The commit SHA, None if there is none
+        """
+        command = ["git", "-C", self.repo_path, "log", "-1", "--format=%H", "HEAD"] + (["--", folder_path] if folder_path else [])
+        result = subprocess.run(command, capture_output=True, text=True)
+        return result.stdout.strip() or None
+
+    def _rate_limit_headers(self, count: bool) -> Tuple[int, dict]:
+        """
+        Function to count a request against the rate limit
+        Args:
+            count (bool): Flag to count the request, False for a request that is not counted (e.g. a 304)
+        Returns:
+            Tuple[int, dict]: Number of requests left, and the rate limit headers
+        """
+        with self._lock:
+            now = time.time()
+            self._counted = [at for at in self._counted if at > now - self.window]
+            if count and len(self._counted) < self.rate_limit:
+                self._counted.append(now)
+            remaining = self.rate_limit - len(self._counted)
+            reset = int((self._counted[0] if self._counted else now) + self.window) + 1
+        return remaining, {"X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset)}
+
+    def _handler(self) -> type:
+        """
+        Function to build the request handler class of the server
+        Returns:
+            type: The handler class
+        """
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, headers: dict, body: bytes = b"") -> None:
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                url = urlparse(self.path)
+                if re.fullmatch(r"/repos/[^/]+/[^/]+/commits", url.path) is None:
+                    self._send(404, {"Content-Type": "application/json"}, b'{"message": "Not Found"}')
+                    return
+                folder_path = parse_qs(url.query).get('path', [None])[0]
+                sha = api.latest_commit(folder_path)
+                etag = f'W/"{sha}"'
+                remaining, headers = api._rate_limit_headers(count=False)
+                if remaining <= 0:
+                    self._send(403, {**headers, "Content-Type": "application/json"}, b'{"message": "API rate limit exceeded"}')
+                    return
+                if (sha is not None) and (self.headers.get("If-None-Match") == etag):
+                    with api._lock:
+                        api.not_modified += 1
+                    self._send(304, {**headers, "ETag": etag})
+                    return
+                _, headers = api._rate_limit_headers(count=True)
+                body = json.dumps([{"sha": sha}] if sha else []).encode('utf-8')
+                self._send(200, {**headers, "ETag": etag, "Content-Type": "application/json"}, body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def commits_url(self, owner: str = "Digital-Humanities-Quarterly", name: str = "dhq-journal", folder_path: str = "articles") -> str:
+        """
+        Function to get the URL of the latest commit touching a folder, as queried by GitHubCommitSource
+        Args:
+            owner (str): Owner of the repository
+            name (str): Name of the repository
+            folder_path (str): Folder of the repository
+        Returns:
+            str: The URL
+        """
+        return f"{self.url}/repos/{owner}/{name}/commits?path={folder_path}&per_page=1"
+
+    @property
+    def url(self) -> str:
+        """
+        URL of the running server
+        """
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "GitHubAPIStandIn":
+        """
+        Function to start serving on a free local port in a background thread
+        Returns:
+            GitHubAPIStandIn: The server
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Function to stop the server
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "GitHubAPIStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
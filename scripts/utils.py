@@ -1,135 +1,706 @@
 import xml.etree.ElementTree as ET
 import pandas as pd
+import hashlib
+import json
 import os
+import re
 from tqdm import tqdm
-from typing import List, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from storage import TableWriter, data_file, open_table_writer, read_table, write_table
+from instrumentation import get_metrics
 
-def process_xml_files(xml_files: List[str], output_path: str, rerun_code: bool) -> pd.DataFrame:
+# Define the XML namespaces
+NAMESPACES = {
+	'tei': "http://www.tei-c.org/ns/1.0",
+	'dhq': "http://www.digitalhumanities.org/ns/dhq",
+	'xml': "http://www.w3.org/XML/1998/namespace"
+}
+
+# Content of files that only contain the XML declaration
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+
+# Declarative specification of the fields extracted from each article.
+# Each entry is (field name, path relative to any descendant of the root, what to return):
+# 'text' returns the text of the first match, '@attr' an attribute of the first match,
+# 'element' the first matching element and 'elements' every matching element.
+ARTICLE_FIELDS = [
+	('DHQarticle-id', "tei:publicationStmt/tei:idno[@type='DHQarticle-id']", 'text'),
+	('volume', "tei:publicationStmt/tei:idno[@type='volume']", 'text'),
+	('issue', "tei:publicationStmt/tei:idno[@type='issue']", 'text'),
+	('articleType', "tei:publicationStmt/dhq:articleType", 'text'),
+	('date_when', "tei:publicationStmt/tei:date", 'text'),
+	('dhq_keywords', "tei:encodingDesc/tei:classDecl/tei:taxonomy[@xml:id='dhq_keywords']/tei:bibl", 'text'),
+	('language_ident', "tei:profileDesc/tei:langUsage/tei:language", '@ident'),
+	('dhq_abstract', "tei:text/tei:front/dhq:abstract/tei:p", 'text'),
+	('title_element', "tei:titleStmt/tei:title", 'element'),
+	('author_elements', "tei:titleStmt/dhq:authorInfo", 'elements'),
+	('body_element', "tei:text/tei:body", 'element'),
+]
+
+class CompiledField(NamedTuple):
+	name: str
+	steps: Tuple[Tuple[str, Optional[str], Optional[str]], ...]
+	value: str
+
+def _clark(name: str) -> str:
 	"""
-	Function to process a list of XML files and extract specific data from each file.
-	The extracted data is stored in a pandas DataFrame and written to a CSV file.
+	Function to convert a prefixed name such as 'tei:body' into ElementTree's '{namespace}body' form.
+
+	Args:
+		name (str): Prefixed name.
+
+	Returns:
+		str: Name in Clark notation.
+	"""
+	prefix, local = name.split(':')
+	return f"{{{NAMESPACES[prefix]}}}{local}"
+
+def compile_fields(fields: List[Tuple[str, str, str]]) -> Dict[str, List[CompiledField]]:
+	"""
+	Function to compile field specifications into matchers indexed by the tag of their last step,
+	so that a single walk of the tree can dispatch each element to the fields it may fill.
+
+	Args:
+		fields (List[Tuple[str, str, str]]): Field specifications, see ARTICLE_FIELDS.
+
+	Returns:
+		Dict[str, List[CompiledField]]: Compiled fields keyed by the Clark-notation tag of their last step.
+	"""
+	step_pattern = re.compile(r"^([\w]+:[\w]+)(?:\[@([\w:]+)='([^']*)'\])?$")
+	compiled = {}
+	for name, path, value in fields:
+		steps = []
+		for step in path.split('/'):
+			tag, attribute, attribute_value = step_pattern.match(step).groups()
+			steps.append((_clark(tag), _clark(attribute) if attribute and ':' in attribute else attribute, attribute_value))
+		field = CompiledField(name, tuple(steps), value)
+		compiled.setdefault(field.steps[-1][0], []).append(field)
+	return compiled
+
+COMPILED_ARTICLE_FIELDS = compile_fields(ARTICLE_FIELDS)
+
+def _field_matches(field: CompiledField, path: List[ET.Element]) -> bool:
+	"""
+	Function to check a compiled field against the last element of a path and its ancestors.
+
+	Args:
+		field (CompiledField): Compiled field.
+		path (List[ET.Element]): Elements from the root down to the candidate element.
+
+	Returns:
+		bool: True if every step of the field matches. The root itself never matches a step, like `.//` in `find`.
+	"""
+	depth = len(path) - 1
+	if depth < len(field.steps):
+		return False
+	for offset, (tag, attribute, attribute_value) in enumerate(reversed(field.steps)):
+		ancestor = path[depth - offset]
+		if (ancestor.tag != tag) or (attribute is not None and ancestor.get(attribute) != attribute_value):
+			return False
+	return True
+
+def extract_fields(root: ET.Element, compiled_fields: Dict[str, List[CompiledField]] = COMPILED_ARTICLE_FIELDS) -> dict:
+	"""
+	Function to fill every field of a compiled specification in a single walk of the tree.
+	Matches are resolved in document order, like ElementTree's `find`. The walk does not descend
+	into elements returned by 'element' fields (title and body), so their subtrees are never scanned.
+
+	Args:
+		root (ET.Element): Root element of the document.
+		compiled_fields (Dict[str, List[CompiledField]]): Output of compile_fields.
+
+	Returns:
+		dict: Field values keyed by field name (None or [] when nothing matched).
+	"""
+	results = {field.name: ([] if field.value == 'elements' else None) for fields in compiled_fields.values() for field in fields}
+	found = set()
+	path = []
+	stack = [(root, 0)]
+	while stack:
+		element, depth = stack.pop()
+		del path[depth:]
+		path.append(element)
+		skip_children = False
+		for field in compiled_fields.get(element.tag, ()):
+			if (field.name in found) or not _field_matches(field, path):
+				continue
+			if field.value == 'elements':
+				results[field.name].append(element)
+				continue
+			found.add(field.name)
+			if field.value == 'text':
+				results[field.name] = element.text
+			elif field.value == 'element':
+				results[field.name] = element
+				skip_children = True
+			else:
+				results[field.name] = element.attrib[field.value[1:]]
+		if not skip_children:
+			stack.extend((child, depth + 1) for child in reversed(element))
+	return results
+
+def extract_article(file_name: str) -> Tuple[Optional[dict], Optional[str]]:
+	"""
+	Function to extract the article data from a single XML file.
+	Runs in worker processes, so it must stay a module-level function.
+
+	Args:
+		file_name (str): Path to the XML file.
+
+	Returns:
+		Tuple[Optional[dict], Optional[str]]: The extracted record (None if the file was skipped or failed) and an error message (None if there was no error).
+	"""
+	# Open the file and read its content
+	with open(file_name, 'r', encoding='utf-8') as f:
+		file_content = f.read().strip()
+		
+	# Skip to the next file if the content is just the XML declaration
+	if file_content == XML_DECLARATION:
+		return None, None
 	
+	# Parse the XML file and get the root element
+	try:
+		tree = ET.parse(file_name)
+		root = tree.getroot()
+	except ET.ParseError as e:
+		return None, f"Error parsing {file_name}: {e}"
+
+	# Extract every field in a single pass over the tree
+	fields = extract_fields(root)
+
+	# Extract all text from the <body> element and its descendants
+	body_element = fields['body_element']
+	body_text = ''.join(body_element.itertext()).strip() if body_element is not None else None
+
+	return build_article_record(file_name, fields, body_text), None
+
+def _discard(element: ET.Element, parent: ET.Element) -> None:
+	"""
+	Function to free a fully processed element during iterparse by clearing it and detaching it from its parent.
+	Earlier siblings have already been discarded, so the element is among the first children of its parent
+	(only the teiHeader is kept before it).
+
 	Args:
-		xml_files (List[str]): List of paths to the XML files to process.
-		output_path (str): Path to the output CSV file.
-		rerun_code (bool): Flag to indicate whether to rerun the processing or load the existing data.
+		element (ET.Element): Processed element.
+		parent (ET.Element): Parent of the element.
+	"""
+	element.clear()
+	for index in range(min(2, len(parent))):
+		if parent[index] is element:
+			del parent[index]
+			return
+
+def extract_article_streaming(file_name: str) -> Tuple[Optional[dict], Optional[str]]:
+	"""
+	Function to extract the article data from a single XML file with `iterparse`, without building the whole tree.
+	The file is read once. Header fields are collected as their elements end, body text is collected piece by piece
+	in `itertext` order, and every element outside the teiHeader is cleared once processed, so memory stays bounded
+	by the header and the current element path rather than by the size of the article.
+	Produces the same record as extract_article.
+
+	Args:
+		file_name (str): Path to the XML file.
 
 	Returns:
-		pd.DataFrame: DataFrame containing the extracted data.
+		Tuple[Optional[dict], Optional[str]]: The extracted record (None if the file was skipped or failed) and an error message (None if there was no error).
+	"""
+	compiled_fields = COMPILED_ARTICLE_FIELDS
+	fields = {field.name: ([] if field.value == 'elements' else None) for field_list in compiled_fields.values() for field in field_list}
+	found = set()
+	# Fields matched at their start event, resolved at their end event once their text is complete
+	awaiting = {}
+	path = []
+	header_tag = _clark('tei:teiHeader')
+	header_depth = None
+	body_depth = None
+	body_parts = []
+	# Text of a started element or tail of an ended element becomes available at the next event
+	pending = None
+
+	try:
+		for event, element in ET.iterparse(file_name, events=('start', 'end')):
+			if pending is not None:
+				pending_element, attribute, parent = pending
+				body_parts.append(getattr(pending_element, attribute) or '')
+				# Merge the collected pieces regularly so that many small strings are never held at once
+				if len(body_parts) >= 1024:
+					body_parts[:] = [''.join(body_parts)]
+				if attribute == 'tail':
+					_discard(pending_element, parent)
+				pending = None
+
+			if event == 'start':
+				path.append(element)
+				depth = len(path) - 1
+				if (element.tag == header_tag) and (header_depth is None):
+					header_depth = depth
+				if body_depth is not None:
+					pending = (element, 'text', None)
+					continue
+				for field in compiled_fields.get(element.tag, ()):
+					if (field.name in found) or not _field_matches(field, path):
+						continue
+					if field.value == 'elements':
+						fields[field.name].append(element)
+						continue
+					found.add(field.name)
+					if field.name == 'body_element':
+						body_depth = depth
+						pending = (element, 'text', None)
+					else:
+						awaiting.setdefault(id(element), []).append(field)
+			else:
+				depth = len(path) - 1
+				path.pop()
+				for field in awaiting.pop(id(element), ()):
+					if field.value == 'text':
+						fields[field.name] = element.text
+					elif field.value == 'element':
+						fields[field.name] = element
+					else:
+						fields[field.name] = element.attrib[field.value[1:]]
+				if body_depth is not None:
+					if depth == body_depth:
+						# The tail of the body is not part of its text
+						body_depth = None
+						_discard(element, path[-1])
+					else:
+						pending = (element, 'tail', path[-1])
+					continue
+				# Keep the teiHeader (small, and title/author elements are read later), free everything else
+				inside_header = (header_depth is not None) and (len(path) > header_depth) and (path[header_depth].tag == header_tag)
+				if (depth > 0) and not inside_header and (element.tag != header_tag):
+					_discard(element, path[-1])
+	except ET.ParseError as e:
+		if len(path) == 0 and not found:
+			# An empty document is only an error if it is more than the XML declaration
+			with open(file_name, 'r', encoding='utf-8') as f:
+				if f.read().strip() == XML_DECLARATION:
+					return None, None
+		return None, f"Error parsing {file_name}: {e}"
+
+	body_text = ''.join(body_parts).strip() if 'body_element' in found else None
+	return build_article_record(file_name, fields, body_text), None
+
+def build_article_record(file_name: str, fields: dict, body_text: Optional[str]) -> dict:
+	"""
+	Function to build the article record from the extracted fields.
+
+	Args:
+		file_name (str): Path to the XML file.
+		fields (dict): Output of extract_fields.
+		body_text (Optional[str]): Text of the article body.
+
+	Returns:
+		dict: The article record.
 	"""
-	# Define the XML namespaces
-	namespaces = {
-		'tei': "http://www.tei-c.org/ns/1.0",
-		'dhq': "http://www.digitalhumanities.org/ns/dhq",
-		'xml': "http://www.w3.org/XML/1998/namespace"
+	namespaces = NAMESPACES
+
+	base_data = {
+		'DHQarticle-id': fields['DHQarticle-id'],
+		'volume': fields['volume'],
+		'issue': fields['issue'],
+		'articleType': fields['articleType'],
+		'date_when': fields['date_when'],
+		'dhq_keywords': fields['dhq_keywords'],
+		'language_ident': fields['language_ident'],
+		'dhq_abstract': fields['dhq_abstract'],
+		'file_name': file_name
 	}
-	existing_data = pd.read_csv(output_path) if (os.path.exists(output_path)) and (rerun_code == False) else pd.DataFrame()
-	# List to store the data from each XML file
-	all_data = []
-
-	# Process each XML file
-	for file_name in tqdm(xml_files, desc="Processing XML files"):
-		# Skip the file if it was already processed based on DHQarticle-id
-		if (existing_data is not None) and (not existing_data.empty) and file_name in (existing_data['file_name'].values):
-			continue  # Skip files that have already been processed
-
-		# Open the file and read its content
-		with open(file_name, 'r', encoding='utf-8') as f:
-			file_content = f.read().strip()
-			
-		# Skip to the next file if the content is just the XML declaration
-		if file_content == '<?xml version="1.0" encoding="UTF-8"?>':
-			continue  
+
+	# Extract title
+	title_element = fields['title_element']
+	if title_element is not None:
+		# Concatenate all text and tail components of the element and its descendants
+		title_parts = [title_element.text] + [e.text + (e.tail if e.tail else "") for e in title_element.findall(".//")]
+		base_data['title'] = "".join(filter(None, title_parts))
+
+	# Extract author information
+	author_elements = fields['author_elements']
+
+	authors_data = []
+
+	for author_element in author_elements:
+		author_data = {}
+		
+		# Extract author name
+		author_name_element = author_element.find("dhq:author_name", namespaces=namespaces)
+		if author_name_element is not None:
+			first_name = author_name_element.text
+			last_name_element = author_name_element.find("dhq:family", namespaces=namespaces)
+			if last_name_element is not None:
+				full_name = f"{first_name} {last_name_element.text}".strip()
+			else:
+				full_name = first_name
+			author_data['author_name'] = full_name
+
+		# Extract affiliation
+		affiliation_element = author_element.find("dhq:affiliation", namespaces=namespaces)
+		if affiliation_element is not None:
+			author_data['affiliation'] = affiliation_element.text
+
+		# Extract email
+		email_element = author_element.find("email", namespaces=namespaces)
+		if email_element is not None:
+			author_data['email'] = email_element.text
+
+		# Extract bio
+		bio_element = author_element.find("dhq:bio/tei:p", namespaces=namespaces)
+		if bio_element is not None:
+			author_data['bio'] = ''.join(bio_element.itertext()).strip()
 		
-		# Parse the XML file and get the root element
+		authors_data.append(author_data)
+
+	base_data['authors'] = authors_data
+
+	base_data['body_text'] = body_text
+
+	return base_data
+
+def _extract_article_safely(file_name: str, streaming: bool = False) -> Tuple[Optional[dict], Optional[str]]:
+	"""
+	Function to run extract_article and capture any unexpected error instead of aborting the whole run.
+
+	Args:
+		file_name (str): Path to the XML file.
+		streaming (bool): Flag to use extract_article_streaming.
+
+	Returns:
+		Tuple[Optional[dict], Optional[str]]: The extracted record and an error message.
+	"""
+	try:
+		return extract_article_streaming(file_name) if streaming else extract_article(file_name)
+	except Exception as e:
+		return None, f"Error processing {file_name}: {type(e).__name__}: {e}"
+
+# Columns of the table written by process_xml_files, in the order of the article records
+ARTICLE_COLUMNS = ['DHQarticle-id', 'volume', 'issue', 'articleType', 'date_when', 'dhq_keywords', 'language_ident', 'dhq_abstract', 'file_name', 'title', 'authors', 'body_text']
+
+# Number of records materialized and written at a time
+DEFAULT_BATCH_SIZE = 500
+
+def _extract_chunk(file_names: List[str], streaming: bool = False) -> List[Tuple[Optional[dict], Optional[str]]]:
+	"""
+	Function to extract a chunk of files in a worker process.
+
+	Args:
+		file_names (List[str]): Paths to the XML files.
+		streaming (bool): Flag to use extract_article_streaming.
+
+	Returns:
+		List[Tuple[Optional[dict], Optional[str]]]: The record and error of each file.
+	"""
+	return [_extract_article_safely(file_name, streaming) for file_name in file_names]
+
+def _iter_extracted(xml_files: List[str], workers: int, chunk_size: int, streaming: bool) -> Iterator[Tuple[Optional[dict], Optional[str]]]:
+	"""
+	Function to extract files in order, over a process pool if there are several workers.
+	Only a few chunks per worker are in flight at a time, so results never pile up faster than they are consumed.
+
+	Args:
+		xml_files (List[str]): List of paths to the XML files to process.
+		workers (int): Number of worker processes, 1 to process the files in the current process.
+		chunk_size (int): Number of files sent to a worker at a time.
+		streaming (bool): Flag to parse the files with iterparse instead of building the whole tree.
+
+	Yields:
+		Tuple[Optional[dict], Optional[str]]: The record and error of each file, in the order of the files.
+	"""
+	if workers <= 1 or len(xml_files) <= 1:
+		for file_name in xml_files:
+			yield _extract_article_safely(file_name, streaming)
+		return
+	chunks = iter([xml_files[start:start + chunk_size] for start in range(0, len(xml_files), chunk_size)])
+	executor = ProcessPoolExecutor(max_workers=workers)
+	try:
+		in_flight = deque()
+		for chunk in chunks:
+			in_flight.append(executor.submit(_extract_chunk, chunk, streaming))
+			if len(in_flight) >= 2 * workers:
+				break
+		while in_flight:
+			results = in_flight.popleft().result()
+			next_chunk = next(chunks, None)
+			if next_chunk is not None:
+				in_flight.append(executor.submit(_extract_chunk, next_chunk, streaming))
+			yield from results
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+
+def iter_articles(xml_files: List[str], workers: int = 1, chunk_size: int = 32, streaming: bool = False, errors: Optional[List[dict]] = None) -> Iterator[dict]:
+	"""
+	Function to extract the article data from a list of XML files as a stream of records, optionally over a process pool.
+	Records come in the same order as the input files whatever the number of workers, and are not kept once consumed.
+
+	Args:
+		xml_files (List[str]): List of paths to the XML files to process.
+		workers (int): Number of worker processes, 1 to process the files in the current process.
+		chunk_size (int): Number of files sent to a worker at a time.
+		streaming (bool): Flag to parse the files with iterparse instead of building the whole tree.
+		errors (Optional[List[dict]]): List the errors are appended to, as {'file_name', 'error'} records.
+
+	Yields:
+		dict: The record of each file that was extracted.
+	"""
+	n_errors = 0
+	with get_metrics().span("extract_articles") as span, tqdm(total=len(xml_files), desc="Processing XML files") as progress_bar:
+		span.add(items=len(xml_files), bytes=sum(os.path.getsize(file_name) for file_name in xml_files if os.path.exists(file_name)))
 		try:
-			tree = ET.parse(file_name)
-			root = tree.getroot()
-		except ET.ParseError:
-			print(f"Error parsing {file_name}. Skipping...")
-			continue
-
-		# Extracting the required data with checks to avoid errors
-		base_data = {
-			'DHQarticle-id': root.find(".//tei:publicationStmt/tei:idno[@type='DHQarticle-id']", namespaces=namespaces).text if root.find(".//tei:publicationStmt/tei:idno[@type='DHQarticle-id']", namespaces=namespaces) is not None else None,
-			'volume': root.find(".//tei:publicationStmt/tei:idno[@type='volume']", namespaces=namespaces).text if root.find(".//tei:publicationStmt/tei:idno[@type='volume']", namespaces=namespaces) is not None else None,
-			'issue': root.find(".//tei:publicationStmt/tei:idno[@type='issue']", namespaces=namespaces).text if root.find(".//tei:publicationStmt/tei:idno[@type='issue']", namespaces=namespaces) is not None else None,
-			'articleType': root.find(".//tei:publicationStmt/dhq:articleType", namespaces=namespaces).text if root.find(".//tei:publicationStmt/dhq:articleType", namespaces=namespaces) is not None else None,
-			'date_when': root.find(".//tei:publicationStmt/tei:date", namespaces=namespaces).text if root.find(".//tei:publicationStmt/tei:date", namespaces=namespaces) is not None else None,
-			'dhq_keywords': root.find(".//tei:encodingDesc/tei:classDecl/tei:taxonomy[@xml:id='dhq_keywords']/tei:bibl", namespaces=namespaces).text if root.find(".//tei:encodingDesc/tei:classDecl/tei:taxonomy[@xml:id='dhq_keywords']/tei:bibl", namespaces=namespaces) is not None else None,
-			'language_ident': root.find(".//tei:profileDesc/tei:langUsage/tei:language", namespaces=namespaces).attrib['ident'] if root.find(".//tei:profileDesc/tei:langUsage/tei:language", namespaces=namespaces) is not None else None,
-			'dhq_abstract': root.find(".//tei:text/tei:front/dhq:abstract/tei:p", namespaces=namespaces).text if root.find(".//tei:text/tei:front/dhq:abstract/tei:p", namespaces=namespaces) is not None else None,
-			'file_name': file_name
-		}
-
-		# Extract title
-		title_element = root.find(".//tei:titleStmt/tei:title", namespaces=namespaces)
-		if title_element is not None:
-			# Concatenate all text and tail components of the element and its descendants
-			title_parts = [title_element.text] + [e.text + (e.tail if e.tail else "") for e in title_element.findall(".//")]
-			base_data['title'] = "".join(filter(None, title_parts))
-
-		# Extract author information
-		author_elements = root.findall(".//tei:titleStmt/dhq:authorInfo", namespaces=namespaces)
-
-		authors_data = []
-
-		for author_element in author_elements:
-			author_data = {}
-			
-			# Extract author name
-			author_name_element = author_element.find("dhq:author_name", namespaces=namespaces)
-			if author_name_element is not None:
-				first_name = author_name_element.text
-				last_name_element = author_name_element.find("dhq:family", namespaces=namespaces)
-				if last_name_element is not None:
-					full_name = f"{first_name} {last_name_element.text}".strip()
-				else:
-					full_name = first_name
-				author_data['author_name'] = full_name
-
-			# Extract affiliation
-			affiliation_element = author_element.find("dhq:affiliation", namespaces=namespaces)
-			if affiliation_element is not None:
-				author_data['affiliation'] = affiliation_element.text
-
-			# Extract email
-			email_element = author_element.find("email", namespaces=namespaces)
-			if email_element is not None:
-				author_data['email'] = email_element.text
-
-			# Extract bio
-			bio_element = author_element.find("dhq:bio/tei:p", namespaces=namespaces)
-			if bio_element is not None:
-				author_data['bio'] = ''.join(bio_element.itertext()).strip()
-			
-			authors_data.append(author_data)
-
-		base_data['authors'] = authors_data
-
-		# Extracting paragraphs from the body
-		# Check if paragraphs are inside a <div> tag
-		# Get the <body> element
-		body_element = root.find(".//tei:text/tei:body", namespaces=namespaces)
-
-		# Extract all text from the <body> element and its descendants
-		body_text = ''.join(body_element.itertext()).strip() if body_element is not None else None
-
-		base_data['body_text'] = body_text
-
-		# Then, instead of creating a separate dataframe for paragraphs, you can directly append the base_data dictionary to the all_data list:
-		data_df = pd.DataFrame([base_data])
-
-		all_data.append(data_df)
-
-	# Convert the data list to a DataFrame
-	final_df = pd.concat(all_data)
-	if existing_data is not None:
-		combined_data = pd.concat([existing_data, final_df], ignore_index=True)
-	else:
-		combined_data = final_df
-	combined_data.to_csv(output_path, index=False)
-	return combined_data
+			for file_name, (record, error) in zip(xml_files, _iter_extracted(xml_files, workers, chunk_size, streaming)):
+				progress_bar.update(1)
+				if error is not None:
+					n_errors += 1
+					if errors is not None:
+						errors.append({'file_name': file_name, 'error': error})
+				elif record is not None:
+					yield record
+		finally:
+			get_metrics().count('xml_errors', n_errors)
+
+def extract_articles(xml_files: List[str], workers: int = 1, chunk_size: int = 32, streaming: bool = False) -> Tuple[List[dict], List[dict]]:
+	"""
+	Function to extract the article data from a list of XML files, optionally over a process pool.
+	Records are returned in the same order as the input files whatever the number of workers.
+
+	Args:
+		xml_files (List[str]): List of paths to the XML files to process.
+		workers (int): Number of worker processes, 1 to process the files in the current process.
+		chunk_size (int): Number of files sent to a worker at a time.
+		streaming (bool): Flag to parse the files with iterparse instead of building the whole tree.
+
+	Returns:
+		Tuple[List[dict], List[dict]]: The extracted records, and the errors as {'file_name', 'error'} records.
+	"""
+	errors = []
+	records = list(iter_articles(xml_files, workers=workers, chunk_size=chunk_size, streaming=streaming, errors=errors))
+	return records, errors
+
+def write_records(records: Iterable[dict], writer: TableWriter, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+	"""
+	Function to write a stream of records to a table, materializing them as DataFrames of `batch_size` rows,
+	so that memory stays flat whatever the number of records.
+
+	Args:
+		records (Iterable[dict]): The records, e.g. from iter_articles.
+		writer (TableWriter): Writer of the table, from open_table_writer.
+		batch_size (int): Number of records per batch.
+
+	Returns:
+		int: Number of records written.
+	"""
+	written = 0
+	batch = []
+	for record in records:
+		batch.append(record)
+		if len(batch) >= batch_size:
+			writer.write(pd.DataFrame(batch))
+			written += len(batch)
+			batch = []
+	if batch:
+		writer.write(pd.DataFrame(batch))
+		written += len(batch)
+	return written
+
+def file_fingerprint(file_name: str, previous: Optional[dict] = None) -> dict:
+	"""
+	Function to fingerprint a file with its size, modification time and SHA-256 content hash.
+	If the size and modification time match a previous fingerprint, its hash is reused instead of rereading the file.
+
+	Args:
+		file_name (str): Path to the file.
+		previous (Optional[dict]): Previous fingerprint of the file, if any.
+
+	Returns:
+		dict: Fingerprint with 'size', 'mtime_ns' and 'sha256' keys.
+	"""
+	stat = os.stat(file_name)
+	if (previous is not None) and (previous.get('size') == stat.st_size) and (previous.get('mtime_ns') == stat.st_mtime_ns):
+		return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': previous['sha256']}
+	digest = hashlib.sha256()
+	with open(file_name, 'rb') as f:
+		for block in iter(lambda: f.read(1024 * 1024), b''):
+			digest.update(block)
+	return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+def load_manifest(manifest_path: str) -> Dict[str, dict]:
+	"""
+	Function to load the manifest of processed XML files.
+
+	Args:
+		manifest_path (str): Path to the manifest JSON file.
+
+	Returns:
+		Dict[str, dict]: Fingerprint and extracted DHQarticle-id keyed by file path, empty if there is no manifest.
+	"""
+	if not os.path.exists(manifest_path):
+		return {}
+	with open(manifest_path, 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+def save_manifest(manifest: Dict[str, dict], manifest_path: str) -> None:
+	"""
+	Function to atomically write the manifest of processed XML files.
+
+	Args:
+		manifest (Dict[str, dict]): Fingerprint and extracted DHQarticle-id keyed by file path.
+		manifest_path (str): Path to the manifest JSON file.
+	"""
+	tmp_path = f"{manifest_path}.tmp"
+	with open(tmp_path, 'w', encoding='utf-8') as f:
+		json.dump(manifest, f, indent=1, sort_keys=True)
+	os.replace(tmp_path, manifest_path)
+
+def plan_xml_updates(xml_files: List[str], manifest: Dict[str, dict]) -> Tuple[List[str], List[str], Dict[str, dict]]:
+	"""
+	Function to compare the current XML files against the manifest.
+
+	Args:
+		xml_files (List[str]): Every XML file that should be in the dataset.
+		manifest (Dict[str, dict]): Manifest of the previous run.
+
+	Returns:
+		Tuple[List[str], List[str], Dict[str, dict]]: Files to (re)process because they are new or their content changed,
+		files of the manifest that no longer exist, and the current fingerprint of every file.
+	"""
+	current = set(xml_files)
+	deleted_files = [file_name for file_name in manifest if file_name not in current]
+	fingerprints = {}
+	changed_files = []
+	for file_name in xml_files:
+		previous = manifest.get(file_name)
+		fingerprints[file_name] = file_fingerprint(file_name, previous)
+		if (previous is None) or (previous['sha256'] != fingerprints[file_name]['sha256']):
+			changed_files.append(file_name)
+	return changed_files, deleted_files, fingerprints
+
+def process_xml_files(xml_files: List[str], output_path: str, rerun_code: bool, workers: int = 1, streaming: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+	"""
+	Function to process a list of XML files and extract specific data from each file.
+	The extracted data is stored in a pandas DataFrame and written to the output file.
+	A `*_manifest.json` file next to the output records the size, modification time and content hash of every processed file,
+	so that on later runs only new or modified files are reparsed and rows of deleted files are dropped.
+	Files that fail to parse are written to a sibling `*_errors.csv` file and retried on the next run.
+	Records are streamed from iter_articles to the output in batches, so the extracted records are never all held in memory
+	while parsing. The rows kept from the previous output are loaded in full, and so is the returned DataFrame, which is read
+	back from the output so that its types are those of any later read_table.
+	
+	Args:
+		xml_files (List[str]): List of paths to the XML files to process. This is the full set of files in the dataset.
+		output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+		rerun_code (bool): Flag to indicate whether to rerun the processing or load the existing data.
+		workers (int): Number of worker processes used for extraction, 1 to process serially.
+		streaming (bool): Flag to parse the files with iterparse, bounding memory per worker.
+		batch_size (int): Number of records written at a time.
+
+	Returns:
+		pd.DataFrame: DataFrame containing the extracted data.
+	"""
+	manifest_path = f"{os.path.splitext(output_path)[0]}_manifest.json"
+	existing_data = read_table(output_path) if (os.path.exists(output_path)) and (rerun_code == False) else pd.DataFrame()
+	manifest = load_manifest(manifest_path) if not existing_data.empty else {}
+
+	# Outputs written before the manifest existed: trust the files already in the output as they are now
+	if (not existing_data.empty) and (len(manifest) == 0):
+		for file_name in existing_data['file_name'].unique():
+			if os.path.exists(file_name):
+				manifest[file_name] = file_fingerprint(file_name)
+
+	changed_files, deleted_files, fingerprints = plan_xml_updates(xml_files, manifest)
+	print(f"XML files: {len(changed_files)} new or modified, {len(deleted_files)} deleted, {len(xml_files) - len(changed_files)} unchanged")
+	return _update_xml_output(existing_data, manifest, changed_files, deleted_files, fingerprints, output_path, workers, streaming, batch_size)
+
+def apply_xml_changes(changed_files: List[str], deleted_files: List[str], output_path: str, workers: int = 1, streaming: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+	"""
+	Function to update the output of process_xml_files from an explicit list of changes, without walking the directory.
+	Files that are excluded by generate_xml_files or no longer exist are ignored.
+
+	Args:
+		changed_files (List[str]): Paths to the XML files that were added or modified.
+		deleted_files (List[str]): Paths to the XML files that were deleted.
+		output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+		workers (int): Number of worker processes used for extraction, 1 to process serially.
+		streaming (bool): Flag to parse the files with iterparse, bounding memory per worker.
+		batch_size (int): Number of records written at a time.
+
+	Returns:
+		pd.DataFrame: DataFrame containing the extracted data.
+	"""
+	manifest_path = f"{os.path.splitext(output_path)[0]}_manifest.json"
+	existing_data = read_table(output_path) if os.path.exists(output_path) else pd.DataFrame()
+	manifest = load_manifest(manifest_path)
+
+	changed_files = [file_name for file_name in changed_files if is_article_xml(file_name) and os.path.exists(file_name)]
+	fingerprints = {file_name: file_fingerprint(file_name) for file_name in changed_files}
+	print(f"XML files: {len(changed_files)} new or modified, {len(deleted_files)} deleted")
+	return _update_xml_output(existing_data, manifest, changed_files, deleted_files, fingerprints, output_path, workers, streaming, batch_size)
+
+def _update_xml_output(existing_data: pd.DataFrame, manifest: Dict[str, dict], changed_files: List[str], deleted_files: List[str], fingerprints: Dict[str, dict], output_path: str, workers: int, streaming: bool, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+	"""
+	Function to reprocess the changed files, drop the rows of changed and deleted files, and write the output and its manifest.
+
+	Args:
+		existing_data (pd.DataFrame): Previous output.
+		manifest (Dict[str, dict]): Manifest of the previous output.
+		changed_files (List[str]): Paths to the XML files to (re)process.
+		deleted_files (List[str]): Paths to the XML files to drop.
+		fingerprints (Dict[str, dict]): Current fingerprint of every changed file, and optionally of unchanged ones.
+		output_path (str): Path to the output file (CSV, Parquet or Arrow, by extension).
+		workers (int): Number of worker processes used for extraction.
+		streaming (bool): Flag to parse the files with iterparse.
+		batch_size (int): Number of records written at a time.
+
+	Returns:
+		pd.DataFrame: DataFrame containing the extracted data, read back in full from the output.
+	"""
+	manifest_path = f"{os.path.splitext(output_path)[0]}_manifest.json"
+	stale_files = set(changed_files) | set(deleted_files)
+
+	# Drop the rows of deleted files and of files that are about to be reprocessed
+	if not existing_data.empty:
+		existing_data = existing_data[~existing_data['file_name'].isin(stale_files)]
+
+	# Nothing to change: only the fingerprints of touched but unchanged files are updated
+	if (not changed_files) and (not deleted_files) and (not existing_data.empty):
+		save_manifest({file_name: {**fingerprints.get(file_name, entry), 'key': entry.get('key')} for file_name, entry in manifest.items()}, manifest_path)
+		return existing_data
+
+	# Stream the existing rows then the extracted records to the output, one batch at a time
+	errors = []
+	keys = {}
+	def tracked(records: Iterable[dict]) -> Iterator[dict]:
+		for record in records:
+			keys[record['file_name']] = record['DHQarticle-id']
+			yield record
+	# Only the extracted fields are written, so every batch has the same columns whatever the existing rows hold (e.g. columns added by the cleaning)
+	with open_table_writer(output_path, ARTICLE_COLUMNS) as writer:
+		for start in range(0, len(existing_data), batch_size):
+			writer.write(existing_data.iloc[start:start + batch_size])
+		write_records(tracked(iter_articles(changed_files, workers=workers, streaming=streaming, errors=errors)), writer, batch_size)
+
+	# Record the files that could not be processed
+	errors_path = f"{os.path.splitext(output_path)[0]}_errors.csv"
+	if len(errors) > 0:
+		print(f"{len(errors)} XML files could not be processed, see {errors_path}")
+		pd.DataFrame(errors).to_csv(errors_path, index=False)
+	elif os.path.exists(errors_path):
+		# The files listed by a previous run have been processed or deleted since
+		os.remove(errors_path)
+
+	# Update the manifest: failed files are left out so they are retried next time
+	failed_files = {error['file_name'] for error in errors}
+	updated_manifest = {}
+	for file_name, entry in manifest.items():
+		if file_name not in stale_files:
+			updated_manifest[file_name] = {**fingerprints.get(file_name, entry), 'key': entry.get('key')}
+	for file_name in changed_files:
+		if file_name not in failed_files:
+			updated_manifest[file_name] = {**fingerprints[file_name], 'key': keys.get(file_name)}
+
+	save_manifest(updated_manifest, manifest_path)
+	return read_table(output_path)
 
 def generate_xml_files(directory_path: str) -> List[str]:
 	"""
@@ -142,39 +713,52 @@ def generate_xml_files(directory_path: str) -> List[str]:
 	Returns:
 		List[str]: List of paths to the XML files.
 	"""
+	# Generate a list of XML files that do not meet the exclusion conditions
+	xml_files = [os.path.join(dp, f) for dp, _, filenames in os.walk(directory_path) for f in filenames if is_article_xml(f)]
+	return xml_files
+
+def is_article_xml(file_name: str) -> bool:
+	"""
+	Function to check whether a file is an article XML file that should be processed.
+	Excludes old, converted, sample and test files, among others.
+
+	Args:
+		file_name (str): Name of or path to the file.
+
+	Returns:
+		bool: True if the file should be processed.
+	"""
 	# List of strings to exclude from the file names
 	exclude = ['old', 'converted', 'dhq', 'sample', 'recovered', 'test', 'walsh']
 
-	# Generate a list of XML files that do not meet the exclusion conditions
-	xml_files = [os.path.join(dp, f) for dp, _, filenames in os.walk(directory_path) for f in filenames 
-				if f.endswith('.xml') 
-				and not any(ex_str in f for ex_str in exclude) 
-				and not f.startswith('999') and not f.startswith('000000') and not '_' in f]
-	return xml_files
+	f = os.path.basename(file_name)
+	return (f.endswith('.xml') 
+			and not any(ex_str in f for ex_str in exclude) 
+			and not f.startswith('999') and not f.startswith('000000') and not '_' in f)
 
 def get_scraped_dhq_files() -> Tuple[pd.DataFrame, pd.DataFrame]:
 	"""
 	Function to get data from scraped DHQ files.
-	Reads data from CSV files if they exist, otherwise creates empty DataFrames.
+	Reads data from the dataset files if they exist, otherwise creates empty DataFrames.
 
 	Returns:
 		Tuple[pd.DataFrame, pd.DataFrame]: Tuple containing two DataFrames.
 	"""
-	# Path to the CSV file containing the updated data
-	updated_df_output_path = "../data/missing_dhq_data.csv"
+	# Path to the file containing the updated data
+	updated_df_output_path = data_file("missing_dhq_data")
 
-	# If the CSV file exists, read it into a DataFrame, otherwise create an empty DataFrame
+	# If the file exists, read it into a DataFrame, otherwise create an empty DataFrame
 	if os.path.exists(updated_df_output_path):
-		updated_df = pd.read_csv(updated_df_output_path)
+		updated_df = read_table(updated_df_output_path)
 	else:
 		updated_df = pd.DataFrame()
 
-	# Path to the CSV file containing the article links
-	article_links_df_output_path = "../data/dhq_article_links.csv"
+	# Path to the file containing the article links
+	article_links_df_output_path = data_file("dhq_article_links")
 
-	# If the CSV file exists, read it into a DataFrame and extract certain data, otherwise create an empty DataFrame
+	# If the file exists, read it into a DataFrame and extract certain data, otherwise create an empty DataFrame
 	if os.path.exists(article_links_df_output_path):
-		article_links_df = pd.read_csv(article_links_df_output_path)
+		article_links_df = read_table(article_links_df_output_path)
 		pattern = r'.*vol/([^/]*)/([^/]*)/(\d+)/\3\.html'
 		article_links_df[['volume', 'issue', 'DHQarticle-id']] = article_links_df.article_link.str.extract(pattern)
 		article_links_df.volume = article_links_df.volume.apply(lambda x: x.zfill(3))
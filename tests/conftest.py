@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The scripts import each other by module name, as when they are run from their directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import storage
+from http_client import configure_client
+
+@pytest.fixture
+def data_root(tmp_path):
+    """
+    Fixture to write the data files of a test to a temporary directory, in CSV
+    """
+    previous_root, previous_format = storage.DATA_ROOT, storage.DATA_FORMAT
+    storage.set_data_root(str(tmp_path / "data"))
+    storage.DATA_FORMAT = "csv"
+    os.makedirs(storage.DATA_ROOT)
+    yield storage.DATA_ROOT
+    storage.set_data_root(previous_root)
+    storage.DATA_FORMAT = previous_format
+
+@pytest.fixture
+def client():
+    """
+    Fixture to give the test a fresh shared HTTP client without rate limit or cache, so its counters start at zero
+    """
+    return configure_client(requests_per_second=None)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from dhq_website_scraper import configure_site
+from http_cache import LinkCache
+from process_dhq_articles import create_article_links
+from synthetic_corpus import SyntheticCorpus, SyntheticSite
+
+def test_create_article_links(data_root, client, tmp_path):
+    corpus = SyntheticCorpus(60)
+    volume, issue = corpus.volume_issue(20)
+    other_volume, other_issue = corpus.volume_issue(40)
+    df = pd.DataFrame({
+        # An article page that exists, one of an issue that does not exist (404),
+        # one served as the Resource Not Found page and a row that already has its link
+        'DHQarticle-id': [corpus.article_id(20), "000099", corpus.article_id(40), corpus.article_id(30)],
+        'volume': [str(volume), "99", str(volume), str(other_volume)],
+        'issue': [str(issue), "1", str(issue), str(other_issue)],
+        'article_link': [np.nan, np.nan, np.nan, "http://example.org/kept.html"],
+    }, index=[10, 11, 12, 13])
+    link_cache = LinkCache(str(tmp_path / "link_cache.json"))
+
+    with SyntheticSite(corpus) as site:
+        configure_site(site.url, site.url)
+        result = create_article_links(df, link_cache)
+        assert client.stats['requests'] == 3
+        assert client.status_codes[404] == 1
+
+        # Only the link that exists is written back, to its own row
+        expected_link = f"{site.url}/dhq/vol/{volume}/{issue}/{corpus.article_id(20)}/{corpus.article_id(20)}.html"
+        assert result.index.tolist() == [10, 11, 12, 13]
+        assert result['article_link'].tolist()[0] == expected_link
+        assert result['article_link'].isna().tolist() == [False, True, True, False]
+        assert result.loc[13, 'article_link'] == "http://example.org/kept.html"
+        assert df['article_link'].isna().sum() == 3
+
+        # Within the TTL every check comes from the cache, also after reloading it from disk
+        again = create_article_links(df, LinkCache(str(tmp_path / "link_cache.json")))
+        assert client.stats['requests'] == 3
+        pd.testing.assert_frame_equal(result, again)
@@ -0,0 +1,139 @@
+from typing import Callable, List
+
+import pandas as pd
+import pytest
+
+from process_dhq_articles import check_duplicates, infer_dates, infer_issue_data
+from synthetic_corpus import synthetic_metadata
+
+ISSUE_COLUMNS = ['issue_title', 'scraped_editors', 'issue_text', 'issue_link']
+
+# Per-group implementations the vectorized cleaning steps replaced, as the reference of the tests
+def legacy_check_duplicates(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to keep the latest row of one 'DHQarticle-id' group, as create_dataset used to apply per group.
+    Args:
+        rows (pd.DataFrame): Rows of one article
+    Returns:
+        pd.DataFrame: The latest row
+    """
+    if len(rows) > 1:
+        rows = rows.sort_values(by=['date_when'], ascending=False, kind='stable')
+        rows = rows[0:1]
+    return rows
+
+def legacy_infer_dates(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to infer the missing dates of one issue group, as create_dataset used to apply per group.
+    Args:
+        rows (pd.DataFrame): Rows of one issue
+    Returns:
+        pd.DataFrame: The rows with missing dates first, filled with the latest date of the issue
+    """
+    missing_dates = rows[rows.date_processed.isna()].copy()
+    has_dates = rows[rows.date_processed.notna()]
+    missing_dates['date_processed'] = has_dates.date_processed.max()
+    return pd.concat([missing_dates, has_dates])
+
+def legacy_infer_issue_data(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Function to infer the issue data of one issue group, as finalize_dataset used to apply per group.
+    Args:
+        rows (pd.DataFrame): Rows of one issue
+    Returns:
+        pd.DataFrame: The rows with the first non-null value of each issue column
+    """
+    rows = rows.copy()
+    for col in ['issue_title', 'scraped_editors', 'issue_text', 'issue_link']:
+        unique_values = rows[col].dropna().unique()
+        rows[col] = unique_values[0] if unique_values.size > 0 else None
+    return rows
+
+def legacy_group_apply(df: pd.DataFrame, keys: List[str], function: Callable[[pd.DataFrame], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Function to apply a function to every group and concatenate the results in group order, like groupby().apply().
+    Args:
+        df (pd.DataFrame): DataFrame to group
+        keys (List[str]): Grouping columns
+        function (Callable[[pd.DataFrame], pd.DataFrame]): Function applied to each group
+    Returns:
+        pd.DataFrame: The concatenated results
+    """
+    return pd.concat([function(rows) for _, rows in df.groupby(keys)])
+
+def metadata(rows: List[tuple]) -> pd.DataFrame:
+    """
+    Function to build article metadata from (DHQarticle-id, date_when, volume, issue, issue_title) rows, the other issue columns being missing
+    """
+    df = pd.DataFrame(rows, columns=['DHQarticle-id', 'date_when', 'volume', 'issue', 'issue_title'], dtype=object)
+    df['date_processed'] = pd.to_datetime(df['date_when'], format='%d %B %Y')
+    for col in ISSUE_COLUMNS[1:]:
+        df[col] = None
+    return df
+
+EDGE_CASES = {
+    'synthetic': synthetic_metadata(1000),
+    # Every date of issue 1.2 is missing
+    'all_dates_missing_in_issue': metadata([
+        ("000001", "01 March 2007", "001", "1", "Issue 1.1"),
+        ("000002", None, "001", "2", None),
+        ("000003", None, "001", "2", "Issue 1.2"),
+        ("000004", "05 May 2007", "001", "1", None),
+    ]),
+    # Rows without a volume or an issue, and one without an id
+    'missing_volume_or_issue': metadata([
+        ("000001", "01 March 2007", None, "1", "Issue ?.1"),
+        ("000002", "02 March 2007", "001", None, None),
+        ("000003", None, "001", "1", None),
+        ("000004", "04 March 2007", "001", "1", "Issue 1.1"),
+        (None, "05 March 2007", "001", "1", None),
+    ]),
+    # Groups of a single row
+    'single_row_groups': metadata([
+        ("000001", "01 March 2007", "001", "1", "Issue 1.1"),
+        ("000002", None, "002", "1", None),
+        ("000003", "03 March 2007", "003", "2", None),
+    ]),
+    # Copies of an article with the same date, and issues whose latest dates are tied
+    'tied_dates': metadata([
+        ("000001", "01 March 2007", "001", "1", "first copy"),
+        ("000002", "01 March 2007", "001", "1", None),
+        ("000001", "01 March 2007", "001", "1", "second copy"),
+        ("000003", None, "001", "1", "Issue 1.1"),
+        ("000004", "01 March 2007", "001", "2", None),
+        ("000005", None, "001", "2", None),
+    ]),
+}
+
+def assert_same_rows(expected: pd.DataFrame, result: pd.DataFrame) -> None:
+    """
+    Function to compare the rows of two tables, whatever the resolution of their dates (the per-group
+    implementation switches to nanoseconds when it fills an issue without dates)
+    """
+    def normalized(df: pd.DataFrame) -> pd.DataFrame:
+        return df.astype({column: 'datetime64[ns]' for column in df.columns if pd.api.types.is_datetime64_any_dtype(df[column])})
+    pd.testing.assert_frame_equal(normalized(expected), normalized(result), check_dtype=False)
+
+@pytest.fixture(params=list(EDGE_CASES))
+def df(request) -> pd.DataFrame:
+    return EDGE_CASES[request.param].copy()
+
+def test_check_duplicates_matches_per_group(df):
+    expected = legacy_group_apply(df, ['DHQarticle-id'], legacy_check_duplicates)
+    assert_same_rows(expected, check_duplicates(df))
+
+def test_infer_dates_matches_per_group(df):
+    expected = legacy_group_apply(df, ['volume', 'issue'], legacy_infer_dates)
+    assert_same_rows(expected, infer_dates(df))
+
+def test_infer_issue_data_matches_per_group(df):
+    expected = legacy_group_apply(df, ['volume', 'issue'], legacy_infer_issue_data)
+    assert_same_rows(expected, infer_issue_data(df))
+
+def test_tied_copies_keep_the_first_row():
+    result = check_duplicates(EDGE_CASES['tied_dates'].copy())
+    assert result.loc[result['DHQarticle-id'] == "000001", 'issue_title'].tolist() == ["first copy"]
+
+def test_issue_without_dates_stays_without_dates():
+    result = infer_dates(EDGE_CASES['all_dates_missing_in_issue'].copy())
+    assert result.loc[result['issue'] == "2", 'date_processed'].isna().all()
@@ -0,0 +1,42 @@
+import os
+
+import pandas as pd
+import pytest
+
+from synthetic_corpus import SyntheticCorpus
+from utils import generate_xml_files, process_xml_files
+
+def write_corpus(articles_path: str, n_articles: int = 80) -> list:
+    """
+    Function to write a synthetic corpus with one malformed XML file
+    Args:
+        articles_path (str): Directory of the articles
+        n_articles (int): Number of articles of the corpus
+    Returns:
+        list: Paths to the XML files
+    """
+    SyntheticCorpus(n_articles).write_repository(articles_path)
+    xml_files = sorted(generate_xml_files(articles_path))
+    with open(xml_files[5], 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader>')
+    return xml_files
+
+def errors_of(output_path: str) -> pd.DataFrame:
+    return pd.read_csv(f"{os.path.splitext(output_path)[0]}_errors.csv")
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_parallel_extraction_matches_serial(tmp_path, streaming):
+    xml_files = write_corpus(str(tmp_path / "articles"))
+    serial_path, parallel_path = str(tmp_path / "serial.csv"), str(tmp_path / "parallel.csv")
+
+    serial = process_xml_files(xml_files, serial_path, True, workers=1, streaming=streaming, batch_size=7)
+    parallel = process_xml_files(xml_files, parallel_path, True, workers=3, streaming=streaming, batch_size=7)
+
+    # Same rows in the same order, without the malformed file
+    assert serial['file_name'].tolist() == [file_name for file_name in xml_files if file_name != xml_files[5]]
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    # Same error records
+    serial_errors, parallel_errors = errors_of(serial_path), errors_of(parallel_path)
+    assert serial_errors['file_name'].tolist() == [xml_files[5]]
+    pd.testing.assert_frame_equal(serial_errors, parallel_errors)
@@ -0,0 +1,53 @@
+import re
+
+import pytest
+
+import dhq_website_scraper
+from benchmark_pipeline import html_fixtures, legacy_extract_xml_links, legacy_parse_issue_page
+from dhq_website_scraper import extract_xml_links, parse_issue_page
+from synthetic_corpus import SyntheticCorpus
+
+def edge_case_pages() -> dict:
+    """
+    Function to build issue pages missing parts of the table of contents, from a synthetic issue page
+    """
+    corpus = SyntheticCorpus(30)
+    page = corpus.issue_html(*corpus.issues()[0])
+    return {
+        'without_editors': re.sub(r'<h3>.*?</h3>', '', page),
+        'without_toc': page.replace('id="toc"', 'id="contents"'),
+        'without_abstracts': page.replace('<span class="viewAbstract">Abstract [en]</span>', ''),
+        'empty': '',
+    }
+
+PARSERS = [pytest.param("lxml", marks=pytest.mark.skipif(dhq_website_scraper.lxml is None, reason="lxml is not installed")), "html.parser"]
+
+@pytest.fixture(params=PARSERS)
+def parser(request, monkeypatch):
+    monkeypatch.setattr(dhq_website_scraper, "HTML_PARSER", request.param)
+    return request.param
+
+def test_issue_pages_match_beautifulsoup(parser):
+    issue_pages, _ = html_fixtures(120)
+    for page in issue_pages:
+        assert parse_issue_page(page, "issue", "link") == legacy_parse_issue_page(page, "issue", "link")
+
+@pytest.mark.parametrize("case", list(edge_case_pages()))
+def test_incomplete_issue_pages_match_beautifulsoup(parser, case):
+    page = edge_case_pages()[case]
+    records = parse_issue_page(page, "issue", "link")
+    assert records == legacy_parse_issue_page(page, "issue", "link")
+    if case in ('without_toc', 'empty'):
+        assert records == []
+    else:
+        assert records
+    if case == 'without_editors':
+        assert {record['editors'] for record in records} == {''}
+    if case == 'without_abstracts':
+        assert {record['abstract'] for record in records} == {''}
+
+def test_xml_links_match_beautifulsoup():
+    _, article_pages = html_fixtures(120)
+    article_pages.append('<a href="/dhq/vol/1/1/000001.xml">XML</a><script>var a = \'<a href="/x.xml">\';</script><!-- <a href="/y.xml"> -->')
+    for page in article_pages:
+        assert extract_xml_links(page) == legacy_extract_xml_links(page)
@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+from dhq_website_scraper import check_if_link_exists, configure_site, download_file
+from http_cache import HTTPCache
+from http_client import configure_client
+from synthetic_corpus import SyntheticCorpus, SyntheticSite
+
+def test_offline_streamed_requests_never_reach_the_network(tmp_path):
+    corpus = SyntheticCorpus(30)
+    volume, issue = corpus.volume_issue(0)
+    with SyntheticSite(corpus) as site:
+        configure_site(site.url, site.url)
+        cached_url = f"{site.url}/dhq/vol/{volume}/{issue}/{corpus.article_id(0)}/{corpus.article_id(0)}.html"
+        other_url = f"{site.url}/dhq/vol/{volume}/{issue}/{corpus.article_id(1)}/{corpus.article_id(1)}.html"
+        xml_url = f"{site.url}/dhq/vol/{volume}/{issue}/{corpus.article_id(0)}.xml"
+        configure_client(requests_per_second=None, cache=HTTPCache(str(tmp_path / "cache"))).get(cached_url)
+        xml_path = tmp_path / "000001.xml"
+        assert download_file(xml_url, str(xml_path)) == 200
+
+        client = configure_client(requests_per_second=None, cache=HTTPCache(str(tmp_path / "cache"), offline=True))
+        # Cached pages are streamed from the cache, the others fail without a request
+        assert check_if_link_exists(cached_url)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            check_if_link_exists(other_url)
+        # Files already downloaded are kept
+        assert download_file(xml_url, str(xml_path)) == 200
+        assert client.stats['requests'] == 0
+        assert client.stats['cache_hits'] == 1
+
+def test_cache_hits_are_saved_once_on_close(tmp_path, monkeypatch):
+    corpus = SyntheticCorpus(30)
+    with SyntheticSite(corpus) as site:
+        urls = [f"{site.url}/dhq/vol/{volume}/{issue}/index.html" for volume, issue in corpus.issues()]
+        cache = HTTPCache(str(tmp_path / "cache"), max_age=3600)
+        client = configure_client(requests_per_second=None, cache=cache)
+        for url in urls:
+            client.get(url)
+        stored_access = {url: cache.lookup(url)['last_access'] for url in urls}
+
+        writes = []
+        write_meta = cache._write_meta
+        monkeypatch.setattr(cache, "_write_meta", lambda meta: writes.append(meta['url']) or write_meta(meta))
+        for _ in range(3):
+            for url in urls:
+                assert client.get(url).text
+        assert client.stats['requests'] == len(urls)
+        assert writes == []
+
+        # Each entry used is written once, with its latest access
+        cache.close()
+        assert sorted(writes) == sorted(urls)
+        reloaded = HTTPCache(str(tmp_path / "cache"), max_age=3600)
+        assert all(reloaded.lookup(url)['last_access'] > stored_access[url] for url in urls)
@@ -0,0 +1,23 @@
+from sqlite_catalog import connect, remove_articles, upsert_articles
+
+def article(article_id: str, authors: list, keywords: str) -> dict:
+    return {'DHQarticle-id': article_id, 'volume': "001", 'issue': "1", 'title': f"Article {article_id}",
+            'authors': [{'author_name': name} for name in authors], 'dhq_keywords': keywords}
+
+def names(conn, table: str, column: str) -> list:
+    return sorted(row[0] for row in conn.execute(f"SELECT {column} FROM {table}"))
+
+def test_upserts_drop_orphan_authors_and_keywords(tmp_path):
+    conn = connect(str(tmp_path / "catalog.sqlite"))
+    upsert_articles(conn, [article("000001", ["Ada", "Ben"], "maps; text"), article("000002", ["Ben"], "text")])
+    assert names(conn, 'authors', 'name') == ["Ada", "Ben"]
+
+    # Ada and the keyword "maps" are only referred to by the old version of the first article
+    assert upsert_articles(conn, [article("000001", ["Cy"], "networks"), article("000002", ["Ben"], "text")]) == 1
+    assert names(conn, 'authors', 'name') == ["Ben", "Cy"]
+    assert names(conn, 'keywords', 'keyword') == ["networks", "text"]
+
+    remove_articles(conn, ["000001"])
+    assert names(conn, 'authors', 'name') == ["Ben"]
+    assert names(conn, 'keywords', 'keyword') == ["text"]
+    conn.close()
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from storage import STORES, CSVStore, DatasetStore
+
+def test_backends_implement_the_interface():
+    for store in STORES.values():
+        store()
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class ReadOnlyStore(DatasetStore):
+        extension = ".txt"
+        def read(self, path, columns=None) -> pd.DataFrame:
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore()
+    with pytest.raises(TypeError):
+        DatasetStore()
+
+def test_batched_table_round_trip(tmp_path):
+    path = str(tmp_path / "table.csv")
+    with CSVStore().writer(path, ['DHQarticle-id', 'title']) as writer:
+        writer.write(pd.DataFrame({'DHQarticle-id': ["000001"], 'title': ["First"]}))
+        writer.write(pd.DataFrame({'title': ["Second"], 'DHQarticle-id': ["000002"]}))
+    assert CSVStore().read(path).to_dict('records') == [{'DHQarticle-id': "000001", 'title': "First"}, {'DHQarticle-id': "000002", 'title': "Second"}]